@@ -21,10 +21,22 @@ from OCCT.Adaptor3d import Adaptor3d_Curve, Adaptor3d_Surface
 from OCCT.BRepAdaptor import (BRepAdaptor_Curve, BRepAdaptor_CompCurve,
                               BRepAdaptor_Surface)
 from OCCT.GCPnts import GCPnts_AbscissaPoint
+from OCCT.GeomAbs import GeomAbs_Shape
 from OCCT.GeomAdaptor import GeomAdaptor_Curve, GeomAdaptor_Surface
+from OCCT.Precision import Precision
+from OCCT.TColStd import TColStd_Array1OfReal
+from OCCT.BRepTopAdaptor import BRepTopAdaptor_FClass2d
+from OCCT.TopAbs import TopAbs_IN, TopAbs_ON
+from OCCT.TopoDS import TopoDS_Edge
+from OCCT.gp import gp_Identity, gp_Pnt, gp_Pnt2d, gp_Vec
+from numpy import (abs as np_abs, arange, array, asarray, clip, concatenate,
+                   cross, cumsum, empty, float64, linspace, meshgrid, ones,
+                   searchsorted, unique, vander, where, zeros)
+from numpy.linalg import norm, solve
+from numpy.polynomial.legendre import leggauss
 
 __all__ = ["AdaptorBase", "AdaptorCurve", "GeomAdaptorCurve",
-           "EdgeAdaptorCurve", "WireAdaptorCurve",
+           "EdgeAdaptorCurve", "WireAdaptorCurve", "ArcLengthTable",
            "AdaptorSurface", "GeomAdaptorSurface", "FaceAdaptorSurface"]
 
 
@@ -164,6 +176,93 @@ class AdaptorCurve(AdaptorBase):
             u1, u2 = u2, u1
         return GCPnts_AbscissaPoint.Length_(self.object, u1, u2, tol)
 
+    def eval_many(self, u):
+        """
+        Evaluate points on the curve at many parameters.
+
+        :param array_like u: Curve parameters.
+
+        :return: Curve points as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        u = asarray(u, dtype=float64).ravel()
+        pnts = empty((u.size, 3), dtype=float64)
+        crv = self.object
+        p = gp_Pnt()
+        for i, ui in enumerate(u.tolist()):
+            crv.D0(ui, p)
+            pnts[i] = p.X(), p.Y(), p.Z()
+        return pnts
+
+    def deriv_many(self, u, d=1):
+        """
+        Evaluate derivatives on the curve at many parameters.
+
+        :param array_like u: Curve parameters.
+        :param int d: Derivative to evaluate.
+
+        :return: Curve derivatives as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        u = asarray(u, dtype=float64).ravel()
+        ders = empty((u.size, 3), dtype=float64)
+        crv = self.object
+        if d == 1:
+            p, v = gp_Pnt(), gp_Vec()
+            for i, ui in enumerate(u.tolist()):
+                crv.D1(ui, p, v)
+                ders[i] = v.X(), v.Y(), v.Z()
+        else:
+            for i, ui in enumerate(u.tolist()):
+                v = crv.DN(ui, d)
+                ders[i] = v.X(), v.Y(), v.Z()
+        return ders
+
+    def arc_length_many(self, u, tol=1.0e-7):
+        """
+        Calculate the curve length from the first parameter to many
+        parameters. The parameters are sorted so that each part of the curve
+        is only integrated once.
+
+        :param array_like u: Curve parameters.
+        :param float tol: The tolerance.
+
+        :return: Curve lengths. Lengths to parameters before the first
+            parameter are negative.
+        :rtype: numpy.ndarray
+        """
+        u = asarray(u, dtype=float64)
+        prms, indx = unique(concatenate(([self.u1], u.ravel())),
+                            return_inverse=True)
+        crv = self.object
+        seg = [GCPnts_AbscissaPoint.Length_(crv, a, b, tol)
+               for a, b in zip(prms[:-1].tolist(), prms[1:].tolist())]
+        s = concatenate(([0.], cumsum(seg)))
+        s -= s[indx[0]]
+        return s[indx[1:]].reshape(u.shape)
+
+    def arc_length_table(self, nseg=64, ngauss=5):
+        """
+        Get the arc-length table of the curve. The table is built once for
+        each *nseg* and *ngauss* and cached on the adaptor.
+
+        :param int nseg: Number of segments between the first and last
+            parameters. Segments are also split at continuity breaks.
+        :param int ngauss: Number of Gauss points per segment.
+
+        :return: The table.
+        :rtype: afem.adaptor.entities.ArcLengthTable
+        """
+        try:
+            tables = self._tables
+        except AttributeError:
+            tables = self._tables = {}
+
+        key = (int(nseg), int(ngauss))
+        if key not in tables:
+            tables[key] = ArcLengthTable(self, nseg, ngauss)
+        return tables[key]
+
     @staticmethod
     def to_adaptor(entity):
         """
@@ -171,6 +270,7 @@ class AdaptorCurve(AdaptorBase):
 
         :param entity: The entity.
         :type entity: afem.adaptor.entities.AdaptorCurve or
+            afem.adaptor.entities.ArcLengthTable or
             afem.geometry.entities.Curve or afem.topology.entities.Edge or
             afem.topology.entities.Wire
 
@@ -185,6 +285,8 @@ class AdaptorCurve(AdaptorBase):
 
         if isinstance(entity, AdaptorCurve):
             return entity
+        if isinstance(entity, ArcLengthTable):
+            return entity.adaptor
         if isinstance(entity, Curve):
             return GeomAdaptorCurve.by_curve(entity)
         if isinstance(entity, Edge):
@@ -225,6 +327,44 @@ class GeomAdaptorCurve(AdaptorCurve):
 
         return cls(adp_crv)
 
+    @property
+    def curve(self):
+        """
+        :return: The underlying curve.
+        :rtype: afem.geometry.entities.Curve
+        """
+        # Avoid circular import
+        from afem.geometry.entities import Curve
+
+        return Curve.wrap(self.object.Curve())
+
+    def eval_many(self, u):
+        """
+        Evaluate points on the curve at many parameters. The evaluation is
+        done by the underlying curve, which is vectorized for non-periodic
+        NURBS curves.
+
+        :param array_like u: Curve parameters.
+
+        :return: Curve points as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        return self.curve.eval_many(u)
+
+    def deriv_many(self, u, d=1):
+        """
+        Evaluate derivatives on the curve at many parameters. The evaluation
+        is done by the underlying curve, which is vectorized for non-periodic
+        NURBS curves.
+
+        :param array_like u: Curve parameters.
+        :param int d: Derivative to evaluate.
+
+        :return: Curve derivatives as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        return self.curve.deriv_many(u, d)
+
 
 class EdgeAdaptorCurve(AdaptorCurve):
     """
@@ -250,6 +390,46 @@ class EdgeAdaptorCurve(AdaptorCurve):
             adp_crv = BRepAdaptor_Curve(edge.object, face.object)
         return cls(adp_crv)
 
+    def eval_many(self, u):
+        """
+        Evaluate points on the curve at many parameters. If the edge has a
+        3-D curve it is evaluated in a batch and then moved by the location
+        of the edge.
+
+        :param array_like u: Curve parameters.
+
+        :return: Curve points as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        if not self.object.Is3DCurve():
+            return super(EdgeAdaptorCurve, self).eval_many(u)
+        pnts = self._geom_adaptor.eval_many(u)
+        return _transform(pnts, _trsf_matrix(self.object.Trsf()), True)
+
+    def deriv_many(self, u, d=1):
+        """
+        Evaluate derivatives on the curve at many parameters. If the edge has
+        a 3-D curve it is evaluated in a batch and then rotated by the
+        location of the edge.
+
+        :param array_like u: Curve parameters.
+        :param int d: Derivative to evaluate.
+
+        :return: Curve derivatives as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        if not self.object.Is3DCurve():
+            return super(EdgeAdaptorCurve, self).deriv_many(u, d)
+        ders = self._geom_adaptor.deriv_many(u, d)
+        return _transform(ders, _trsf_matrix(self.object.Trsf()), False)
+
+    @property
+    def _geom_adaptor(self):
+        """
+        The adaptor of the 3-D curve without the edge location.
+        """
+        return GeomAdaptorCurve(self.object.Curve())
+
 
 class WireAdaptorCurve(AdaptorCurve):
     """
@@ -273,6 +453,326 @@ class WireAdaptorCurve(AdaptorCurve):
         adp_crv = BRepAdaptor_CompCurve(wire.object, curvilinear_knots)
         return cls(adp_crv)
 
+    def eval_many(self, u):
+        """
+        Evaluate points on the curve at many parameters. The parameters are
+        routed to the edges of the wire using a cached parameter map and each
+        edge is evaluated in a batch.
+
+        :param array_like u: Curve parameters.
+
+        :return: Curve points as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        u = asarray(u, dtype=float64).ravel()
+        pnts = empty((u.size, 3), dtype=float64)
+        for indx, adp_edge, uloc, _ in self._route(u):
+            pnts[indx] = adp_edge.eval_many(uloc)
+        return pnts
+
+    def deriv_many(self, u, d=1):
+        """
+        Evaluate derivatives on the curve at many parameters. The parameters
+        are routed to the edges of the wire using a cached parameter map and
+        each edge is evaluated in a batch.
+
+        :param array_like u: Curve parameters.
+        :param int d: Derivative to evaluate.
+
+        :return: Curve derivatives as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        u = asarray(u, dtype=float64).ravel()
+        ders = empty((u.size, 3), dtype=float64)
+        for indx, adp_edge, uloc, scale in self._route(u):
+            ders[indx] = adp_edge.deriv_many(uloc, d) * scale ** d
+        return ders
+
+    def parameter_map(self):
+        """
+        Build the map from the wire parameters to the edge parameters. The
+        map is built once and cached. Within each interval the edge parameter
+        is an affine function of the wire parameter.
+
+        :return: The interval breakpoints of size N + 1, the edge adaptor of
+            each interval, and the offset and scale of each interval so that
+            the edge parameter is ``offset + scale * u``.
+        :rtype: tuple(numpy.ndarray,
+            list(afem.adaptor.entities.EdgeAdaptorCurve), numpy.ndarray,
+            numpy.ndarray)
+        """
+        try:
+            return self._prm_map
+        except AttributeError:
+            pass
+
+        crv = self.object
+        nint = crv.NbIntervals(GeomAbs_Shape.GeomAbs_C0)
+        tcol_array = TColStd_Array1OfReal(1, nint + 1)
+        crv.Intervals(tcol_array, GeomAbs_Shape.GeomAbs_C0)
+        brks = array([tcol_array.Value(i) for i in range(1, nint + 2)],
+                     dtype=float64)
+
+        # Find the edge and affine map of each interval from two samples
+        adp_edges = []
+        offset = empty(nint, dtype=float64)
+        scale = empty(nint, dtype=float64)
+        edge = TopoDS_Edge()
+        for i in range(nint):
+            a, b = brks[i], brks[i + 1]
+            ua, ub = a + (b - a) / 3., a + 2. * (b - a) / 3.
+            ta = crv.Edge(ua, edge, 0.)
+            tb = crv.Edge(ub, edge, 0.)
+            scale[i] = (tb - ta) / (ub - ua)
+            offset[i] = ta - scale[i] * ua
+            adp_edges.append(EdgeAdaptorCurve(BRepAdaptor_Curve(edge)))
+
+        self._prm_map = brks, adp_edges, offset, scale
+        return self._prm_map
+
+    def _route(self, u):
+        """
+        Group the parameters by interval and convert them to edge parameters.
+        """
+        brks, adp_edges, offset, scale = self.parameter_map()
+        k = ArcLengthTable._segment(brks, u)
+        for i in unique(k).tolist():
+            indx = where(k == i)[0]
+            uloc = offset[i] + scale[i] * u[indx]
+            yield indx, adp_edges[i], uloc, scale[i]
+
+
+class ArcLengthTable(object):
+    """
+    Table of cumulative arc length along a curve. The curve speed is
+    sampled once at Gauss points on each segment and then interpolated by a
+    polynomial, so conversions between parameter and arc length are
+    vectorized and do not evaluate the curve again. Build a table once and
+    reuse it when the same reference curve is used for many queries.
+
+    :param c: The curve.
+    :type c: afem.adaptor.entities.AdaptorCurve or
+        afem.geometry.entities.Curve or afem.topology.entities.Edge or
+        afem.topology.entities.Wire
+    :param int nseg: Number of segments between the first and last
+        parameters. Segments are also split at continuity breaks.
+    :param int ngauss: Number of Gauss points per segment.
+
+    :raise ValueError: If *nseg* or *ngauss* is less than one or if the curve
+        is not bounded.
+
+    .. note::
+
+        Arc length is measured from the first parameter of the curve.
+        Parameters and arc lengths outside the curve domain are clamped to
+        the curve bounds.
+    """
+
+    def __init__(self, c, nseg=64, ngauss=5):
+        nseg = int(nseg)
+        ngauss = int(ngauss)
+        if nseg < 1 or ngauss < 1:
+            raise ValueError('The number of segments and Gauss points must '
+                             'be at least one.')
+
+        adp_crv = AdaptorCurve.to_adaptor(c)
+        u1, u2 = adp_crv.u1, adp_crv.u2
+        if Precision.IsInfinite_(u1) or Precision.IsInfinite_(u2):
+            raise ValueError('An arc-length table requires a bounded curve.')
+
+        # Segment breakpoints including continuity breaks
+        brks = linspace(u1, u2, nseg + 1)
+        nint = adp_crv.object.NbIntervals(GeomAbs_Shape.GeomAbs_C2)
+        if nint > 1:
+            tcol_array = TColStd_Array1OfReal(1, nint + 1)
+            adp_crv.object.Intervals(tcol_array, GeomAbs_Shape.GeomAbs_C2)
+            ui = [tcol_array.Value(i) for i in range(1, nint + 2)]
+            brks = unique(concatenate((brks, clip(ui, u1, u2))))
+        h = brks[1:] - brks[:-1]
+        keep = h > 0.
+        brks = concatenate((brks[:-1][keep], [brks[-1]]))
+        h = h[keep]
+        nseg = h.size
+
+        # Curve speed at Gauss points of each segment
+        x, wts = leggauss(ngauss)
+        prms = brks[:-1, None] + 0.5 * (x + 1.) * h[:, None]
+        speed = norm(adp_crv.deriv_many(prms.ravel()), axis=1)
+        speed = speed.reshape(nseg, ngauss)
+
+        # Interpolating polynomial of the speed on [-1, 1] for each segment
+        coef = solve(vander(x, ngauss, increasing=True), speed.T).T
+
+        # Cumulative length at the breakpoints
+        slen = 0.5 * h * speed.dot(wts)
+        s = zeros(nseg + 1, dtype=float64)
+        s[1:] = cumsum(slen)
+
+        self._adp_crv = adp_crv
+        self._brks = brks
+        self._h = h
+        self._coef = coef
+        self._s = s
+
+    @property
+    def adaptor(self):
+        """
+        :return: The adaptor curve.
+        :rtype: afem.adaptor.entities.AdaptorCurve
+        """
+        return self._adp_crv
+
+    @property
+    def u1(self):
+        """
+        :return: The first parameter.
+        :rtype: float
+        """
+        return self._brks[0]
+
+    @property
+    def u2(self):
+        """
+        :return: The last parameter.
+        :rtype: float
+        """
+        return self._brks[-1]
+
+    @property
+    def length(self):
+        """
+        :return: Curve length.
+        :rtype: float
+        """
+        return self._s[-1]
+
+    @property
+    def nseg(self):
+        """
+        :return: Number of segments in the table.
+        :rtype: int
+        """
+        return self._h.size
+
+    def arc_length(self, u):
+        """
+        Calculate the arc length from the first parameter of the curve.
+
+        :param u: Curve parameter(s).
+        :type u: float or array_like
+
+        :return: Arc length(s).
+        :rtype: float or numpy.ndarray
+        """
+        u = asarray(u, dtype=float64)
+        uc = clip(u.ravel(), self._brks[0], self._brks[-1])
+        k = self._segment(self._brks, uc)
+        t = 2. * (uc - self._brks[k]) / self._h[k] - 1.
+        s = self._s[k] + 0.5 * self._h[k] * self._integral(k, t)
+        return self._output(s, u)
+
+    def arc_length_between(self, u1, u2):
+        """
+        Calculate the curve length between the parameters.
+
+        :param float u1: First parameter.
+        :param float u2: Last parameter.
+
+        :return: Curve length.
+        :rtype: float
+        """
+        return abs(self.arc_length(u2) - self.arc_length(u1))
+
+    def parameter(self, s, tol=1.0e-12, niter=20):
+        """
+        Find the parameter at an arc length from the first parameter of the
+        curve.
+
+        :param s: Arc length(s).
+        :type s: float or array_like
+        :param float tol: Tolerance on the arc length.
+        :param int niter: Maximum number of Newton iterations.
+
+        :return: Curve parameter(s).
+        :rtype: float or numpy.ndarray
+        """
+        s = asarray(s, dtype=float64)
+        sc = clip(s.ravel(), 0., self._s[-1])
+        k = self._segment(self._s, sc)
+        s1, ds = self._s[k], self._s[k + 1] - self._s[k]
+        hk = 0.5 * self._h[k]
+
+        # Initial guess from linear interpolation and then Newton iterations
+        # on the arc length polynomial
+        t = where(ds > 0., 2. * (sc - s1) / where(ds > 0., ds, 1.) - 1., -1.)
+        for _ in range(niter):
+            f = s1 + hk * self._integral(k, t) - sc
+            if np_abs(f).max() <= tol:
+                break
+            df = hk * self._speed(k, t)
+            dt = where(df > 0., f / where(df > 0., df, 1.), 0.)
+            t = clip(t - dt, -1., 1.)
+
+        u = self._brks[k] + (t + 1.) * hk
+        return self._output(u, s)
+
+    def parameters_by_number(self, n, u1=None, u2=None):
+        """
+        Find parameters that are equally spaced by arc length.
+
+        :param int n: Number of parameters.
+        :param float u1: The first parameter (default=*u1*).
+        :param float u2: The last parameter (default=*u2*).
+
+        :return: The parameters.
+        :rtype: numpy.ndarray
+        """
+        if u1 is None:
+            u1 = self.u1
+        if u2 is None:
+            u2 = self.u2
+        s1, s2 = self.arc_length([u1, u2])
+        prms = self.parameter(linspace(s1, s2, int(n)))
+        if prms.size > 0:
+            prms[0] = u1
+        if prms.size > 1:
+            prms[-1] = u2
+        return prms
+
+    @staticmethod
+    def _segment(brks, x):
+        """
+        Find the segment index of each value.
+        """
+        k = searchsorted(brks, x, side='right') - 1
+        return clip(k, 0, brks.size - 2)
+
+    def _speed(self, k, t):
+        """
+        Evaluate the speed polynomial at local parameters.
+        """
+        coef = self._coef[k]
+        powers = t[:, None] ** arange(coef.shape[1])
+        return (coef * powers).sum(axis=1)
+
+    def _integral(self, k, t):
+        """
+        Evaluate the integral of the speed polynomial from -1 to t.
+        """
+        coef = self._coef[k]
+        j = arange(1, coef.shape[1] + 1)
+        tj = t[:, None] ** j - (-1.) ** j
+        return (coef * tj / j).sum(axis=1)
+
+    @staticmethod
+    def _output(values, inputs):
+        """
+        Return a float for scalar inputs or an array of the input shape.
+        """
+        if inputs.ndim == 0:
+            return float(values[0])
+        return values.reshape(inputs.shape)
+
 
 class AdaptorSurface(AdaptorBase):
     """
@@ -377,6 +877,123 @@ class AdaptorSurface(AdaptorBase):
         dv = self.deriv(u, v, 0, 1)
         return Vector(du.Crossed(dv).XYZ())
 
+    def eval_many(self, u, v):
+        """
+        Evaluate points on the surface at many (u, v) pairs.
+
+        :param array_like u: Surface u-parameters.
+        :param array_like v: Surface v-parameters. Must be the same size as
+            *u*.
+
+        :return: Surface points as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+
+        :raise ValueError: If *u* and *v* are not the same size.
+        """
+        u, v = _check_uv(u, v)
+        geom = self._geom_surface()
+        if geom is not None:
+            srf, mat = geom
+            return _transform(srf.eval_many(u, v), mat, True)
+
+        pnts = empty((u.size, 3), dtype=float64)
+        srf = self.object
+        p = gp_Pnt()
+        for i, (ui, vi) in enumerate(zip(u.tolist(), v.tolist())):
+            srf.D0(ui, vi, p)
+            pnts[i] = p.X(), p.Y(), p.Z()
+        return pnts
+
+    def eval_grid(self, u, v):
+        """
+        Evaluate points on the surface over the tensor product grid of the
+        parameters.
+
+        :param array_like u: Surface u-parameters of size N.
+        :param array_like v: Surface v-parameters of size M.
+
+        :return: Surface points as an array of shape (N, M, 3).
+        :rtype: numpy.ndarray
+        """
+        u = asarray(u, dtype=float64).ravel()
+        v = asarray(v, dtype=float64).ravel()
+        geom = self._geom_surface()
+        if geom is not None:
+            srf, mat = geom
+            return _transform(srf.eval_grid(u, v), mat, True)
+
+        ug, vg = meshgrid(u, v, indexing='ij')
+        return self.eval_many(ug, vg).reshape(u.size, v.size, 3)
+
+    def deriv_many(self, u, v, nu, nv):
+        """
+        Evaluate derivatives on the surface at many (u, v) pairs.
+
+        :param array_like u: Surface u-parameters.
+        :param array_like v: Surface v-parameters. Must be the same size as
+            *u*.
+        :param int nu: Derivative in u-direction.
+        :param int nv: Derivative in v-direction.
+
+        :return: Surface derivatives as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+
+        :raise ValueError: If *u* and *v* are not the same size.
+        """
+        u, v = _check_uv(u, v)
+        geom = self._geom_surface()
+        if geom is not None:
+            srf, mat = geom
+            return _transform(srf.deriv_many(u, v, nu, nv), mat, False)
+
+        ders = empty((u.size, 3), dtype=float64)
+        srf = self.object
+        for i, (ui, vi) in enumerate(zip(u.tolist(), v.tolist())):
+            d = srf.DN(ui, vi, nu, nv)
+            ders[i] = d.X(), d.Y(), d.Z()
+        return ders
+
+    def norm_many(self, u, v):
+        """
+        Evaluate normals on the surface at many (u, v) pairs. Like
+        :meth:`norm`, the normals are not unit vectors.
+
+        :param array_like u: Surface u-parameters.
+        :param array_like v: Surface v-parameters. Must be the same size as
+            *u*.
+
+        :return: Surface normals as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+
+        :raise ValueError: If *u* and *v* are not the same size.
+        """
+        du = self.deriv_many(u, v, 1, 0)
+        dv = self.deriv_many(u, v, 0, 1)
+        return cross(du, dv)
+
+    def norm_grid(self, u, v):
+        """
+        Evaluate normals on the surface over the tensor product grid of the
+        parameters. Like :meth:`norm`, the normals are not unit vectors.
+
+        :param array_like u: Surface u-parameters of size N.
+        :param array_like v: Surface v-parameters of size M.
+
+        :return: Surface normals as an array of shape (N, M, 3).
+        :rtype: numpy.ndarray
+        """
+        u = asarray(u, dtype=float64).ravel()
+        v = asarray(v, dtype=float64).ravel()
+        ug, vg = meshgrid(u, v, indexing='ij')
+        return self.norm_many(ug, vg).reshape(u.size, v.size, 3)
+
+    def _geom_surface(self):
+        """
+        The underlying surface and location matrix used for batch evaluation,
+        or *None* if not available.
+        """
+        return None
+
     @staticmethod
     def to_adaptor(entity):
         """
@@ -441,6 +1058,12 @@ class GeomAdaptorSurface(AdaptorSurface):
 
         return cls(adp_srf)
 
+    def _geom_surface(self):
+        # Avoid circular import
+        from afem.geometry.entities import Surface
+
+        return Surface.wrap(self.object.Surface()), None
+
 
 class FaceAdaptorSurface(AdaptorSurface):
     """
@@ -463,3 +1086,92 @@ class FaceAdaptorSurface(AdaptorSurface):
         """
         adp_srf = BRepAdaptor_Surface(face.object, restrict)
         return cls(adp_srf)
+
+    def classify_many(self, u, v, tol=1.0e-7, include_boundary=True):
+        """
+        Classify many (u, v) pairs against the boundary of the face. The
+        classifier is built once per tolerance and cached, and pairs outside
+        the uv-bounds of the face are rejected without calling it.
+
+        :param array_like u: Surface u-parameters.
+        :param array_like v: Surface v-parameters. Must be the same size as
+            *u*.
+        :param float tol: The parametric tolerance.
+        :param bool include_boundary: Option to treat pairs on the boundary
+            as inside the face.
+
+        :return: *True* for each pair inside the face, *False* if not.
+        :rtype: numpy.ndarray
+
+        :raise ValueError: If *u* and *v* are not the same size.
+        """
+        u, v = _check_uv(u, v)
+        adp_srf = self.object
+
+        # Reject pairs outside the uv-bounds of non-periodic directions
+        is_candidate = ones(u.size, dtype=bool)
+        if not adp_srf.IsUPeriodic():
+            is_candidate &= (u >= self.u1 - tol) & (u <= self.u2 + tol)
+        if not adp_srf.IsVPeriodic():
+            is_candidate &= (v >= self.v1 - tol) & (v <= self.v2 + tol)
+
+        try:
+            fclass = self._fclass[tol]
+        except AttributeError:
+            self._fclass = {}
+            fclass = None
+        except KeyError:
+            fclass = None
+        if fclass is None:
+            fclass = BRepTopAdaptor_FClass2d(adp_srf.Face(), tol)
+            self._fclass[tol] = fclass
+
+        is_in = zeros(u.size, dtype=bool)
+        uv = gp_Pnt2d()
+        for i in where(is_candidate)[0].tolist():
+            uv.SetCoord(u[i], v[i])
+            state = fclass.Perform(uv)
+            is_in[i] = (state == TopAbs_IN or
+                        (include_boundary and state == TopAbs_ON))
+        return is_in
+
+    def _geom_surface(self):
+        # Avoid circular import
+        from afem.geometry.entities import Surface
+
+        adp_srf = self.object
+        srf = Surface.wrap(adp_srf.Surface().Surface())
+        return srf, _trsf_matrix(adp_srf.Trsf())
+
+
+def _check_uv(u, v):
+    """
+    Convert the parameters to 1-D arrays of the same size.
+    """
+    u = asarray(u, dtype=float64).ravel()
+    v = asarray(v, dtype=float64).ravel()
+    if u.size != v.size:
+        raise ValueError('The u and v parameters must be the same size.')
+    return u, v
+
+
+def _trsf_matrix(trsf):
+    """
+    The 3 x 4 matrix of the transformation or *None* if identity.
+    """
+    if trsf.Form() == gp_Identity:
+        return None
+    return array([[trsf.Value(i, j) for j in range(1, 5)]
+                  for i in range(1, 4)], dtype=float64)
+
+
+def _transform(xyz, mat, is_point):
+    """
+    Apply the transformation matrix to an array of points or vectors.
+    """
+    if mat is None:
+        return xyz
+    xyz = xyz.dot(mat[:, :3].T)
+    if is_point:
+        xyz += mat[:, 3]
+    return xyz
@@ -25,7 +25,9 @@ from afem.geometry.check import CheckGeom
 from afem.geometry.create import (PointFromParameter, PlaneFromParameter,
                                   PlaneByPoints)
 from afem.geometry.entities import TrimmedCurve
-from afem.geometry.project import ProjectPointToCurve, ProjectPointToSurface
+from afem.geometry.project import (ProjectPointToCurve, ProjectPointToSurface,
+                                   ProjectPointsToCurve,
+                                   ProjectPointsToSurface)
 from afem.topology.bop import IntersectShapes
 from afem.topology.create import (CompoundByShapes, PointsAlongShapeByNumber,
                                   PointsAlongShapeByDistance, ShellByFaces,
@@ -192,7 +194,7 @@ class ShapeHolder(NamedItem, ViewableItem):
 
     def set_shape(self, shape):
         """
-        Set the shape.
+        Set the shape. The cached sub-shape maps of the shape are cleared.
 
         :param afem.topology.entities.Shape shape: The shape.
 
@@ -217,6 +219,10 @@ class ShapeHolder(NamedItem, ViewableItem):
                                                       expected))
             logger.warning(msg)
 
+        # The shape may have been modified in place so clear its topology
+        # cache
+        if isinstance(shape, Shape):
+            shape.invalidate_cache()
         self._shape = shape
 
     def set_cref(self, cref):
@@ -486,6 +492,11 @@ class ShapeHolder(NamedItem, ViewableItem):
         :return: List of status for each point.
         :rtype: list(bool)
         """
+        if direction is None:
+            pnts = list(pnts)
+            proj = ProjectPointsToCurve(pnts, self._cref)
+            return proj.update_points(pnts)
+
         success = []
         for p in pnts:
             status = self.point_to_cref(p, direction)
@@ -522,6 +533,11 @@ class ShapeHolder(NamedItem, ViewableItem):
         :return: List of status for each point.
         :rtype: list(bool)
         """
+        if direction is None:
+            pnts = list(pnts)
+            proj = ProjectPointsToSurface(pnts, self._sref)
+            return proj.update_points(pnts)
+
         success = []
         for p in pnts:
             status = self.point_to_sref(p, direction)
@@ -713,7 +729,7 @@ class ShapeHolder(NamedItem, ViewableItem):
         if builder.nwires == 1:
             wire = builder.wires[0]
         else:
-            dist = DistancePointToShapes(p1, builder.wires)
+            dist = DistancePointToShapes(p1, builder.wires, k=1)
             wire = dist.nearest_shape
         crv = wire.curve
 
@@ -23,3 +23,4 @@ from afem.geometry.distance import *
 from afem.geometry.entities import *
 from afem.geometry.intersect import *
 from afem.geometry.project import *
+from afem.geometry.tessellate import *
@@ -17,10 +17,10 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
-
-from afem.geometry.entities import (Point, Point2D, Vector, Vector2D,
-                                    Direction, Plane, Curve, TrimmedCurve,
-                                    NurbsCurve2D, Line, Surface, Axis3)
+from afem.geometry.entities import (Point, Point2D, PointArray, Vector,
+                                    Vector2D, Direction, Plane, Curve,
+                                    TrimmedCurve, NurbsCurve2D, Line, Surface,
+                                    Axis3)
 
 __all__ = ["CheckGeom"]
 
@@ -73,11 +73,16 @@ class CheckGeom(object):
         """
         Convert entities to points if possible.
 
-        :param list(point_like) geoms: List of entities.
+        :param geoms: List of entities. A point array is returned as is.
+        :type geoms: list(point_like) or
+            afem.geometry.entities.PointArray
 
         :return: List of points.
-        :rtype: list(afem.geometry.entities.Point)
+        :rtype: list(afem.geometry.entities.Point) or
+            afem.geometry.entities.PointArray
         """
+        if isinstance(geoms, PointArray):
+            return geoms
         return [CheckGeom.to_point(p) for p in geoms if
                 CheckGeom.is_point_like(p)]
 
@@ -270,19 +275,22 @@ class CheckGeom(object):
         Find the point nearest to a given point.
 
         :param point_like p: The point.
-        :param  list(point_like) pnts: List of points.
+        :param pnts: List of points or an existing index of points. Provide
+            an index when searching the same points many times.
+        :type pnts: list(point_like) or afem.geometry.entities.PointArray or
+            afem.geometry.distance.PointIndex
 
         :return: The nearest point.
         :rtype: afem.geometry.entities.Point
         """
+        # Avoid circular import
+        from afem.geometry.distance import PointIndex
+
         p = CheckGeom.to_point(p)
-        pnts = [CheckGeom.to_point(pi) for pi in pnts]
-
-        dmin = p.distance(pnts[0])
-        pmin = pnts[0]
-        for pi in pnts[1:]:
-            di = p.distance(pi)
-            if di < dmin:
-                dmin = di
-                pmin = pi
-        return pmin
+        if isinstance(pnts, PointIndex):
+            return pnts.nearest_point(p)
+
+        # A one-off search does not pay for building a tree
+        xyz = PointArray(pnts).xyz
+        d2 = ((xyz - p.xyz) ** 2).sum(axis=1)
+        return Point(*xyz[int(d2.argmin())])
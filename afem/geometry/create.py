@@ -30,24 +30,26 @@ from OCCT.GeomAPI import (GeomAPI_IntCS, GeomAPI_Interpolate,
 from OCCT.GeomFill import (GeomFill_AppSurf, GeomFill_Line,
                            GeomFill_SectionGenerator)
 from OCCT.GeomPlate import GeomPlate_BuildAveragePlane
+from OCCT.Precision import Precision
 from OCCT.TColStd import TColStd_Array1OfInteger, TColStd_Array1OfReal
 from OCCT.TColgp import TColgp_Array1OfPnt
 from OCCT.gce import gce_MakeCirc
-from OCCT.gp import gp_Ax3, gp_Pln, gp_Quaternion, gp_Trsf
+from OCCT.gp import gp_Ax3, gp_Dir, gp_Pln, gp_Pnt, gp_Quaternion, gp_Trsf
 from OCCT.gp import gp_Extrinsic_XYZ
-from numpy import array, cross, mean, zeros
+from numpy import (arange, array, asarray, cross, linspace, mean, ones, tile,
+                   unique)
 from numpy.linalg import norm
-from scipy.linalg import lu_factor, lu_solve
 
-from afem.adaptor.entities import AdaptorCurve
+from afem.adaptor.entities import AdaptorCurve, ArcLengthTable
 from afem.config import logger
 from afem.geometry import utils as geom_utils
 from afem.geometry.check import CheckGeom
-from afem.geometry.entities import (Direction, Vector, Point, Line, Circle,
-                                    Plane, NurbsCurve, Geometry, NurbsCurve2D,
-                                    Curve, TrimmedCurve, Axis3,
+from afem.geometry.entities import (Direction, Vector, Point, PointArray,
+                                    Line, Circle, Plane, NurbsCurve, Geometry,
+                                    NurbsCurve2D, Curve, TrimmedCurve, Axis3,
                                     NurbsSurface)
-from afem.geometry.project import ProjectPointToCurve, ProjectPointToSurface
+from afem.geometry.project import (ProjectPointToCurve, ProjectPointToSurface,
+                                   ProjectPointsToSurface)
 from afem.occ import utils as occ_utils
 
 __all__ = ["PointByXYZ", "PointByArray",
@@ -58,17 +60,18 @@ __all__ = ["PointByXYZ", "PointByArray",
            "CircleByPlane", "CircleBy3Points",
            "NurbsCurve2DByInterp", "NurbsCurve2DByApprox",
            "NurbsCurve2DByPoints",
-           "NurbsCurveByInterp", "NurbsCurveByApprox",
-           "NurbsCurveByPoints",
+           "NurbsCurveByInterp", "NurbsCurvesByInterp", "NurbsCurveByApprox",
+           "NurbsCurveByPoints", "NurbsCurveByFit",
            "TrimmedCurveByPoints",
            "PlaneByNormal", "PlaneByAxes", "PlaneByPoints", "PlaneByApprox",
            "PlaneFromParameter", "PlaneByOrientation",
-           "PlaneByCurveAndSurface",
+           "PlaneByCurveAndSurface", "PlanesBuilder",
            "PlanesAlongCurveByNumber",
            "PlanesAlongCurveByDistance", "PlanesBetweenPlanesByNumber",
            "PlanesBetweenPlanesByDistance",
            "PlanesAlongCurveAndSurfaceByDistance",
-           "NurbsSurfaceByInterp", "NurbsSurfaceByApprox"]
+           "NurbsSurfaceByInterp", "NurbsSurfaceByApprox",
+           "NurbsSurfaceByFit"]
 
 
 # POINT -----------------------------------------------------------------------
@@ -113,8 +116,11 @@ class PointFromParameter(object):
     """
     Create a point along a curve at a specified distance from a parameter.
 
-    :param c: The curve.
-    :type c: afem.adaptor.entities.AdaptorCurve or afem.geometry.entities.Curve
+    :param c: The curve. If an arc-length table is provided it is used
+        instead of ``GCPnts_AbscissaPoint``. A bounded curve or adaptor curve
+        uses the table stored on it, which is built on first use.
+    :type c: afem.adaptor.entities.AdaptorCurve or
+        afem.adaptor.entities.ArcLengthTable or afem.geometry.entities.Curve
         or afem.topology.entities.Edge or afem.topology.entities.Wire
     :param float u0: The initial parameter.
     :param float ds: The distance along the curve from the given parameter.
@@ -124,18 +130,34 @@ class PointFromParameter(object):
     def __init__(self, c, u0, ds, tol=1.0e-7):
         adp_curve = AdaptorCurve.to_adaptor(c)
 
-        tool = GCPnts_AbscissaPoint(tol, adp_curve.object, ds, u0)
-        if not tool.IsDone():
-            msg = 'GCPnts_AbscissaPoint failed in PointFromParameter.'
-            logger.warning(msg)
-
-        self._is_done = tool.IsDone()
         self._u, self._p = None, None
+        table = _arc_length_table(c, [u0])
+        if table is not None:
+            s = table.arc_length(u0) + ds
+            inside = -tol <= s <= table.length + tol
+            if not inside and table is not c:
+                # Let OpenCASCADE handle points beyond the curve bounds
+                table = None
+
+        if table is not None:
+            self._is_done = inside
+            if self._is_done:
+                self._u = table.parameter(s)
+            else:
+                msg = ('Distance is outside the arc-length table in '
+                       'PointFromParameter.')
+                logger.warning(msg)
+        else:
+            tool = GCPnts_AbscissaPoint(tol, adp_curve.object, ds, u0)
+            if not tool.IsDone():
+                msg = 'GCPnts_AbscissaPoint failed in PointFromParameter.'
+                logger.warning(msg)
+            self._is_done = tool.IsDone()
+            if self._is_done:
+                self._u = tool.Parameter()
+
         if self._is_done:
-            u = tool.Parameter()
-            self._u = u
-            p = adp_curve.eval(u)
-            self._p = p
+            self._p = adp_curve.eval(self._u)
 
     @property
     def is_done(self):
@@ -167,8 +189,11 @@ class PointsAlongCurveByNumber(object):
     Create a specified number of points along a curve. The points will be
     equidistant.
 
-    :param c: The curve.
-    :type c: afem.adaptor.entities.AdaptorCurve or afem.geometry.entities.Curve
+    :param c: The curve. If an arc-length table is provided it is used
+        instead of ``GCPnts_UniformAbscissa``. A bounded curve or adaptor
+        curve uses the table stored on it, which is built on first use.
+    :type c: afem.adaptor.entities.AdaptorCurve or
+        afem.adaptor.entities.ArcLengthTable or afem.geometry.entities.Curve
         or afem.topology.entities.Edge or afem.topology.entities.Wire
     :param int n: Number of points to create.
     :param float u1: The parameter of the first point (default=*c.u1*).
@@ -194,39 +219,46 @@ class PointsAlongCurveByNumber(object):
 
         # Adjust u1 and u2 if d1 or d2 != 0
         if d1 is not None:
-            tool = PointFromParameter(adp_crv, u1, d1, tol)
+            tool = PointFromParameter(c, u1, d1, tol)
             if tool.is_done:
                 u1 = tool.parameter
         if d2 is not None:
-            tool = PointFromParameter(adp_crv, u2, d2, tol)
+            tool = PointFromParameter(c, u2, d2, tol)
             if tool.is_done:
                 u2 = tool.parameter
 
         # Create uniform abscissa
-        tool = GCPnts_UniformAbscissa(adp_crv.object, n, u1, u2, tol)
-        if not tool.IsDone():
-            msg = 'GCPnts_UniformAbscissa failed in PointsAlongCurveByNumber.'
+        table = _arc_length_table(c, [u1, u2])
+        if table is not None:
+            prms = table.parameters_by_number(n, u1, u2).tolist()
+        else:
+            tool = GCPnts_UniformAbscissa(adp_crv.object, n, u1, u2, tol)
+            prms = None
+            if tool.IsDone():
+                prms = [tool.Parameter(i)
+                        for i in range(1, tool.NbPoints() + 1)]
+        if not prms:
+            msg = 'Failed to create uniform abscissa in ' \
+                  'PointsAlongCurveByNumber.'
             logger.warning(msg)
 
         # Gather results
-        self._is_done = tool.IsDone()
+        self._is_done = bool(prms)
         self._npts = 0
         self._prms = []
-        self._pnts = []
+        self._pnt_array = PointArray()
+        self._pnts = None
         self._ds = None
 
         if self._is_done:
-            self._npts = tool.NbPoints()
-            for i in range(1, self._npts + 1):
-                u = tool.Parameter(i)
-                p = adp_crv.eval(u)
-                self._pnts.append(p)
-                self._prms.append(u)
+            self._npts = len(prms)
+            self._prms = list(prms)
+            self._pnt_array = PointArray(adp_crv.eval_many(prms))
 
         # Point spacing
         self._ds = None
         if self._npts > 1:
-            ds = self._pnts[0].distance(self._pnts[1])
+            ds = self._pnt_array[0].distance(self._pnt_array[1])
             self._ds = ds
 
     @property
@@ -243,8 +275,18 @@ class PointsAlongCurveByNumber(object):
         :return: The points.
         :rtype: list(afem.geometry.entities.Point)
         """
+        if self._pnts is None:
+            self._pnts = self._pnt_array.to_points()
         return self._pnts
 
+    @property
+    def points_array(self):
+        """
+        :return: The points as evaluated on the curve in a single array.
+        :rtype: afem.geometry.entities.PointArray
+        """
+        return self._pnt_array
+
     @property
     def parameters(self):
         """
@@ -270,7 +312,7 @@ class PointsAlongCurveByNumber(object):
         """
         if self.npts < 3:
             return []
-        return self._pnts[1:-1]
+        return self.points[1:-1]
 
 
 class PointsAlongCurveByDistance(object):
@@ -279,8 +321,11 @@ class PointsAlongCurveByDistance(object):
     be equidistant. This method calculates the number of points given the
     curve length and then uses :class:`.PointsAlongCurveByNumber`.
 
-    :param c: The curve.
-    :type c: afem.adaptor.entities.AdaptorCurve or afem.geometry.entities.Curve
+    :param c: The curve. If an arc-length table is provided it is used
+        instead of ``GCPnts_UniformAbscissa``. A bounded curve or adaptor
+        curve uses the table stored on it, which is built on first use.
+    :type c: afem.adaptor.entities.AdaptorCurve or
+        afem.adaptor.entities.ArcLengthTable or afem.geometry.entities.Curve
         or afem.topology.entities.Edge or afem.topology.entities.Wire
     :param float maxd: The maximum allowed spacing between points. The
         actual spacing will be adjusted to not to exceed this value.
@@ -311,38 +356,41 @@ class PointsAlongCurveByDistance(object):
 
         # Adjust u1 and u2 if d1 or d2 != 0
         if d1 is not None:
-            tool = PointFromParameter(adp_crv, u1, d1, tol)
+            tool = PointFromParameter(c, u1, d1, tol)
             if tool.is_done:
                 u1 = tool.parameter
         if d2 is not None:
-            tool = PointFromParameter(adp_crv, u2, d2, tol)
+            tool = PointFromParameter(c, u2, d2, tol)
             if tool.is_done:
                 u2 = tool.parameter
 
         # Determine number of points
-        arc_length = adp_crv.arc_length(u1, u2, tol)
+        table = _arc_length_table(c, [u1, u2])
+        if table is not None:
+            arc_length = table.arc_length_between(u1, u2)
+        else:
+            arc_length = adp_crv.arc_length(u1, u2, tol)
         n = ceil(arc_length / maxd) + 1
         if n < nmin:
             n = nmin
 
         # Create uniform abscissa
-        ua = GCPnts_UniformAbscissa(adp_crv.object, int(n), u1, u2, tol)
-        if not ua.IsDone():
-            msg = "GCPnts_UniformAbscissa failed."
-            raise RuntimeError(msg)
+        if table is not None:
+            prms = table.parameters_by_number(n, u1, u2).tolist()
+        else:
+            ua = GCPnts_UniformAbscissa(adp_crv.object, int(n), u1, u2, tol)
+            if not ua.IsDone():
+                msg = "GCPnts_UniformAbscissa failed."
+                raise RuntimeError(msg)
+            prms = [ua.Parameter(i) for i in range(1, ua.NbPoints() + 1)]
 
         # Gather results
-        npts = ua.NbPoints()
-        pnts = []
-        prms = []
-        for i in range(1, npts + 1):
-            u = ua.Parameter(i)
-            p = adp_crv.eval(u)
-            pnts.append(p)
-            prms.append(u)
+        npts = len(prms)
+        pnts = PointArray(adp_crv.eval_many(prms))
         self._npts = npts
         self._prms = prms
-        self._pnts = pnts
+        self._pnt_array = pnts
+        self._pnts = None
 
         # Point spacing
         self._ds = None
@@ -364,8 +412,18 @@ class PointsAlongCurveByDistance(object):
         :return: The points.
         :rtype: list(afem.geometry.entities.Point)
         """
+        if self._pnts is None:
+            self._pnts = self._pnt_array.to_points()
         return self._pnts
 
+    @property
+    def points_array(self):
+        """
+        :return: The points as evaluated on the curve in a single array.
+        :rtype: afem.geometry.entities.PointArray
+        """
+        return self._pnt_array
+
     @property
     def parameters(self):
         """
@@ -391,7 +449,7 @@ class PointsAlongCurveByDistance(object):
         """
         if self.npts < 3:
             return []
-        return self._pnts[1:-1]
+        return self.points[1:-1]
 
 
 # DIRECTION -------------------------------------------------------------------
@@ -800,7 +858,9 @@ class NurbsCurveByInterp(object):
     """
     Create a cubic curve by interpolating points.
 
-    :param collections.Sequence(point_like) qp: Points to interpolate.
+    :param qp: Points to interpolate.
+    :type qp: collections.Sequence(point_like) or
+        afem.geometry.entities.PointArray
     :param bool is_periodic: Flag for curve periodicity. If *True* the curve
         will be periodic and closed.
     :param vector_like v1: Tangent to match at first point.
@@ -838,11 +898,72 @@ class NurbsCurveByInterp(object):
         return self._c
 
 
+class NurbsCurvesByInterp(object):
+    """
+    Create a stack of compatible curves by interpolating sets of points in a
+    single batch. All the curves share the same parameters, found by
+    averaging the parameters of each set, and the same knot vector so only
+    one linear system is factored. The resulting curves can be interpolated
+    by :class:`.NurbsSurfaceByInterp` without further modification.
+
+    :param array_like qps: Stack of point sets to interpolate. Each set must
+        have the same number of points.
+    :param int p: Degree. The parameter will be adjusted if the number of
+        points provided does not support the desired degree.
+    :param OCCT.Approx.Approx_ParametrizationType parm_type: Parametrization
+        type.
+
+    :raise ValueError: If the point sets do not have the same number of
+        points or there are less than two points.
+    """
+
+    def __init__(self, qps, p=3, parm_type=Approx_ChordLength):
+        p = int(p)
+
+        try:
+            qps = array(qps, dtype=float)
+        except ValueError:
+            msg = 'Each set of points must have the same number of points.'
+            raise ValueError(msg)
+        if qps.ndim != 3 or qps.shape[1] < 2:
+            msg = 'Expected a stack of point sets with at least two points.'
+            raise ValueError(msg)
+
+        npts = qps.shape[1]
+        if npts - 1 < p:
+            p = npts - 1
+
+        prms = _averaged_parameters(qps, parm_type)
+        uk = geom_utils.averaged_knots(prms, p)
+        cps = geom_utils.interpolate_stack(qps, p, prms, uk)
+
+        knots, mult = unique(uk, return_counts=True)
+        self._crvs = [NurbsCurve.by_data(cp, knots, mult, p) for cp in cps]
+
+    @property
+    def ncrvs(self):
+        """
+        :return: Number of curves.
+        :rtype: int
+        """
+        return len(self._crvs)
+
+    @property
+    def curves(self):
+        """
+        :return: The NURBS curves.
+        :rtype: list(afem.geometry.entities.NurbsCurve)
+        """
+        return self._crvs
+
+
 class NurbsCurveByApprox(object):
     """
     Create a NURBS curve by approximating points.
 
-    :param collections.Sequence(point_like) qp: Points to approximate.
+    :param qp: Points to approximate.
+    :type qp: collections.Sequence(point_like) or
+        afem.geometry.entities.PointArray
     :param int dmin: Minimum degree.
     :param int dmax: Maximum degree.
     :param OCCT.GeomAbs.GeomAbs_Shape continuity: Desired continuity of curve.
@@ -890,6 +1011,102 @@ class NurbsCurveByPoints(NurbsCurveByApprox):
         super(NurbsCurveByPoints, self).__init__(qp, 1, 1, Geometry.C0)
 
 
+class NurbsCurveByFit(object):
+    """
+    Create a NURBS curve by a least squares fit of many points. The points
+    are handled as arrays so this method is intended for dense point data.
+    The number of control points is increased until the distance from every
+    point to the curve at its parameter is within the tolerance or the
+    maximum number of control points is reached. The first and last points
+    are interpolated.
+
+    :param qp: Points to fit.
+    :type qp: collections.Sequence(point_like) or
+        afem.geometry.entities.PointArray or numpy.ndarray
+    :param int p: Degree.
+    :param float tol: The desired maximum distance from the points to the
+        curve.
+    :param int ncp: Initial number of control points. If *None* then *p* + 1
+        is used.
+    :param int ncp_max: Maximum number of control points. If *None* then it
+        is limited by the number of points used for the fit.
+    :param OCCT.Approx.Approx_ParametrizationType parm_type: Parametrization
+        type.
+    :param int max_pts: If provided, only a uniform subsample of at most this
+        many points is used to fit the curve. The error is still checked
+        against all the points.
+
+    :raise ValueError: If less than two points are provided.
+    """
+
+    def __init__(self, qp, p=3, tol=1.0e-3, ncp=None, ncp_max=None,
+                 parm_type=Approx_ChordLength, max_pts=None):
+        xyz = PointArray.to_point_array(qp).xyz
+        npts = xyz.shape[0]
+        if npts < 2:
+            raise ValueError('Need at least two points to fit a curve.')
+
+        # Parameters of all the points and the subsample used for the fit
+        prms = _averaged_parameters(xyz[None, :, :], parm_type)
+        p = min(int(p), npts - 1)
+        indx = _subsample(npts, max_pts, p + 1)
+        fit_pnts, fit_prms = xyz[indx], prms[indx]
+
+        nfit = indx.size
+        if ncp_max is None:
+            ncp_max = nfit
+        ncp_max = max(min(int(ncp_max), nfit), p + 1)
+        if ncp is None:
+            ncp = p + 1
+        ncp = min(max(int(ncp), p + 1), ncp_max)
+
+        # Increase the number of control points until the tolerance is met
+        while True:
+            n = ncp - 1
+            uk = geom_utils.approximation_knots(fit_prms, p, n)
+            cp = geom_utils.approximate_stack(fit_pnts[None, :, :], p,
+                                              fit_prms, uk, n)[0]
+            bmat = geom_utils.basis_matrix_sparse(n, p, prms, uk)
+            error = norm(bmat.dot(cp) - xyz, axis=1).max()
+            if error <= tol or ncp >= ncp_max:
+                break
+            ncp = min(2 * ncp, ncp_max)
+
+        if error > tol:
+            msg = ('The desired tolerance was not reached in '
+                   'NurbsCurveByFit. The tolerance reached is {}.')
+            logger.warning(msg.format(error))
+
+        knots, mult = unique(uk, return_counts=True)
+        self._c = NurbsCurve.by_data(cp, knots, mult, p)
+        self._prms = prms
+        self._tol_reached = error
+
+    @property
+    def curve(self):
+        """
+        :return: The NURBS curve.
+        :rtype: afem.geometry.entities.NurbsCurve
+        """
+        return self._c
+
+    @property
+    def parameters(self):
+        """
+        :return: The parameters of all the points on the curve.
+        :rtype: numpy.ndarray
+        """
+        return self._prms
+
+    @property
+    def tol_reached(self):
+        """
+        :return: The maximum distance from the points to the curve.
+        :rtype: float
+        """
+        return self._tol_reached
+
+
 # TRIMMED CURVE ---------------------------------------------------------------
 
 class TrimmedCurveByPoints(object):
@@ -1067,7 +1284,9 @@ class PlaneByApprox(object):
     """
     Create a plane by fitting points. The points must not be collinear.
 
-    :param list(point_like) pnts: Points to fit plane. Should not be collinear.
+    :param pnts: Points to fit plane. Should not be collinear.
+    :type pnts: collections.Sequence(point_like) or
+        afem.geometry.entities.PointArray or numpy.ndarray
     :param float tol: Tolerance used to check for collinear points.
 
     :raise ValueError: If the number of points is less than three.
@@ -1075,13 +1294,12 @@ class PlaneByApprox(object):
     """
 
     def __init__(self, pnts, tol=1.0e-7):
-        _pnts = [CheckGeom.to_point(p) for p in pnts if
-                 CheckGeom.is_point_like(p)]
-        if len(_pnts) < 3:
+        xyz = PointArray.to_point_array(pnts).xyz
+        if xyz.shape[0] < 3:
             msg = "Need at least three points to fit a plane."
             raise ValueError(msg)
 
-        tcol_pnts = occ_utils.to_tcolgp_harray1_pnt(pnts)
+        tcol_pnts = occ_utils.to_tcolgp_harray1_pnt(xyz)
         avg_pln = GeomPlate_BuildAveragePlane(tcol_pnts,
                                               tcol_pnts.Length(),
                                               tol, 1, 1)
@@ -1092,7 +1310,7 @@ class PlaneByApprox(object):
 
         # Move to centroid.
         gp_pln = avg_pln.Plane().Pln()
-        pcg = Point(*mean(pnts, axis=0))
+        pcg = Point(*xyz.mean(axis=0))
         gp_pln.SetLocation(pcg)
 
         self._pln = Plane(Geom_Plane(gp_pln))
@@ -1212,8 +1430,8 @@ class PlaneByCurveAndSurface(object):
 
     def __init__(self, crv, srf, u):
         origin = crv.eval(u)
-        u, v = ProjectPointToSurface(origin, srf).nearest_param
-        srf_nrm = srf.norm(u, v)
+        us, vs = ProjectPointToSurface(origin, srf).nearest_param
+        srf_nrm = srf.norm(us, vs)
         crv_deriv = crv.deriv(u, 1)
         vx = Direction(srf_nrm.Crossed(crv_deriv))
         n = Direction(crv_deriv)
@@ -1229,65 +1447,36 @@ class PlaneByCurveAndSurface(object):
         return self._pln
 
 
-class PlanesAlongCurveByNumber(object):
+class PlanesBuilder(object):
     """
-    Create planes along a curve using a specified number. The origin of the
-    planes will be equidistant along the curve.
-
-    :param c: The curve.
-    :type c: afem.adaptor.entities.AdaptorCurve or afem.geometry.entities.Curve
-        or afem.topology.entities.Edge or afem.topology.entities.Wire
-    :param int n: Number of planes to create (*n* > 0).
-    :param afem.geometry.entities.Plane ref_pln: The normal of this plane
-        will be used to define the normal of all planes along the curve. If
-        no plane is provided, then the first derivative of the curve will
-        define the plane normal.
-    :param float u1: The parameter of the first plane (default=c.u1).
-    :param float u2: The parameter of the last plane (default=c.u2).
-    :param float d1: An offset distance for the first plane. This is typically
-        a positive number indicating a distance from *u1* towards *u2*.
-    :param float d2: An offset distance for the last plane. This is typically
-        a negative number indicating a distance from *u2* towards *u1*.
-    :param float tol: Tolerance.
+    Base class for creating planes at stations along a path. The origins and
+    normals of all the stations are evaluated up front but the planes
+    themselves are only created when requested, either all at once by
+    :attr:`planes` or one at a time by :meth:`iter_planes`.
 
-    :raise RuntimeError: If :class:`.PointsAlongCurveByNumber` fails to
-        generate points along the curve.
+    :param numpy.ndarray origins: The plane origins as an array of shape
+        (N, 3).
+    :param numpy.ndarray normals: The plane normals as an array of shape
+        (N, 3).
+    :param numpy.ndarray xdirs: The plane x-directions as an array of shape
+        (N, 3). If *None* then the x-direction is defined by OpenCASCADE.
+    :param list(float) prms: The parameter of each station.
+    :param float spacing: The spacing between stations.
+    :param bool lazy: Option to delay creating the planes until they are
+        requested. If *False* the planes are created immediately.
     """
 
-    def __init__(self, c, n, ref_pln=None, u1=None, u2=None, d1=None,
-                 d2=None, tol=1.0e-7):
-        adp_crv = AdaptorCurve.to_adaptor(c)
-        pnt_builder = PointsAlongCurveByNumber(adp_crv, n, u1, u2, d1, d2, tol)
-        if pnt_builder.npts == 0:
-            msg = ('Failed to generate points along the curve for creating '
-                   'planes along a curve by number.')
-            raise RuntimeError(msg)
-        npts = pnt_builder.npts
-        pnts = pnt_builder.points
-        prms = pnt_builder.parameters
-        spacing = pnt_builder.spacing
-
-        plns = []
-        if isinstance(ref_pln, Plane):
-            gp_pln = ref_pln.gp_pln
-            ax1 = gp_pln.Axis()
-            dn = ax1.Direction()
-            for p in pnts:
-                pln = Plane(Geom_Plane(p, dn))
-                plns.append(pln)
-        else:
-            for i in range(npts):
-                p = pnts[i]
-                u = prms[i]
-                vn = adp_crv.deriv(u, 1)
-                dn = Direction(vn)
-                pln = Plane(Geom_Plane(p, dn))
-                plns.append(pln)
-
-        self._plns = plns
-        self._nplns = npts
+    def __init__(self, origins, normals, xdirs=None, prms=None, spacing=None,
+                 lazy=False):
+        self._origins = origins
+        self._normals = normals
+        self._xdirs = xdirs
         self._prms = prms
         self._ds = spacing
+        self._rotations = []
+        self._plns = None
+        if not lazy:
+            self._plns = [self._make_plane(i) for i in range(self.nplanes)]
 
     @property
     def nplanes(self):
@@ -1295,14 +1484,17 @@ class PlanesAlongCurveByNumber(object):
         :return: The number of planes.
         :rtype: int
         """
-        return self._nplns
+        return self._origins.shape[0]
 
     @property
     def planes(self):
         """
-        :return: The planes.
+        :return: The planes. If the builder is lazy the planes are created
+            and stored on first access.
         :rtype: list(afem.geometry.entities.Plane)
         """
+        if self._plns is None:
+            self._plns = [self._make_plane(i) for i in range(self.nplanes)]
         return self._plns
 
     @property
@@ -1322,6 +1514,22 @@ class PlanesAlongCurveByNumber(object):
         """
         return self._ds
 
+    @property
+    def origins(self):
+        """
+        :return: The plane origins.
+        :rtype: afem.geometry.entities.PointArray
+        """
+        return PointArray(self._origins)
+
+    @property
+    def normals(self):
+        """
+        :return: The plane normals as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        return self._normals
+
     @property
     def interior_planes(self):
         """
@@ -1330,18 +1538,134 @@ class PlanesAlongCurveByNumber(object):
         """
         if self.nplanes < 3:
             return []
-        return self._plns[1:-1]
+        return self.planes[1:-1]
+
+    def iter_planes(self):
+        """
+        Iterate over the planes. If the planes have not been created yet
+        then each plane is created when it is reached and is not stored by
+        the builder.
+
+        :return: Generator yielding the plane, its parameter, and the
+            distance from the origin of the previous plane. The parameter
+            is *None* if not available and the distance is *None* for the
+            first plane.
+        :rtype: collections.Iterator(tuple(afem.geometry.entities.Plane,
+            float, float))
+        """
+        for i in range(self.nplanes):
+            if self._plns is None:
+                pln = self._make_plane(i)
+            else:
+                pln = self._plns[i]
+            u = None
+            if self._prms:
+                u = self._prms[i]
+            ds = None
+            if i > 0:
+                ds = float(norm(self._origins[i] - self._origins[i - 1]))
+            yield pln, u, ds
+
+    def rotate_x(self, angle):
+        """
+        Rotate each of the planes around their local x-axis. If the planes
+        have not been created yet the rotation is applied when they are.
+
+        :param float angle: The rotation angle in degrees.
+
+        :return: None.
+        """
+        self._rotations.append((Plane.rotate_x, angle))
+        if self._plns is not None:
+            for pln in self._plns:
+                pln.rotate_x(angle)
+
+    def rotate_y(self, angle):
+        """
+        Rotate each of the planes around their local y-axis. If the planes
+        have not been created yet the rotation is applied when they are.
+
+        :param float angle: The rotation angle in degrees.
+
+        :return: None.
+        """
+        self._rotations.append((Plane.rotate_y, angle))
+        if self._plns is not None:
+            for pln in self._plns:
+                pln.rotate_y(angle)
+
+    def _make_plane(self, i):
+        """
+        Create the plane at the station.
+        """
+        p = gp_Pnt(*self._origins[i].tolist())
+        dn = gp_Dir(*self._normals[i].tolist())
+        if self._xdirs is None:
+            pln = Plane(Geom_Plane(p, dn))
+        else:
+            vx = gp_Dir(*self._xdirs[i].tolist())
+            pln = Plane(Geom_Plane(gp_Ax3(p, dn, vx)))
+        for rotate, angle in self._rotations:
+            rotate(pln, angle)
+        return pln
+
+
+class PlanesAlongCurveByNumber(PlanesBuilder):
+    """
+    Create planes along a curve using a specified number. The origin of the
+    planes will be equidistant along the curve.
+
+    :param c: The curve. If an arc-length table is provided it is used to
+        space the planes.
+    :type c: afem.adaptor.entities.AdaptorCurve or
+        afem.adaptor.entities.ArcLengthTable or afem.geometry.entities.Curve
+        or afem.topology.entities.Edge or afem.topology.entities.Wire
+    :param int n: Number of planes to create (*n* > 0).
+    :param afem.geometry.entities.Plane ref_pln: The normal of this plane
+        will be used to define the normal of all planes along the curve. If
+        no plane is provided, then the first derivative of the curve will
+        define the plane normal.
+    :param float u1: The parameter of the first plane (default=c.u1).
+    :param float u2: The parameter of the last plane (default=c.u2).
+    :param float d1: An offset distance for the first plane. This is typically
+        a positive number indicating a distance from *u1* towards *u2*.
+    :param float d2: An offset distance for the last plane. This is typically
+        a negative number indicating a distance from *u2* towards *u1*.
+    :param float tol: Tolerance.
+    :param bool lazy: Option to delay creating the planes until they are
+        requested.
+
+    :raise RuntimeError: If :class:`.PointsAlongCurveByNumber` fails to
+        generate points along the curve.
+    """
 
+    def __init__(self, c, n, ref_pln=None, u1=None, u2=None, d1=None,
+                 d2=None, tol=1.0e-7, lazy=False):
+        pnt_builder = PointsAlongCurveByNumber(c, n, u1, u2, d1, d2, tol)
+        if pnt_builder.npts == 0:
+            msg = ('Failed to generate points along the curve for creating '
+                   'planes along a curve by number.')
+            raise RuntimeError(msg)
+
+        prms = pnt_builder.parameters
+        origins = pnt_builder.points_array.xyz
+        normals = _station_normals(c, prms, ref_pln)
 
-class PlanesAlongCurveByDistance(object):
+        super(PlanesAlongCurveByNumber, self).__init__(
+            origins, normals, None, prms, pnt_builder.spacing, lazy)
+
+
+class PlanesAlongCurveByDistance(PlanesBuilder):
     """
     Create planes along a curve by distance between points. The origin of the
     planes will be equidistant along the curve. This method calculates the
     number of points given the curve length and then uses
     :class:`.PlanesAlongCurveByNumber`.
 
-    :param c: The curve.
-    :type c: afem.adaptor.entities.AdaptorCurve or afem.geometry.entities.Curve
+    :param c: The curve. If an arc-length table is provided it is used to
+        space the planes.
+    :type c: afem.adaptor.entities.AdaptorCurve or
+        afem.adaptor.entities.ArcLengthTable or afem.geometry.entities.Curve
         or afem.topology.entities.Edge or afem.topology.entities.Wire
     :param float maxd: The maximum allowed spacing between planes. The
         actual spacing will be adjusted to not to exceed this value.
@@ -1357,92 +1681,31 @@ class PlanesAlongCurveByDistance(object):
         a negative number indicating a distance from *u2* towards *u1*.
     :param int nmin: Minimum number of planes to create.
     :param float tol: Tolerance.
+    :param bool lazy: Option to delay creating the planes until they are
+        requested.
 
     :raise RuntimeError: If :class:`.PointsAlongCurveByDistance` fails to
         generate points along the curve.
     """
 
     def __init__(self, c, maxd, ref_pln=None, u1=None, u2=None, d1=None,
-                 d2=None, nmin=0, tol=1.0e-7):
-        adp_crv = AdaptorCurve.to_adaptor(c)
-        pnt_builder = PointsAlongCurveByDistance(adp_crv, maxd, u1, u2, d1, d2,
+                 d2=None, nmin=0, tol=1.0e-7, lazy=False):
+        pnt_builder = PointsAlongCurveByDistance(c, maxd, u1, u2, d1, d2,
                                                  nmin, tol)
         if pnt_builder.npts == 0:
             msg = ('Failed to generate points along the curve for creating '
                    'planes along a curve by distance.')
             raise RuntimeError(msg)
-        npts = pnt_builder.npts
-        pnts = pnt_builder.points
-        prms = pnt_builder.parameters
-        spacing = pnt_builder.spacing
-
-        plns = []
-        if isinstance(ref_pln, Plane):
-            gp_pln = ref_pln.gp_pln
-            ax1 = gp_pln.Axis()
-            dn = ax1.Direction()
-            for p in pnts:
-                pln = Plane(Geom_Plane(p, dn))
-                plns.append(pln)
-        else:
-            for i in range(npts):
-                p = pnts[i]
-                u = prms[i]
-                vn = adp_crv.deriv(u, 1)
-                dn = Direction(vn)
-                pln = Plane(Geom_Plane(p, dn))
-                plns.append(pln)
-
-        self._plns = plns
-        self._nplns = npts
-        self._prms = prms
-        self._ds = spacing
-
-    @property
-    def nplanes(self):
-        """
-        :return: The number of planes.
-        :rtype: int
-        """
-        return self._nplns
-
-    @property
-    def planes(self):
-        """
-        :return: The planes.
-        :rtype: list(afem.geometry.entities.Plane)
-        """
-        return self._plns
-
-    @property
-    def parameters(self):
-        """
-        :return: The parameters.
-        :rtype: list(float)
-        """
-        return self._prms
 
-    @property
-    def spacing(self):
-        """
-        :return: The spacing between the first and second points if there
-            are more than one point. Otherwise *None*.
-        :rtype: float or None
-        """
-        return self._ds
+        prms = pnt_builder.parameters
+        origins = pnt_builder.points_array.xyz
+        normals = _station_normals(c, prms, ref_pln)
 
-    @property
-    def interior_planes(self):
-        """
-        :return: The planes between the first and last planes.
-        :rtype: list(afem.geometry.entities.Plane)
-        """
-        if self.nplanes < 3:
-            return []
-        return self._plns[1:-1]
+        super(PlanesAlongCurveByDistance, self).__init__(
+            origins, normals, None, prms, pnt_builder.spacing, lazy)
 
 
-class PlanesBetweenPlanesByNumber(object):
+class PlanesBetweenPlanesByNumber(PlanesBuilder):
     """
     Create planes between two other planes. This method will create a line
     normal to the first plane at its origin and then intersect
@@ -1458,21 +1721,15 @@ class PlanesBetweenPlanesByNumber(object):
         a positive number indicating a distance from *u1* towards *u2*.
     :param float d2: An offset distance for the last plane. This is typically
         a negative number indicating a distance from *u2* towards *u1*.
+    :param bool lazy: Option to delay creating the planes until they are
+        requested.
 
     :raise RuntimeError: If the line extending from the normal of the first
         plane cannot be intersected with the second plane.
     """
 
-    def __init__(self, pln1, pln2, n, d1=None, d2=None):
-        p1 = pln1.eval(0., 0.)
-        vn = pln1.norm(0., 0.)
-        line = LineByVector(p1, vn).line
-        csi = GeomAPI_IntCS(line.object, pln2.object)
-        if csi.NbPoints() == 0:
-            msg = ('Failed to intersect the second plane to create planes '
-                   'between them.')
-            raise RuntimeError(msg)
-        p2 = csi.Point(1)
+    def __init__(self, pln1, pln2, n, d1=None, d2=None, lazy=False):
+        c = _line_between_planes(pln1, pln2)
 
         n = int(n)
         if d1 is None:
@@ -1480,66 +1737,15 @@ class PlanesBetweenPlanesByNumber(object):
         if d2 is None:
             n += 1
 
-        c = NurbsCurveByPoints([p1, p2]).curve
-        builder = PlanesAlongCurveByNumber(c, n, pln1, d1=d1, d2=d2)
-
-        plns = builder.planes
-        nplns = builder.nplanes
-        spacing = None
-
-        if plns and plns[0].distance(c.p1) <= 1.0e-7:
-            plns.pop(0)
-            nplns -= 1
-        if plns and plns[-1].distance(c.p2) <= 1.0e-7:
-            plns.pop(-1)
-            nplns -= 1
-
-        if nplns > 1:
-            p1 = plns[0].eval(0., 0.)
-            p2 = plns[1].eval(0., 0.)
-            spacing = p1.distance(p2)
-
-        self._plns = plns
-        self._nplns = nplns
-        self._ds = spacing
-
-    @property
-    def nplanes(self):
-        """
-        :return: The number of planes.
-        :rtype: int
-        """
-        return self._nplns
-
-    @property
-    def planes(self):
-        """
-        :return: The planes.
-        :rtype: list(afem.geometry.entities.Plane)
-        """
-        return self._plns
-
-    @property
-    def spacing(self):
-        """
-        :return: The spacing between the first and second points if there
-            are more than one point. Otherwise *None*.
-        :rtype: float or None
-        """
-        return self._ds
+        builder = PlanesAlongCurveByNumber(c, n, pln1, d1=d1, d2=d2,
+                                           lazy=True)
+        origins, normals, prms, spacing = _interior_stations(c, builder)
 
-    @property
-    def interior_planes(self):
-        """
-        :return: The planes between the first and last planes.
-        :rtype: list(afem.geometry.entities.Plane)
-        """
-        if self.nplanes < 3:
-            return []
-        return self._plns[1:-1]
+        super(PlanesBetweenPlanesByNumber, self).__init__(
+            origins, normals, None, prms, spacing, lazy)
 
 
-class PlanesBetweenPlanesByDistance(object):
+class PlanesBetweenPlanesByDistance(PlanesBuilder):
     """
     Create planes between two other planes by distance. This method will
     create a line normal to the first plane at its origin and then intersect
@@ -1557,88 +1763,32 @@ class PlanesBetweenPlanesByDistance(object):
     :param float d2: An offset distance for the last plane. This is typically
         a negative number indicating a distance from *u2* towards *u1*.
     :param int nmin: Minimum number of planes to create.
+    :param bool lazy: Option to delay creating the planes until they are
+        requested.
 
     :raise RuntimeError: If the line extending from the normal of the first
         plane cannot be intersected with the second plane.
     """
 
-    def __init__(self, pln1, pln2, maxd, d1=None, d2=None, nmin=0):
-        p1 = pln1.eval(0., 0.)
-        vn = pln1.norm(0., 0.)
-        line = LineByVector(p1, vn).line
-        csi = GeomAPI_IntCS(line.object, pln2.object)
-        if csi.NbPoints() == 0:
-            msg = ('Failed to intersect the second plane to create planes '
-                   'between them.')
-            raise RuntimeError(msg)
-        p2 = csi.Point(1)
+    def __init__(self, pln1, pln2, maxd, d1=None, d2=None, nmin=0,
+                 lazy=False):
+        c = _line_between_planes(pln1, pln2)
 
-        c = NurbsCurveByPoints([p1, p2]).curve
         builder = PlanesAlongCurveByDistance(c, maxd, pln1, d1=d1, d2=d2,
-                                             nmin=nmin)
-
-        plns = builder.planes
-        nplns = builder.nplanes
-        spacing = None
-
-        if plns and plns[0].distance(c.p1) <= 1.0e-7:
-            plns.pop(0)
-            nplns -= 1
-        if plns and plns[-1].distance(c.p2) <= 1.0e-7:
-            plns.pop(-1)
-            nplns -= 1
-
-        if nplns > 1:
-            p1 = plns[0].eval(0., 0.)
-            p2 = plns[1].eval(0., 0.)
-            spacing = p1.distance(p2)
-
-        self._plns = plns
-        self._nplns = nplns
-        self._ds = spacing
-
-    @property
-    def nplanes(self):
-        """
-        :return: The number of planes.
-        :rtype: int
-        """
-        return self._nplns
-
-    @property
-    def planes(self):
-        """
-        :return: The planes.
-        :rtype: list(afem.geometry.entities.Plane)
-        """
-        return self._plns
-
-    @property
-    def spacing(self):
-        """
-        :return: The spacing between the first and second points if there
-            are more than one point. Otherwise *None*.
-        :rtype: float or None
-        """
-        return self._ds
+                                             nmin=nmin, lazy=True)
+        origins, normals, prms, spacing = _interior_stations(c, builder)
 
-    @property
-    def interior_planes(self):
-        """
-        :return: The planes between the first and last planes.
-        :rtype: list(afem.geometry.entities.Plane)
-        """
-        if self.nplanes < 3:
-            return []
-        return self._plns[1:-1]
+        super(PlanesBetweenPlanesByDistance, self).__init__(
+            origins, normals, None, prms, spacing, lazy)
 
 
-class PlanesAlongCurveAndSurfaceByDistance(object):
+class PlanesAlongCurveAndSurfaceByDistance(PlanesBuilder):
     """
     Create planes along a curve and surface by distance between points. The
     origin of the planes will be equidistant along the curve. This method
-    calculates the number of points given the curve length and then uses
-    :class:`.PlaneByCurveAndSurface` at each point.
+    calculates the number of points given the curve length and then orients
+    each plane like :class:`.PlaneByCurveAndSurface`. The origins are
+    projected to the surface and the normals are evaluated in batches.
 
     :param afem.geometry.entities.Curve c: The curve.
     :param afem.geometry.entities.Surface s: The surface.
@@ -1652,98 +1802,37 @@ class PlanesAlongCurveAndSurfaceByDistance(object):
         a negative number indicating a distance from *u2* towards *u1*.
     :param int nmin: Minimum number of planes to create.
     :param float tol: Tolerance.
+    :param bool lazy: Option to delay creating the planes until they are
+        requested.
 
     :raise RuntimeError: If :class:`.PointsAlongCurveByDistance` fails to
-        generate points along the curve.
+        generate points along the curve or if the points cannot be projected
+        to the surface.
     """
 
     def __init__(self, c, s, maxd, u1=None, u2=None, d1=None,
-                 d2=None, nmin=0, tol=1.0e-7):
+                 d2=None, nmin=0, tol=1.0e-7, lazy=False):
         pnt_builder = PointsAlongCurveByDistance(c, maxd, u1, u2, d1, d2,
                                                  nmin, tol)
         if pnt_builder.npts == 0:
             msg = ('Failed to generate points along the curve for creating '
                    'planes along a curve by distance.')
             raise RuntimeError(msg)
-        npts = pnt_builder.npts
-        prms = pnt_builder.parameters
-        spacing = pnt_builder.spacing
-
-        plns = []
-        for i in range(npts):
-            u = prms[i]
-            pln = PlaneByCurveAndSurface(c, s, u).plane
-            plns.append(pln)
-
-        self._plns = plns
-        self._nplns = npts
-        self._prms = prms
-        self._ds = spacing
-
-    @property
-    def nplanes(self):
-        """
-        :return: The number of planes.
-        :rtype: int
-        """
-        return self._nplns
-
-    @property
-    def planes(self):
-        """
-        :return: The planes.
-        :rtype: list(afem.geometry.entities.Plane)
-        """
-        return self._plns
-
-    @property
-    def parameters(self):
-        """
-        :return: The parameters.
-        :rtype: list(float)
-        """
-        return self._prms
-
-    @property
-    def spacing(self):
-        """
-        :return: The spacing between the first and second points if there
-            are more than one point. Otherwise *None*.
-        :rtype: float or None
-        """
-        return self._ds
-
-    @property
-    def interior_planes(self):
-        """
-        :return: The planes between the first and last planes.
-        :rtype: list(afem.geometry.entities.Plane)
-        """
-        if self.nplanes < 3:
-            return []
-        return self._plns[1:-1]
-
-    def rotate_x(self, angle):
-        """
-        Rotate each of the planes around their local x-axis.
 
-        :param float angle: The rotation angle in degrees.
-
-        :return: None.
-        """
-        for pln in self.planes:
-            pln.rotate_x(angle)
-
-    def rotate_y(self, angle):
-        """
-        Rotate each of the planes around their local y-axis.
-
-        :param float angle: The rotation angle in degrees.
+        prms = pnt_builder.parameters
+        origins = pnt_builder.points_array.xyz
+        proj = ProjectPointsToSurface(origins, s)
+        if not proj.success:
+            msg = ('Failed to project points to the surface for creating '
+                   'planes along a curve and surface.')
+            raise RuntimeError(msg)
+        uv = proj.parameters
+        srf_nrm = s.norm_many(uv[:, 0], uv[:, 1])
+        crv_deriv = c.deriv_many(prms, 1)
 
-        :return: None.
-        """
-        for pln in self.planes:
-            pln.rotate_y(angle)
+        super(PlanesAlongCurveAndSurfaceByDistance, self).__init__(
+            origins, crv_deriv, cross(srf_nrm, crv_deriv), prms,
+            pnt_builder.spacing, lazy)
 
 
 # NURBSSURFACE ----------------------------------------------------------------
@@ -1797,32 +1886,9 @@ class NurbsSurfaceByInterp(object):
         # Find parameters between each curve by averaging each segment.
         temp = array(temp, dtype=float)
         pnts_matrix = temp.transpose((1, 0, 2))
-        n = sec_gen.NbPoles() - 1
-        m = ncrvs - 1
-        v_matrix = zeros((n + 1, m + 1), dtype=float)
-        for i in range(0, n + 1):
-            if parm_type == Approx_IsoParametric:
-                vknots = geom_utils.uniform_parameters(pnts_matrix[i, :], 0.,
-                                                       1.)
-            elif parm_type == Approx_ChordLength:
-                vknots = geom_utils.chord_parameters(pnts_matrix[i, :], 0., 1.)
-            else:
-                vknots = geom_utils.centripetal_parameters(pnts_matrix[i, :],
-                                                           0., 1.)
-            v_matrix[i] = vknots
-        # Average each column.
-        vknots = mean(v_matrix, axis=0, dtype=float)
-        vknots[0] = 0.0
-        vknots[-1] = 1.0
-
-        s = m + q + 1
-        vk = zeros(s + 1, dtype=float)
-        vk[s - q:] = 1.0
-        for j in range(1, m - q + 1):
-            temp = 0.
-            for i in range(j, j + q):
-                temp += vknots[i]
-            vk[j + q] = 1.0 / q * temp
+        vknots = _averaged_parameters(pnts_matrix, parm_type)
+        vk = geom_utils.averaged_knots(vknots, q)
+
         # Compute OCC vknots and vmult.
         tcol_vknot_seq = occ_utils.to_tcolstd_array1_real(vk)
 
@@ -1832,29 +1898,9 @@ class NurbsSurfaceByInterp(object):
         BSplCLib.Knots_(tcol_vknot_seq, tcol_vknots, tcol_vmult, False)
 
         # Perform n + 1 interpolations in v-direction to generate surface
-        # control points.
-        cpw = zeros((n + 1, m + 1, 4), dtype=float)
-        for i in range(0, n + 1):
-            qp = pnts_matrix[i]
-            # Set up system of linear equations.
-            a = zeros((m + 1, m + 1), dtype=float)
-            for j in range(0, m + 1):
-                # span1, _ = CLib.bsplclib_LocateParameter(pnt, tcol_vknots,
-                #                                          tcol_vmult,
-                #                                         vknots[j], False)
-                # Evaluate basis function. Figure out how to use math_Matrix
-                # and use OCC in future.
-                # mat = occ_math.math_Matrix(1, q, 1, q)
-                # CLib.bsplclib_EvalBsplineBasis(span, q, q, tcol_vknot_seq,
-                #                                vknots[j], mat)
-                span = geom_utils.find_span(m, q, vknots[j], vk)
-                a[j, span - q: span + 1] = geom_utils.basis_funs(span,
-                                                                 vknots[j], q,
-                                                                 vk)
-            # Solve for [a][cp] = [qp] using LU decomposition.
-            lu, piv = lu_factor(a, overwrite_a=True, check_finite=False)
-            cpw[i, :] = lu_solve((lu, piv), qp, trans=0, overwrite_b=True,
-                                 check_finite=True)
+        # control points. The collocation matrix is the same for every row so
+        # it is factored once and all rows are solved together.
+        cpw = geom_utils.interpolate_stack(pnts_matrix, q, vknots, vk)
 
         # Create surface.
         cp, w = geom_utils.dehomogenize_array2d(cpw)
@@ -1966,3 +2012,245 @@ class NurbsSurfaceByApprox(object):
         :rtype: float
         """
         return self._tol2d_reached
+
+
+class NurbsSurfaceByFit(object):
+    """
+    Create a NURBS surface by a least squares fit of a structured grid of
+    points. The points are handled as arrays so this method is intended for
+    dense point data. Each row of points is fit with a shared knot vector and
+    then the resulting control points are fit in the other direction. The
+    number of control points is increased until the distance from every
+    point to the surface at its parameters is within the tolerance or the
+    maximum number of control points is reached. The boundary points are
+    interpolated.
+
+    :param array_like qp: Points to fit of shape (N, M, 3). The first index
+        is along the u-direction and the second along the v-direction.
+    :param int p: Degree in u-direction.
+    :param int q: Degree in v-direction.
+    :param float tol: The desired maximum distance from the points to the
+        surface.
+    :param tuple(int) ncp: Initial number of control points in each
+        direction. If *None* then (*p* + 1, *q* + 1) is used.
+    :param tuple(int) ncp_max: Maximum number of control points in each
+        direction. If *None* then it is limited by the number of points used
+        for the fit.
+    :param OCCT.Approx.Approx_ParametrizationType parm_type: Parametrization
+        type.
+    :param int max_pts: If provided, only a uniform subsample of at most this
+        many points in each direction is used to fit the surface. The error
+        is still checked against all the points.
+
+    :raise ValueError: If the points are not a grid of at least two by two
+        points.
+    """
+
+    def __init__(self, qp, p=3, q=3, tol=1.0e-3, ncp=None, ncp_max=None,
+                 parm_type=Approx_ChordLength, max_pts=None):
+        xyz = asarray(qp, dtype=float)
+        if xyz.ndim != 3 or xyz.shape[2] != 3:
+            raise ValueError('Points must be an array of shape (N, M, 3).')
+        nu_pts, nv_pts = xyz.shape[:2]
+        if nu_pts < 2 or nv_pts < 2:
+            raise ValueError('Need at least two by two points to fit a '
+                             'surface.')
+
+        # Parameters of all the points and the subsample used for the fit
+        uprms = _averaged_parameters(xyz.transpose((1, 0, 2)), parm_type)
+        vprms = _averaged_parameters(xyz, parm_type)
+        p = min(int(p), nu_pts - 1)
+        q = min(int(q), nv_pts - 1)
+        iu = _subsample(nu_pts, max_pts, p + 1)
+        iv = _subsample(nv_pts, max_pts, q + 1)
+        fit_pnts = xyz[iu][:, iv]
+        fit_uprms, fit_vprms = uprms[iu], vprms[iv]
+
+        if ncp_max is None:
+            ncp_max = (iu.size, iv.size)
+        nu_max = max(min(int(ncp_max[0]), iu.size), p + 1)
+        nv_max = max(min(int(ncp_max[1]), iv.size), q + 1)
+        if ncp is None:
+            ncp = (p + 1, q + 1)
+        nu = min(max(int(ncp[0]), p + 1), nu_max)
+        nv = min(max(int(ncp[1]), q + 1), nv_max)
+
+        # Increase the number of control points until the tolerance is met
+        while True:
+            uk = geom_utils.approximation_knots(fit_uprms, p, nu - 1)
+            vk = geom_utils.approximation_knots(fit_vprms, q, nv - 1)
+            cp = geom_utils.approximate_stack(fit_pnts, q, fit_vprms, vk,
+                                              nv - 1)
+            cp = geom_utils.approximate_stack(cp.transpose((1, 0, 2)), p,
+                                              fit_uprms, uk, nu - 1)
+            cp = cp.transpose((1, 0, 2))
+            error = _surface_fit_error(cp, p, q, uk, vk, uprms, vprms, xyz)
+            if error <= tol or (nu >= nu_max and nv >= nv_max):
+                break
+            nu = min(2 * nu, nu_max)
+            nv = min(2 * nv, nv_max)
+
+        if error > tol:
+            msg = ('The desired tolerance was not reached in '
+                   'NurbsSurfaceByFit. The tolerance reached is {}.')
+            logger.warning(msg.format(error))
+
+        uknots, umult = unique(uk, return_counts=True)
+        vknots, vmult = unique(vk, return_counts=True)
+        self._s = NurbsSurface.by_data(cp, uknots, vknots, umult, vmult, p, q)
+        self._uprms = uprms
+        self._vprms = vprms
+        self._tol_reached = error
+
+    @property
+    def surface(self):
+        """
+        :return: The NURBS surface.
+        :rtype: afem.geometry.entities.NurbsSurface
+        """
+        return self._s
+
+    @property
+    def uparameters(self):
+        """
+        :return: The parameters of the points in the u-direction.
+        :rtype: numpy.ndarray
+        """
+        return self._uprms
+
+    @property
+    def vparameters(self):
+        """
+        :return: The parameters of the points in the v-direction.
+        :rtype: numpy.ndarray
+        """
+        return self._vprms
+
+    @property
+    def tol_reached(self):
+        """
+        :return: The maximum distance from the points to the surface.
+        :rtype: float
+        """
+        return self._tol_reached
+
+
+def _averaged_parameters(pnts, parm_type):
+    """
+    Compute parameters for each row of points and average them.
+
+    :param numpy.ndarray pnts: Array of points of shape (K, N, d).
+    :param OCCT.Approx.Approx_ParametrizationType parm_type: Parametrization
+        type.
+
+    :return: Averaged parameters between [0, 1].
+    :rtype: numpy.ndarray
+    """
+    npts = pnts.shape[1]
+    prms = []
+    for row in pnts:
+        if parm_type == Approx_IsoParametric:
+            prms.append(geom_utils.uniform_parameters(npts, 0., 1.))
+        elif parm_type == Approx_ChordLength:
+            prms.append(geom_utils.chord_parameters(row, 0., 1.))
+        else:
+            prms.append(geom_utils.centripetal_parameters(row, 0., 1.))
+    prms = mean(prms, axis=0, dtype=float)
+    prms[0] = 0.
+    prms[-1] = 1.
+    return prms
+
+
+def _subsample(npts, max_pts, nmin):
+    """
+    Indices of a uniform subsample of at most *max_pts* points that always
+    includes the first and last points.
+    """
+    if max_pts is None or npts <= max_pts:
+        return arange(npts)
+    nsub = max(int(max_pts), nmin, 2)
+    return unique(linspace(0, npts - 1, nsub).round().astype(int))
+
+
+def _surface_fit_error(cp, p, q, uk, vk, uprms, vprms, pnts):
+    """
+    Maximum distance between a grid of points and the polynomial surface
+    evaluated at their parameters.
+    """
+    nu, nv = cp.shape[:2]
+    bu = geom_utils.basis_matrix_sparse(nu - 1, p, uprms, uk)
+    bv = geom_utils.basis_matrix_sparse(nv - 1, q, vprms, vk)
+    k, m = uprms.size, vprms.size
+    tmp = bu.dot(cp.reshape(nu, nv * 3)).reshape(k, nv, 3)
+    tmp = bv.dot(tmp.transpose((1, 0, 2)).reshape(nv, k * 3))
+    srf_pnts = tmp.reshape(m, k, 3).transpose((1, 0, 2))
+    return norm(srf_pnts - pnts, axis=2).max()
+
+
+def _station_normals(c, prms, ref_pln=None):
+    """
+    Evaluate the plane normals at each station along a curve.
+    """
+    if isinstance(ref_pln, Plane):
+        dn = ref_pln.gp_pln.Axis().Direction()
+        return tile([dn.X(), dn.Y(), dn.Z()], (len(prms), 1))
+    if isinstance(c, Curve):
+        return c.deriv_many(prms, 1)
+    return AdaptorCurve.to_adaptor(c).deriv_many(prms)
+
+
+def _line_between_planes(pln1, pln2):
+    """
+    Create a line normal to the first plane at its origin and ending at the
+    second plane.
+    """
+    p1 = pln1.eval(0., 0.)
+    vn = pln1.norm(0., 0.)
+    line = LineByVector(p1, vn).line
+    csi = GeomAPI_IntCS(line.object, pln2.object)
+    if csi.NbPoints() == 0:
+        msg = ('Failed to intersect the second plane to create planes '
+               'between them.')
+        raise RuntimeError(msg)
+    p2 = csi.Point(1)
+    return NurbsCurveByPoints([p1, p2]).curve
+
+
+def _interior_stations(c, builder, tol=1.0e-7):
+    """
+    Gather the stations of the builder that do not coincide with the ends of
+    the curve.
+    """
+    origins = builder.origins.xyz
+    keep = ones(origins.shape[0], dtype=bool)
+    if keep.size > 0 and norm(origins[0] - c.p1.xyz) <= tol:
+        keep[0] = False
+    if keep.size > 0 and norm(origins[-1] - c.p2.xyz) <= tol:
+        keep[-1] = False
+
+    origins = origins[keep]
+    normals = builder.normals[keep]
+    prms = [u for u, flag in zip(builder.parameters, keep) if flag]
+
+    spacing = None
+    if origins.shape[0] > 1:
+        spacing = float(norm(origins[1] - origins[0]))
+    return origins, normals, prms, spacing
+
+
+def _arc_length_table(c, prms=()):
+    """
+    Get the arc-length table for the curve. A given table is used as is and
+    bounded curves and adaptor curves use the table stored on them. Other
+    entities, or parameters outside the curve bounds, return *None*.
+    """
+    if isinstance(c, ArcLengthTable):
+        return c
+    if not isinstance(c, (Curve, AdaptorCurve)):
+        return None
+    u1, u2 = c.u1, c.u2
+    if Precision.IsInfinite_(u1) or Precision.IsInfinite_(u2):
+        return None
+    if any(u < u1 or u > u2 for u in prms):
+        return None
+    return c.arc_length_table()
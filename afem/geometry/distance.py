@@ -19,15 +19,192 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 from math import sqrt
 
+from OCCT.Bnd import Bnd_Box
+from OCCT.BndLib import BndLib_Add3dCurve, BndLib_AddSurface
 from OCCT.Extrema import (Extrema_ExtCC, Extrema_ExtCS, Extrema_ExtPC,
                           Extrema_ExtPS, Extrema_ExtSS)
+from numpy import array, atleast_2d, float64, inf, isinf, zeros
+from scipy.sparse import csr_matrix
+from scipy.spatial import KDTree
 
 from afem.adaptor.entities import AdaptorCurve, AdaptorSurface
 from afem.geometry.check import CheckGeom
+from afem.geometry.entities import Curve, Point, Surface
 
-__all__ = ["DistancePointToCurve", "DistancePointToSurface",
-           "DistanceCurveToCurve", "DistanceCurveToSurface",
-           "DistanceSurfaceToSurface"]
+__all__ = ["PointIndex", "DistancePointToCurve", "DistancePointToSurface",
+           "DistanceExtrema", "DistanceCurveToCurve", "DistanceCurveToSurface",
+           "DistanceSurfaceToSurface", "DistanceMatrix"]
+
+
+class PointIndex(object):
+    """
+    Spatial index of a set of points using a kd-tree. The index is built
+    once and can then answer many nearest point queries.
+
+    :param pnts: The points.
+    :type pnts: collections.Sequence(point_like) or numpy.ndarray
+
+    :raise ValueError: If the points cannot be converted to an array of
+        shape (N, 3).
+    """
+
+    def __init__(self, pnts):
+        if len(pnts) == 0:
+            xyz = zeros((0, 3), dtype=float64)
+        else:
+            xyz = atleast_2d(array(pnts, dtype=float64))
+        if xyz.ndim != 2 or xyz.shape[1] != 3:
+            msg = 'Expected points that can be converted to shape (N, 3).'
+            raise ValueError(msg)
+
+        self._xyz = xyz
+        self._kdt = None
+        if xyz.shape[0] > 0:
+            self._kdt = KDTree(xyz)
+
+    def __len__(self):
+        return self.npts
+
+    @property
+    def npts(self):
+        """
+        :return: Number of points in the index.
+        :rtype: int
+        """
+        return self._xyz.shape[0]
+
+    @property
+    def xyz(self):
+        """
+        :return: The points as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        return self._xyz
+
+    def point(self, indx):
+        """
+        Get a point by its index.
+
+        :param int indx: The index (0 <= *indx* < *npts*).
+
+        :return: The point.
+        :rtype: afem.geometry.entities.Point
+        """
+        return Point(*self._xyz[indx])
+
+    def nearest(self, p, distance_upper_bound=inf):
+        """
+        Find the point nearest to the given point.
+
+        :param point_like p: The point.
+        :param float distance_upper_bound: Return only points within this
+            distance.
+
+        :return: Distance to the nearest point and its index (d, i). If no
+            point is found within the upper bound then (None, None) is
+            returned.
+        :rtype: tuple
+        """
+        if self._kdt is None:
+            return None, None
+        p = CheckGeom.to_point(p)
+        d, i = self._kdt.query(p.xyz, k=1,
+                               distance_upper_bound=distance_upper_bound)
+        if isinf(d):
+            return None, None
+        return float(d), int(i)
+
+    def nearest_point(self, p):
+        """
+        Find the point nearest to the given point.
+
+        :param point_like p: The point.
+
+        :return: The nearest point or *None* if the index is empty.
+        :rtype: afem.geometry.entities.Point or None
+        """
+        _, i = self.nearest(p)
+        if i is None:
+            return None
+        return self.point(i)
+
+    def nearest_k(self, p, k, distance_upper_bound=inf):
+        """
+        Find the *k* points nearest to the given point.
+
+        :param point_like p: The point.
+        :param int k: Number of points to find.
+        :param float distance_upper_bound: Return only points within this
+            distance.
+
+        :return: Sorted distances and indices of the nearest points. Fewer
+            than *k* results are returned if there are not enough points
+            within the upper bound.
+        :rtype: tuple(numpy.ndarray)
+        """
+        k = min(int(k), self.npts)
+        if k < 1:
+            return zeros(0, dtype=float64), zeros(0, dtype=int)
+        p = CheckGeom.to_point(p)
+        d, i = self._kdt.query(p.xyz, k=[j + 1 for j in range(k)],
+                               distance_upper_bound=distance_upper_bound)
+        found = ~isinf(d)
+        return d[found], i[found]
+
+    def within_radius(self, p, r):
+        """
+        Find all the points within a distance of the given point.
+
+        :param point_like p: The point.
+        :param float r: The radius.
+
+        :return: Indices of the points sorted by distance.
+        :rtype: numpy.ndarray
+        """
+        if self._kdt is None:
+            return zeros(0, dtype=int)
+        p = CheckGeom.to_point(p)
+        indx = array(self._kdt.query_ball_point(p.xyz, r), dtype=int)
+        d = ((self._xyz[indx] - p.xyz) ** 2).sum(axis=1)
+        return indx[d.argsort()]
+
+    def nearest_many(self, pnts, distance_upper_bound=inf):
+        """
+        Find the nearest point for each of the given points.
+
+        :param pnts: The points.
+        :type pnts: collections.Sequence(point_like) or numpy.ndarray
+        :param float distance_upper_bound: Return only points within this
+            distance.
+
+        :return: Distances and indices of the nearest points. If no point is
+            found within the upper bound the distance is *inf* and the index
+            is equal to *npts*.
+        :rtype: tuple(numpy.ndarray)
+        """
+        xyz = atleast_2d(array(pnts, dtype=float64))
+        if self._kdt is None:
+            n = xyz.shape[0]
+            return zeros(n, dtype=float64) + inf, zeros(n, dtype=int)
+        return self._kdt.query(xyz, k=1,
+                               distance_upper_bound=distance_upper_bound)
+
+    def within_radius_many(self, pnts, r):
+        """
+        Find all the points within a distance of each of the given points.
+
+        :param pnts: The points.
+        :type pnts: collections.Sequence(point_like) or numpy.ndarray
+        :param float r: The radius.
+
+        :return: List of index arrays, one for each given point.
+        :rtype: list(numpy.ndarray)
+        """
+        xyz = atleast_2d(array(pnts, dtype=float64))
+        if self._kdt is None:
+            return [zeros(0, dtype=int) for _ in range(xyz.shape[0])]
+        results = self._kdt.query_ball_point(xyz, r)
+        return [array(indx, dtype=int) for indx in results]
 
 
 class DistancePointToCurve(object):
@@ -208,32 +385,35 @@ class DistancePointToSurface(object):
         return self._pnts
 
 
-class DistanceCurveToCurve(object):
+class DistanceExtrema(object):
     """
-    Calculate the extrema between two curves.
-
-    :param crv1: The first curve.
-    :type crv2: afem.adaptor.entities.AdaptorCurve or
-        afem.geometry.entities.Curve or afem.topology.entities.Edge or
-        afem.topology.entities.Wire
-    :param crv2: The second curve.
-    :type crv2: afem.adaptor.entities.AdaptorCurve or
-        afem.geometry.entities.Curve or afem.topology.entities.Edge or
-        afem.topology.entities.Wire
-    :param float tol: The tolerance.
-
-    :raise RuntimeError: If ``Extrema_ExtCC`` fails.
+    Base class for the extrema between two curves and/or surfaces.
     """
 
-    def __init__(self, crv1, crv2, tol=1.0e-10):
-        adp_crv1 = AdaptorCurve.to_adaptor(crv1)
-        adp_crv2 = AdaptorCurve.to_adaptor(crv2)
-        tool = Extrema_ExtCC(adp_crv1.object, adp_crv2.object, tol, tol)
+    def __init__(self):
+        self._is_rejected = False
+        self._nsol = 0
+        self._parallel = False
+        self._dmin = None
+        self._dmax = None
+        self._dist = []
+        self._pnts1 = []
+        self._pnts2 = []
 
-        if not tool.IsDone():
-            msg = 'Extrema between two curves failed.'
-            raise RuntimeError(msg)
+    def _reject(self, entity1, adp1, entity2, adp2, cutoff):
+        """
+        Check if the bounding boxes are farther apart than the cutoff. The
+        boxes of geometry are cached on the geometry.
+        """
+        if cutoff is not None:
+            self._is_rejected = _is_out(_bounding_box(adp1, entity1),
+                                        _bounding_box(adp2, entity2), cutoff)
+        return self._is_rejected
 
+    def _set_results(self, tool):
+        """
+        Gather and sort the results of the OpenCASCADE extrema tool.
+        """
         self._nsol = tool.NbExt()
         self._parallel = tool.IsParallel()
         results = []
@@ -245,6 +425,8 @@ class DistanceCurveToCurve(object):
             results.append((di, p1, p2))
 
         results.sort(key=lambda tup: tup[0])
+        if not results:
+            return
 
         self._dmin = results[0][0]
         self._dmax = results[-1][0]
@@ -260,10 +442,19 @@ class DistanceCurveToCurve(object):
         """
         return self._nsol
 
+    @property
+    def is_rejected(self):
+        """
+        :return: *True* if the extrema were not computed because the bounding
+            boxes were farther apart than the cutoff distance.
+        :rtype: bool
+        """
+        return self._is_rejected
+
     @property
     def is_parallel(self):
         """
-        :return: *True* if curves were parallel.
+        :return: *True* if the entities were parallel.
         :rtype: bool
         """
         return self._parallel
@@ -295,7 +486,7 @@ class DistanceCurveToCurve(object):
     @property
     def points1(self):
         """
-        :return: Sorted points on first curve.
+        :return: Sorted points on the first entity.
         :rtype: list(afem.geometry.entities.Point)
         """
         return self._pnts1
@@ -303,13 +494,50 @@ class DistanceCurveToCurve(object):
     @property
     def points2(self):
         """
-        :return: Sorted points on second curve.
+        :return: Sorted points on the second entity.
         :rtype: list(afem.geometry.entities.Point)
         """
         return self._pnts2
 
 
-class DistanceCurveToSurface(object):
+class DistanceCurveToCurve(DistanceExtrema):
+    """
+    Calculate the extrema between two curves.
+
+    :param crv1: The first curve.
+    :type crv2: afem.adaptor.entities.AdaptorCurve or
+        afem.geometry.entities.Curve or afem.topology.entities.Edge or
+        afem.topology.entities.Wire
+    :param crv2: The second curve.
+    :type crv2: afem.adaptor.entities.AdaptorCurve or
+        afem.geometry.entities.Curve or afem.topology.entities.Edge or
+        afem.topology.entities.Wire
+    :param float tol: The tolerance.
+    :param float cutoff: Optional distance cutoff. If the bounding boxes of
+        the curves are farther apart than this value the extrema are not
+        computed and there are no solutions.
+
+    :raise RuntimeError: If ``Extrema_ExtCC`` fails.
+    """
+
+    def __init__(self, crv1, crv2, tol=1.0e-10, cutoff=None):
+        super(DistanceCurveToCurve, self).__init__()
+        adp_crv1 = AdaptorCurve.to_adaptor(crv1)
+        adp_crv2 = AdaptorCurve.to_adaptor(crv2)
+
+        if self._reject(crv1, adp_crv1, crv2, adp_crv2, cutoff):
+            return
+
+        tool = Extrema_ExtCC(adp_crv1.object, adp_crv2.object, tol, tol)
+
+        if not tool.IsDone():
+            msg = 'Extrema between two curves failed.'
+            raise RuntimeError(msg)
+
+        self._set_results(tool)
+
+
+class DistanceCurveToSurface(DistanceExtrema):
     """
     Calculate the extrema between a curve and surface.
 
@@ -321,95 +549,31 @@ class DistanceCurveToSurface(object):
     :type srf: afem.adaptor.entities.AdaptorSurface or
         afem.geometry.entities.Surface or afem.topology.entities.Face
     :param float tol: The tolerance.
+    :param float cutoff: Optional distance cutoff. If the bounding boxes of
+        the curve and surface are farther apart than this value the extrema
+        are not computed and there are no solutions.
 
     :raise RuntimeError: If the extrema algorithm fails.
     """
 
-    def __init__(self, crv, srf, tol=1.0e-10):
+    def __init__(self, crv, srf, tol=1.0e-10, cutoff=None):
+        super(DistanceCurveToSurface, self).__init__()
         adp_crv = AdaptorCurve.to_adaptor(crv)
         adp_srf = AdaptorSurface.to_adaptor(srf)
+
+        if self._reject(crv, adp_crv, srf, adp_srf, cutoff):
+            return
+
         tool = Extrema_ExtCS(adp_crv.object, adp_srf.object, tol, tol)
 
         if not tool.IsDone():
             msg = 'Extrema between curve and surface failed.'
             raise RuntimeError(msg)
 
-        self._nsol = tool.NbExt()
-        self._parallel = tool.IsParallel()
-        results = []
-        for i in range(1, self._nsol + 1):
-            di = sqrt(tool.SquareDistance(i))
-            gp_pnt1, gp_pnt2 = tool.Points(i)
-            p1 = CheckGeom.to_point(gp_pnt1)
-            p2 = CheckGeom.to_point(gp_pnt2)
-            results.append((di, p1, p2))
+        self._set_results(tool)
 
-        results.sort(key=lambda tup: tup[0])
 
-        self._dmin = results[0][0]
-        self._dmax = results[-1][0]
-        self._dist = [row[0] for row in results]
-        self._pnts1 = [row[1] for row in results]
-        self._pnts2 = [row[2] for row in results]
-
-    @property
-    def nsol(self):
-        """
-        :return: The number of solutions.
-        :rtype: int
-        """
-        return self._nsol
-
-    @property
-    def is_parallel(self):
-        """
-        :return: *True* if the curve and surface were parallel.
-        :rtype: bool
-        """
-        return self._parallel
-
-    @property
-    def dmin(self):
-        """
-        :return: The minimum distance.
-        :rtype: float
-        """
-        return self._dmin
-
-    @property
-    def dmax(self):
-        """
-        :return: The maximum distance.
-        :rtype: float
-        """
-        return self._dmax
-
-    @property
-    def distances(self):
-        """
-        :return: Sorted distances.
-        :rtype: list(float)
-        """
-        return self._dist
-
-    @property
-    def points1(self):
-        """
-        :return: Sorted points on the curve.
-        :rtype: list(afem.geometry.entities.Point)
-        """
-        return self._pnts1
-
-    @property
-    def points2(self):
-        """
-        :return: Sorted points on the surface.
-        :rtype: list(afem.geometry.entities.Point)
-        """
-        return self._pnts2
-
-
-class DistanceSurfaceToSurface(object):
+class DistanceSurfaceToSurface(DistanceExtrema):
     """
     Calculate the extrema between two surfaces.
 
@@ -420,89 +584,209 @@ class DistanceSurfaceToSurface(object):
     :type srf2: afem.adaptor.entities.AdaptorSurface or
         afem.geometry.entities.Surface or afem.topology.entities.Face
     :param float tol: The tolerance.
+    :param float cutoff: Optional distance cutoff. If the bounding boxes of
+        the surfaces are farther apart than this value the extrema are not
+        computed and there are no solutions.
 
     :raise RuntimeError: If ``Extrema_ExtSS`` fails.
     """
 
-    def __init__(self, srf1, srf2, tol=1.0e-10):
+    def __init__(self, srf1, srf2, tol=1.0e-10, cutoff=None):
+        super(DistanceSurfaceToSurface, self).__init__()
         adp_srf1 = AdaptorSurface.to_adaptor(srf1)
         adp_srf2 = AdaptorSurface.to_adaptor(srf2)
+
+        if self._reject(srf1, adp_srf1, srf2, adp_srf2, cutoff):
+            return
+
         tool = Extrema_ExtSS(adp_srf1.object, adp_srf2.object, tol, tol)
 
         if not tool.IsDone():
             msg = 'Extrema between curve and surface failed.'
             raise RuntimeError(msg)
 
-        self._nsol = tool.NbExt()
-        self._parallel = tool.IsParallel()
-        results = []
-        for i in range(1, self._nsol + 1):
-            di = sqrt(tool.SquareDistance(i))
-            gp_pnt1, gp_pnt2 = tool.Points(i)
-            p1 = CheckGeom.to_point(gp_pnt1)
-            p2 = CheckGeom.to_point(gp_pnt2)
-            results.append((di, p1, p2))
+        self._set_results(tool)
 
-        results.sort(key=lambda tup: tup[0])
 
-        self._dmin = results[0][0]
-        self._dmax = results[-1][0]
-        self._dist = [row[0] for row in results]
-        self._pnts1 = [row[1] for row in results]
-        self._pnts2 = [row[2] for row in results]
+class DistanceMatrix(object):
+    """
+    Calculate the minimum distance between each pair of entities from two
+    sets of curves and/or surfaces. If a cutoff distance is given, the
+    bounding box of each entity is computed once and pairs whose boxes are
+    farther apart than the cutoff are not evaluated. The results are stored
+    in a sparse matrix.
+
+    :param geoms1: The first set of curves and/or surfaces.
+    :type geoms1: collections.Sequence(afem.geometry.entities.Curve or
+        afem.geometry.entities.Surface or afem.topology.entities.Edge or
+        afem.topology.entities.Face)
+    :param geoms2: The second set of curves and/or surfaces.
+    :type geoms2: collections.Sequence(afem.geometry.entities.Curve or
+        afem.geometry.entities.Surface or afem.topology.entities.Edge or
+        afem.topology.entities.Face)
+    :param float cutoff: Only pairs closer than this distance are stored. If
+        *None* then every pair is evaluated.
+    :param float tol: The tolerance.
 
-    @property
-    def nsol(self):
-        """
-        :return: The number of solutions.
+    :raise TypeError: If an entity is not a curve or surface.
+
+    .. note::
+
+        Pairs that are touching have a distance of zero, which is stored
+        explicitly in the sparse matrix. Use :attr:`pairs` to distinguish
+        these from pairs that were not evaluated or rejected.
+    """
+
+    def __init__(self, geoms1, geoms2, cutoff=None, tol=1.0e-10):
+        geoms1, geoms2 = list(geoms1), list(geoms2)
+        adps1 = [_to_adaptor(g) for g in geoms1]
+        adps2 = [_to_adaptor(g) for g in geoms2]
+        if cutoff is None:
+            boxes1 = [None] * len(adps1)
+            boxes2 = [None] * len(adps2)
+        else:
+            boxes1 = [_bounding_box(adp, g) for adp, g in zip(adps1, geoms1)]
+            boxes2 = [_bounding_box(adp, g) for adp, g in zip(adps2, geoms2)]
+
+        pairs = []
+        failed = []
+        nearest = {}
+        for i, (adp1, box1) in enumerate(zip(adps1, boxes1)):
+            for j, (adp2, box2) in enumerate(zip(adps2, boxes2)):
+                if _is_out(box1, box2, cutoff):
+                    continue
+                try:
+                    dist = _distance_tool(adp1, adp2, tol)
+                except RuntimeError:
+                    failed.append((i, j))
+                    continue
+                if dist.nsol == 0:
+                    failed.append((i, j))
+                    continue
+                if cutoff is not None and dist.dmin > cutoff:
+                    continue
+                pairs.append((i, j, dist.dmin))
+                if i not in nearest or dist.dmin < nearest[i][1]:
+                    nearest[i] = (j, dist.dmin)
+
+        self._shape = (len(adps1), len(adps2))
+        self._pairs = pairs
+        self._failed = failed
+        self._nearest = nearest
+
+    @property
+    def shape(self):
+        """
+        :return: Number of entities in the first and second sets.
+        :rtype: tuple(int)
+        """
+        return self._shape
+
+    @property
+    def npairs(self):
+        """
+        :return: Number of pairs with a distance result.
         :rtype: int
         """
-        return self._nsol
+        return len(self._pairs)
 
     @property
-    def is_parallel(self):
+    def pairs(self):
         """
-        :return: *True* if the curve and surface were parallel.
-        :rtype: bool
+        :return: List of results as (i, j, d) where *i* and *j* are the
+            indices of the entities in the first and second sets and *d* is
+            their minimum distance.
+        :rtype: list(tuple(int, int, float))
         """
-        return self._parallel
+        return self._pairs
 
     @property
-    def dmin(self):
+    def failed(self):
         """
-        :return: The minimum distance.
-        :rtype: float
+        :return: List of (i, j) pairs where the extrema could not be
+            computed.
+        :rtype: list(tuple(int, int))
         """
-        return self._dmin
+        return self._failed
 
     @property
-    def dmax(self):
+    def matrix(self):
         """
-        :return: The maximum distance.
-        :rtype: float
+        :return: Sparse matrix of minimum distances.
+        :rtype: scipy.sparse.csr_matrix
         """
-        return self._dmax
+        n = len(self._pairs)
+        data = zeros(n, dtype=float64)
+        rows = zeros(n, dtype=int)
+        cols = zeros(n, dtype=int)
+        for k, (i, j, d) in enumerate(self._pairs):
+            rows[k], cols[k], data[k] = i, j, d
+        return csr_matrix((data, (rows, cols)), shape=self._shape)
 
-    @property
-    def distances(self):
-        """
-        :return: Sorted distances.
-        :rtype: list(float)
+    def nearest(self, indx):
         """
-        return self._dist
+        Find the entity in the second set nearest to an entity in the first
+        set.
 
-    @property
-    def points1(self):
-        """
-        :return: Sorted points on the first surface.
-        :rtype: list(afem.geometry.entities.Point)
-        """
-        return self._pnts1
+        :param int indx: Index of the entity in the first set.
 
-    @property
-    def points2(self):
-        """
-        :return: Sorted points on the second surface.
-        :rtype: list(afem.geometry.entities.Point)
+        :return: Index of the nearest entity in the second set and the
+            distance (j, d). Returns (None, None) if there are no results for
+            the entity.
+        :rtype: tuple
         """
-        return self._pnts2
+        return self._nearest.get(indx, (None, None))
+
+
+def _to_adaptor(geom):
+    """
+    Convert the entity to an adaptor curve or surface.
+    """
+    try:
+        return AdaptorCurve.to_adaptor(geom)
+    except TypeError:
+        pass
+    try:
+        return AdaptorSurface.to_adaptor(geom)
+    except TypeError:
+        msg = 'Could not convert to adaptor curve or surface.'
+        raise TypeError(msg)
+
+
+def _bounding_box(adp, entity=None):
+    """
+    Get a bounding box that contains the adaptor curve or surface. If the
+    entity is a curve or surface its cached box is used.
+    """
+    if isinstance(entity, (Curve, Surface)):
+        return entity.bounding_box
+    box = Bnd_Box()
+    if isinstance(adp, AdaptorCurve):
+        BndLib_Add3dCurve.Add_(adp.object, 0., box)
+    else:
+        BndLib_AddSurface.Add_(adp.object, 0., box)
+    return box
+
+
+def _is_out(box1, box2, cutoff):
+    """
+    Check if two bounding boxes are farther apart than the cutoff distance.
+    """
+    if cutoff is None or box1.IsVoid() or box2.IsVoid():
+        return False
+    if box1.IsOpen() or box2.IsOpen():
+        return False
+    return box1.Distance(box2) > cutoff
+
+
+def _distance_tool(adp1, adp2, tol):
+    """
+    Compute the extrema between two adaptors.
+    """
+    if isinstance(adp1, AdaptorCurve):
+        if isinstance(adp2, AdaptorCurve):
+            return DistanceCurveToCurve(adp1, adp2, tol)
+        return DistanceCurveToSurface(adp1, adp2, tol)
+    if isinstance(adp2, AdaptorCurve):
+        return DistanceCurveToSurface(adp2, adp1, tol)
+    return DistanceSurfaceToSurface(adp1, adp2, tol)
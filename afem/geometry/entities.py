@@ -17,12 +17,18 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import os
 from math import radians
+from tempfile import mkstemp
 
+from OCCT.BRep import BRep_Builder, BRep_Tool
 from OCCT.BRepBuilderAPI import (BRepBuilderAPI_MakeFace,
                                  BRepBuilderAPI_MakeEdge,
                                  BRepBuilderAPI_MakeVertex)
 from OCCT.BRepGProp import BRepGProp
+from OCCT.BRepTools import BRepTools
+from OCCT.Bnd import Bnd_Box
+from OCCT.BndLib import BndLib_Add3dCurve, BndLib_AddSurface
 from OCCT.GCPnts import GCPnts_AbscissaPoint
 from OCCT.GProp import GProp_GProps
 from OCCT.Geom import (Geom_Line, Geom_Circle, Geom_Ellipse, Geom_BSplineCurve,
@@ -38,10 +44,15 @@ from OCCT.GeomAdaptor import GeomAdaptor_Curve, GeomAdaptor_Surface
 from OCCT.GeomLib import GeomLib_IsPlanarSurface
 from OCCT.TColStd import (TColStd_Array1OfInteger, TColStd_Array1OfReal,
                           TColStd_Array2OfReal)
-from OCCT.TColgp import TColgp_Array1OfPnt, TColgp_Array2OfPnt
+from OCCT.TColgp import (TColgp_Array1OfPnt, TColgp_Array1OfPnt2d,
+                         TColgp_Array2OfPnt)
+from OCCT.TopoDS import TopoDS, TopoDS_Shape
 from OCCT.gp import (gp_Ax1, gp_Ax2, gp_Ax3, gp_Dir, gp_Pnt, gp_Pnt2d,
-                     gp_Vec2d, gp_Dir2d, gp_Vec)
-from numpy import add, array, float64, subtract, ones
+                     gp_Trsf, gp_Vec2d, gp_Dir2d, gp_Vec)
+from numpy import (add, argsort, array, asarray, broadcast_to, cross, diff,
+                   empty, float64, integer, linspace, mod, ndim, subtract,
+                   tile)
+from numpy.linalg import norm
 
 from afem.base.entities import ViewableItem
 from afem.geometry import utils as geom_utils
@@ -50,10 +61,14 @@ from afem.occ import utils as occ_utils
 
 __all__ = ["Geometry2D", "Point2D", "Vector2D", "Direction2D",
            "Curve2D", "NurbsCurve2D",
-           "Geometry", "Point", "Direction", "Vector", "Axis1", "Axis3",
+           "Geometry", "Point", "PointArray", "Direction", "Vector", "Axis1",
+           "Axis3",
            "Curve", "Line", "Circle", "Ellipse", "NurbsCurve", "TrimmedCurve",
            "Surface", "Plane", "NurbsSurface"]
 
+# Version of the serialized state used for pickling geometry
+_PICKLE_VERSION = 1
+
 
 # 2-D -------------------------------------------------------------------------
 # Types derived from OpenCASCADE geometric processor (gp) package.
@@ -888,6 +903,26 @@ class NurbsCurve2D(Curve2D):
         self.object.KnotSequence(tcol_knot_seq)
         return occ_utils.to_np_from_tcolstd_array1_real(tcol_knot_seq)
 
+    @property
+    def cp(self):
+        """
+        :return: Control points.
+        :rtype: numpy.ndarray
+        """
+        tcol_array = TColgp_Array1OfPnt2d(1, self.object.NbPoles())
+        self.object.Poles(tcol_array)
+        return occ_utils.to_np_from_tcolgp_array1_pnt2d(tcol_array)
+
+    @property
+    def w(self):
+        """
+        :return: Weights of control points.
+        :rtype: numpy.ndarray
+        """
+        tcol_array = TColStd_Array1OfReal(1, self.object.NbPoles())
+        self.object.Weights(tcol_array)
+        return occ_utils.to_np_from_tcolstd_array1_real(tcol_array)
+
     def set_domain(self, u1=0., u2=1.):
         """
         Reparameterize the knot vector between *u1* and *u2*.
@@ -921,6 +956,31 @@ class NurbsCurve2D(Curve2D):
         self.object.Segment(u1, u2)
         return True
 
+    @classmethod
+    def by_data(cls, cp, knots, mult, p, weights=None, is_periodic=False):
+        """
+        Create a 2-D NURBS curve by data.
+
+        :param collections.Sequence(point2d_like) cp: Control points.
+        :param collections.Sequence(float) knots: Knot vector.
+        :param collections.Sequence(int) mult: Multiplicities of knot vector.
+        :param int p: Degree.
+        :param collections.Sequence(float) weights: Weights of control points.
+        :param bool is_periodic: Flag for periodicity.
+        """
+        tcol_cp = occ_utils.to_tcolgp_array1_pnt2d(cp)
+        tcol_knots = occ_utils.to_tcolstd_array1_real(knots)
+        tcol_mult = occ_utils.to_tcolstd_array1_integer(mult)
+        if weights is None:
+            geom_crv = Geom2d_BSplineCurve(tcol_cp, tcol_knots, tcol_mult, p,
+                                           is_periodic)
+            return cls(geom_crv)
+
+        tcol_weights = occ_utils.to_tcolstd_array1_real(weights)
+        geom_crv = Geom2d_BSplineCurve(tcol_cp, tcol_weights, tcol_knots,
+                                       tcol_mult, p, is_periodic)
+        return cls(geom_crv)
+
 
 # 3-D -------------------------------------------------------------------------
 # Types derived from OpenCASCADE geometric processor (gp) package.
@@ -961,6 +1021,11 @@ class Point(gp_Pnt, ViewableItem):
     def __sub__(self, other):
         return subtract(self, other)
 
+    def __reduce__(self):
+        return _unpickle_point, (_PICKLE_VERSION, self.__class__,
+                                 (self.X(), self.Y(), self.Z()),
+                                 _pickle_state(self))
+
     @property
     def displayed_shape(self):
         """
@@ -1225,6 +1290,180 @@ class Point(gp_Pnt, ViewableItem):
             raise TypeError('Cannot convert to Point.')
 
 
+class PointArray(object):
+    """
+    A compact array of 3-D points. The coordinates are stored in a single
+    NumPy array of shape (N, 3) and a :class:`.Point` is only created when
+    an item is accessed by index or during iteration.
+
+    :param xyz: The point coordinates.
+    :type xyz: collections.Sequence(point_like) or numpy.ndarray
+
+    :raise ValueError: If the coordinates cannot be shaped to (N, 3).
+    """
+
+    def __init__(self, xyz=()):
+        try:
+            xyz = array(xyz, dtype=float64)
+        except TypeError:
+            xyz = array([Point.to_point(p).xyz for p in xyz], dtype=float64)
+        if xyz.size == 0:
+            xyz = xyz.reshape(0, 3)
+        if xyz.ndim != 2 or xyz.shape[1] != 3:
+            msg = 'Point coordinates must be an array of shape (N, 3).'
+            raise ValueError(msg)
+        self._xyz = xyz
+
+    def __str__(self):
+        return 'PointArray(npts={0})'.format(self.npts)
+
+    def __repr__(self):
+        return 'PointArray(npts={0})'.format(self.npts)
+
+    def __array__(self, dtype=float64, copy=True, order=None, subok=False,
+                  ndmin=0):
+        return array(self._xyz, dtype=dtype, copy=copy, order=order,
+                     subok=subok, ndmin=ndmin)
+
+    def __iter__(self):
+        for xyz in self._xyz.tolist():
+            yield Point(*xyz)
+
+    def __len__(self):
+        return self._xyz.shape[0]
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, integer)):
+            return Point(*self._xyz[item])
+        return PointArray(self._xyz[item])
+
+    def __setitem__(self, item, value):
+        self._xyz[item] = value
+
+    @property
+    def npts(self):
+        """
+        :return: Number of points.
+        :rtype: int
+        """
+        return self._xyz.shape[0]
+
+    @property
+    def xyz(self):
+        """
+        :return: The point coordinates as an array of shape (N, 3). This is
+            the underlying array and not a copy.
+        :rtype: numpy.ndarray
+        """
+        return self._xyz
+
+    def to_points(self):
+        """
+        Create a :class:`.Point` for each point in the array.
+
+        :return: List of points.
+        :rtype: list(afem.geometry.entities.Point)
+        """
+        return [Point(*xyz) for xyz in self._xyz.tolist()]
+
+    def copy(self):
+        """
+        Return a new copy of the point array.
+
+        :return: New point array.
+        :rtype: afem.geometry.entities.PointArray
+        """
+        return PointArray(self._xyz)
+
+    def transform(self, trsf):
+        """
+        Apply a transformation to all the points.
+
+        :param OCCT.gp.gp_Trsf trsf: The transformation.
+
+        :return: *True* if transformed.
+        :rtype: bool
+        """
+        mat = array([[trsf.Value(i, j) for j in range(1, 5)]
+                     for i in range(1, 4)], dtype=float64)
+        self._xyz = self._xyz.dot(mat[:, :3].T) + mat[:, 3]
+        return True
+
+    def translate(self, v):
+        """
+        Translate the points along the vector.
+
+        :param vector_like v: The translation vector.
+
+        :return: *True* if translated, *False* if not.
+        :rtype: bool
+
+        :raise TypeError: If *v* cannot be converted to a vector.
+        """
+        v = Vector.to_vector(v)
+        self._xyz = self._xyz + v.xyz
+        return True
+
+    def mirror(self, pln):
+        """
+        Mirror the points using a plane.
+
+        :param afem.geometry.entities.Plane pln: The plane.
+
+        :return: *True* if mirrored.
+        :rtype: bool
+        """
+        gp_ax2 = gp_Ax2()
+        gp_ax2.SetAxis(pln.gp_pln.Axis())
+        trsf = gp_Trsf()
+        trsf.SetMirror(gp_ax2)
+        return self.transform(trsf)
+
+    def scale(self, pnt, s):
+        """
+        Scale the points.
+
+        :param point_like pnt: The reference point.
+        :param float s: The scaling value.
+
+        :return: *True* if scaled.
+        :rtype: bool
+        """
+        pnt = Point.to_point(pnt)
+        self._xyz = pnt.xyz + s * (self._xyz - pnt.xyz)
+        return True
+
+    def rotate(self, ax1, angle):
+        """
+        Rotate the points about an axis.
+
+        :param afem.geometry.entities.Axis1 ax1: The axis of rotation.
+        :param float angle: The angle in degrees.
+
+        :return: *True* if rotated.
+        :rtype: bool
+        """
+        trsf = gp_Trsf()
+        trsf.SetRotation(ax1, radians(angle))
+        return self.transform(trsf)
+
+    @classmethod
+    def to_point_array(cls, entity):
+        """
+        Convert entity to a point array if possible.
+
+        :param entity: An entity.
+
+        :return: The entity if already a point array, or a new point array.
+        :rtype: afem.geometry.entities.PointArray
+
+        :raise ValueError: If the entity cannot be converted.
+        """
+        if isinstance(entity, cls):
+            return entity
+        return cls(entity)
+
+
 class Direction(gp_Dir):
     """
     Unit vector in 3-D space derived from ``gp_Dir``.
@@ -1818,6 +2057,8 @@ class Geometry(ViewableItem):
             raise TypeError(msg)
         super(Geometry, self).__init__()
         self._object = obj
+        self._cache = {}
+        self._nmod = 0
 
         # Set default color
         if isinstance(self, Curve):
@@ -1825,6 +2066,24 @@ class Geometry(ViewableItem):
         elif isinstance(self, Surface):
             self.set_color(0.5, 0.5, 0.5)
 
+    def __reduce__(self):
+        return _unpickle_geometry, (_PICKLE_VERSION, self.__class__,
+                                    self._pickle_data(), _pickle_state(self))
+
+    def _pickle_data(self):
+        """
+        Data used to rebuild the geometry when unpickled. By default the
+        geometry is stored as a BRep string.
+        """
+        if isinstance(self, Curve):
+            shape = BRepBuilderAPI_MakeEdge(self.object).Edge()
+        elif isinstance(self, Surface):
+            shape = BRepBuilderAPI_MakeFace(self.object, 0.).Face()
+        else:
+            msg = 'Pickling is not supported for this geometry type.'
+            raise TypeError(msg)
+        return 'brep', _brep_dumps(shape)
+
     @property
     def object(self):
         """
@@ -1833,6 +2092,15 @@ class Geometry(ViewableItem):
         """
         return self._object
 
+    def _invalidate(self):
+        """
+        Discard cached data derived from the geometry. This is called by the
+        methods that modify the geometry. If the underlying object is modified
+        directly this should be called by the user.
+        """
+        self._cache.clear()
+        self._nmod += 1
+
     def translate(self, v):
         """
         Translate the geometry along the vector.
@@ -1846,6 +2114,7 @@ class Geometry(ViewableItem):
         """
         v = Vector.to_vector(v)
         self.object.Translate(v)
+        self._invalidate()
         return True
 
     def mirror(self, pln):
@@ -1861,6 +2130,7 @@ class Geometry(ViewableItem):
         gp_ax2 = gp_Ax2()
         gp_ax2.SetAxis(gp_pln.Axis())
         self.object.Mirror(gp_ax2)
+        self._invalidate()
         return True
 
     def scale(self, pnt, s):
@@ -1875,6 +2145,7 @@ class Geometry(ViewableItem):
         """
         pnt = Point.to_point(pnt)
         self.object.Scale(pnt, s)
+        self._invalidate()
         return True
 
     def rotate(self, ax1, angle):
@@ -1889,6 +2160,7 @@ class Geometry(ViewableItem):
         """
         angle = radians(angle)
         self.object.Rotate(ax1, angle)
+        self._invalidate()
         return True
 
 
@@ -2047,6 +2319,48 @@ class Curve(Geometry):
         """
         return Vector(self.object.DN(u, d).XYZ())
 
+    def eval_many(self, u):
+        """
+        Evaluate points on the curve at many parameters.
+
+        :param array_like u: Curve parameters.
+
+        :return: Curve points as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        u = asarray(u, dtype=float64).ravel()
+        pnts = empty((u.size, 3), dtype=float64)
+        crv = self.object
+        p = gp_Pnt()
+        for i, ui in enumerate(u.tolist()):
+            crv.D0(ui, p)
+            pnts[i] = p.X(), p.Y(), p.Z()
+        return pnts
+
+    def deriv_many(self, u, d=1):
+        """
+        Evaluate derivatives on the curve at many parameters.
+
+        :param array_like u: Curve parameters.
+        :param int d: Derivative to evaluate.
+
+        :return: Curve derivatives as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        u = asarray(u, dtype=float64).ravel()
+        ders = empty((u.size, 3), dtype=float64)
+        crv = self.object
+        if d == 1:
+            p, v = gp_Pnt(), gp_Vec()
+            for i, ui in enumerate(u.tolist()):
+                crv.D1(ui, p, v)
+                ders[i] = v.X(), v.Y(), v.Z()
+        else:
+            for i, ui in enumerate(u.tolist()):
+                v = crv.DN(ui, d)
+                ders[i] = v.X(), v.Y(), v.Z()
+        return ders
+
     def reverse(self):
         """
         Reverse curve direction.
@@ -2054,6 +2368,7 @@ class Curve(Geometry):
         :return: None.
         """
         self.object.Reverse()
+        self._invalidate()
 
     def reversed_u(self, u):
         """
@@ -2082,6 +2397,67 @@ class Curve(Geometry):
         adp_crv = GeomAdaptor_Curve(self.object)
         return GCPnts_AbscissaPoint.Length_(adp_crv, u1, u2, tol)
 
+    def arc_length_table(self, nseg=64, ngauss=5):
+        """
+        Get the arc-length table of the curve. The table is built once for
+        each *nseg* and *ngauss* and stored on the curve until the curve is
+        modified, so it can convert between parameters and arc length many
+        times without integrating the curve again.
+
+        :param int nseg: Number of segments between the first and last
+            parameters. Segments are also split at continuity breaks.
+        :param int ngauss: Number of Gauss points per segment.
+
+        :return: The table.
+        :rtype: afem.adaptor.entities.ArcLengthTable
+        """
+        # Avoid circular import
+        from afem.adaptor.entities import ArcLengthTable
+
+        key = ('arc_length_table', int(nseg), int(ngauss))
+        if key not in self._cache:
+            self._cache[key] = ArcLengthTable(self, nseg, ngauss)
+        return self._cache[key]
+
+    @property
+    def bounding_box(self):
+        """
+        :return: A bounding box that contains the curve. It is computed once
+            and stored on the curve until the curve is modified.
+        :rtype: OCCT.Bnd.Bnd_Box
+        """
+        key = ('bounding_box',)
+        if key not in self._cache:
+            box = Bnd_Box()
+            BndLib_Add3dCurve.Add_(GeomAdaptor_Curve(self.object), 0., box)
+            self._cache[key] = box
+        box = Bnd_Box()
+        box.Add(self._cache[key])
+        return box
+
+    def tessellate(self, deflection=None, angular_deflection=0.1):
+        """
+        Tessellate the curve into a polyline. The tessellation is generated
+        once and stored on the curve until the curve is modified.
+
+        :param float deflection: Maximum distance between the curve and the
+            polyline. If *None* then a fraction of the bounding box diagonal
+            is used.
+        :param float angular_deflection: Maximum angle in radians between
+            the tangents at consecutive points.
+
+        :return: The tessellation.
+        :rtype: afem.geometry.tessellate.TessellateCurve
+        """
+        # Avoid circular import
+        from afem.geometry.tessellate import TessellateCurve
+
+        key = ('tessellate', deflection, angular_deflection)
+        if key not in self._cache:
+            self._cache[key] = TessellateCurve(self, deflection,
+                                               angular_deflection)
+        return self._cache[key]
+
     def invert(self, p):
         """
         Invert the point on the curve to find the parameter.
@@ -2099,6 +2475,28 @@ class Curve(Geometry):
             return proj.LowerDistanceParameter()
         raise RuntimeError('Failed to invert point.')
 
+    def invert_many(self, pnts, warm_start=True):
+        """
+        Invert many points on the curve to find their parameters.
+
+        :param pnts: The points.
+        :type pnts: collections.Sequence(point_like) or numpy.ndarray
+        :param bool warm_start: Option to seed each inversion with the
+            previous result.
+
+        :return: The nearest parameters on the curve as an array of size N.
+        :rtype: numpy.ndarray
+
+        :raise RuntimeError: If algorithm fails for any point.
+        """
+        # Avoid circular import
+        from afem.geometry.project import ProjectPointsToCurve
+
+        proj = ProjectPointsToCurve(pnts, self, warm_start=warm_start)
+        if not proj.success:
+            raise RuntimeError('Failed to invert points.')
+        return proj.parameters
+
     @staticmethod
     def wrap(curve):
         """
@@ -2158,6 +2556,11 @@ class Line(Curve):
         """
         return cls(Geom_Line(p, d))
 
+    def _pickle_data(self):
+        ax1 = self.object.Position()
+        p, d = ax1.Location(), ax1.Direction()
+        return 'line', ((p.X(), p.Y(), p.Z()), (d.X(), d.Y(), d.Z()))
+
 
 class Circle(Curve):
     """
@@ -2190,6 +2593,7 @@ class Circle(Curve):
         :return: None.
         """
         self.object.SetRadius(r)
+        self._invalidate()
 
 
 class Ellipse(Curve):
@@ -2223,6 +2627,7 @@ class Ellipse(Curve):
         :return: None.
         """
         self.object.SetMajorRadius(r)
+        self._invalidate()
 
     def set_minor_radius(self, r):
         """
@@ -2233,6 +2638,7 @@ class Ellipse(Curve):
         :return: None.
         """
         self.object.SetMinorRadius(r)
+        self._invalidate()
 
 
 class NurbsCurve(Curve):
@@ -2316,6 +2722,49 @@ class NurbsCurve(Curve):
         """
         return geom_utils.homogenize_array1d(self.cp, self.w)
 
+    def _pickle_data(self):
+        w = None
+        if self.object.IsRational():
+            w = self.w
+        return 'nurbs', (self.cp, self.knots, self.mult, self.p, w,
+                         self.object.IsPeriodic())
+
+    def eval_many(self, u):
+        """
+        Evaluate points on the curve at many parameters. Non-periodic curves
+        are evaluated in NumPy without calling OpenCASCADE per point.
+
+        :param array_like u: Curve parameters.
+
+        :return: Curve points as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        if self.is_periodic:
+            return super(NurbsCurve, self).eval_many(u)
+        return self._derivs_array(u, 0)[:, 0]
+
+    def deriv_many(self, u, d=1):
+        """
+        Evaluate derivatives on the curve at many parameters. Non-periodic
+        curves are evaluated in NumPy without calling OpenCASCADE per point.
+
+        :param array_like u: Curve parameters.
+        :param int d: Derivative to evaluate.
+
+        :return: Curve derivatives as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        if self.is_periodic:
+            return super(NurbsCurve, self).deriv_many(u, d)
+        return self._derivs_array(u, d)[:, d]
+
+    def _derivs_array(self, u, d):
+        """
+        Evaluate the curve and its derivatives using the NumPy kernel.
+        """
+        return geom_utils.curve_derivs_array(self.n - 1, self.p, self.uk,
+                                             self.cpw, u, d)
+
     def set_domain(self, u1=0., u2=1.):
         """
         Reparameterize the knot vector between *u1* and *u2*.
@@ -2332,6 +2781,7 @@ class NurbsCurve(Curve):
         self.object.Knots(tcol_knots)
         geom_utils.reparameterize_knots(u1, u2, tcol_knots)
         self.object.SetKnots(tcol_knots)
+        self._invalidate()
         return True
 
     def segment(self, u1, u2):
@@ -2347,6 +2797,7 @@ class NurbsCurve(Curve):
         if u1 > u2:
             return False
         self.object.Segment(u1, u2)
+        self._invalidate()
         return True
 
     def set_cp(self, i, cp, weight=None):
@@ -2364,6 +2815,7 @@ class NurbsCurve(Curve):
             self.object.SetPole(i, cp)
         else:
             self.object.SetPole(i, cp, weight)
+        self._invalidate()
 
     @classmethod
     def by_data(cls, cp, knots, mult, p, weights=None, is_periodic=False):
@@ -2381,9 +2833,11 @@ class NurbsCurve(Curve):
         tcol_knots = occ_utils.to_tcolstd_array1_real(knots)
         tcol_mult = occ_utils.to_tcolstd_array1_integer(mult)
         if weights is None:
-            weights = [1.] * tcol_cp.Length()
-        tcol_weights = occ_utils.to_tcolstd_array1_real(weights)
+            geom_crv = Geom_BSplineCurve(tcol_cp, tcol_knots, tcol_mult, p,
+                                         is_periodic)
+            return cls(geom_crv)
 
+        tcol_weights = occ_utils.to_tcolstd_array1_real(weights)
         geom_crv = Geom_BSplineCurve(tcol_cp, tcol_weights, tcol_knots,
                                      tcol_mult, p, is_periodic)
         return cls(geom_crv)
@@ -2404,6 +2858,11 @@ class TrimmedCurve(Curve):
         """
         return Curve.wrap(self.object.BasisCurve())
 
+    def _pickle_data(self):
+        basis = self.basis_curve
+        return 'trimmed', (basis.__class__, basis._pickle_data(), self.u1,
+                           self.u2)
+
     def set_trim(self, u1, u2, sense=True, adjust_periodic=True):
         """
         Set the trimming parameters on the basis curve.
@@ -2424,6 +2883,7 @@ class TrimmedCurve(Curve):
             curve.
         """
         self.object.SetTrim(u1, u2, sense, adjust_periodic)
+        self._invalidate()
 
     @classmethod
     def by_parameters(cls, basis_curve, u1=None, u2=None, sense=True,
@@ -2639,6 +3099,128 @@ class Surface(Geometry):
         dv = self.deriv(u, v, 0, 1)
         return Vector(du.Crossed(dv).XYZ())
 
+    def eval_many(self, u, v):
+        """
+        Evaluate points on the surface at many (u, v) pairs.
+
+        :param array_like u: Surface u-parameters.
+        :param array_like v: Surface v-parameters. Must be the same size as
+            *u*.
+
+        :return: Surface points as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+
+        :raise ValueError: If *u* and *v* are not the same size.
+        """
+        u, v = self._check_uv(u, v)
+        pnts = empty((u.size, 3), dtype=float64)
+        srf = self.object
+        p = gp_Pnt()
+        for i, (ui, vi) in enumerate(zip(u.tolist(), v.tolist())):
+            srf.D0(ui, vi, p)
+            pnts[i] = p.X(), p.Y(), p.Z()
+        return pnts
+
+    def eval_grid(self, u, v):
+        """
+        Evaluate points on the surface over the tensor product grid of the
+        parameters.
+
+        :param array_like u: Surface u-parameters of size N.
+        :param array_like v: Surface v-parameters of size M.
+
+        :return: Surface points as an array of shape (N, M, 3).
+        :rtype: numpy.ndarray
+        """
+        u = asarray(u, dtype=float64).ravel()
+        v = asarray(v, dtype=float64).ravel()
+        pnts = empty((u.size, v.size, 3), dtype=float64)
+        srf = self.object
+        p = gp_Pnt()
+        vlist = v.tolist()
+        for i, ui in enumerate(u.tolist()):
+            for j, vj in enumerate(vlist):
+                srf.D0(ui, vj, p)
+                pnts[i, j] = p.X(), p.Y(), p.Z()
+        return pnts
+
+    def deriv_many(self, u, v, nu, nv):
+        """
+        Evaluate derivatives on the surface at many (u, v) pairs.
+
+        :param array_like u: Surface u-parameters.
+        :param array_like v: Surface v-parameters. Must be the same size as
+            *u*.
+        :param int nu: Derivative in u-direction.
+        :param int nv: Derivative in v-direction.
+
+        :return: Surface derivatives as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+
+        :raise ValueError: If *u* and *v* are not the same size.
+        """
+        u, v = self._check_uv(u, v)
+        ders = empty((u.size, 3), dtype=float64)
+        srf = self.object
+        for i, (ui, vi) in enumerate(zip(u.tolist(), v.tolist())):
+            d = srf.DN(ui, vi, nu, nv)
+            ders[i] = d.X(), d.Y(), d.Z()
+        return ders
+
+    def norm_many(self, u, v):
+        """
+        Evaluate normals on the surface at many (u, v) pairs. Like
+        :meth:`norm`, the normals are not unit vectors.
+
+        :param array_like u: Surface u-parameters.
+        :param array_like v: Surface v-parameters. Must be the same size as
+            *u*.
+
+        :return: Surface normals as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+
+        :raise ValueError: If *u* and *v* are not the same size.
+        """
+        u, v = self._check_uv(u, v)
+        du = empty((u.size, 3), dtype=float64)
+        dv = empty((u.size, 3), dtype=float64)
+        srf = self.object
+        p, d1u, d1v = gp_Pnt(), gp_Vec(), gp_Vec()
+        for i, (ui, vi) in enumerate(zip(u.tolist(), v.tolist())):
+            srf.D1(ui, vi, p, d1u, d1v)
+            du[i] = d1u.X(), d1u.Y(), d1u.Z()
+            dv[i] = d1v.X(), d1v.Y(), d1v.Z()
+        return cross(du, dv)
+
+    def norm_grid(self, u, v):
+        """
+        Evaluate normals on the surface over the tensor product grid of the
+        parameters. Like :meth:`norm`, the normals are not unit vectors.
+
+        :param array_like u: Surface u-parameters of size N.
+        :param array_like v: Surface v-parameters of size M.
+
+        :return: Surface normals as an array of shape (N, M, 3).
+        :rtype: numpy.ndarray
+        """
+        u = asarray(u, dtype=float64).ravel()
+        v = asarray(v, dtype=float64).ravel()
+        uu = u.repeat(v.size)
+        vv = tile(v, u.size)
+        return self.norm_many(uu, vv).reshape(u.size, v.size, 3)
+
+    @staticmethod
+    def _check_uv(u, v):
+        """
+        Flatten the parameters and check they are the same size.
+        """
+        u = asarray(u, dtype=float64).ravel()
+        v = asarray(v, dtype=float64).ravel()
+        if u.size != v.size:
+            msg = 'The u- and v-parameters must be the same size.'
+            raise ValueError(msg)
+        return u, v
+
     def surface_area(self, u1, v1, u2, v2, tol=1.0e-7):
         """
         Calculate the surface area between the parameters.
@@ -2679,6 +3261,44 @@ class Surface(Geometry):
         """
         return Curve.wrap(self.object.VIso(v))
 
+    @property
+    def bounding_box(self):
+        """
+        :return: A bounding box that contains the surface. It is computed once
+            and stored on the surface until the surface is modified.
+        :rtype: OCCT.Bnd.Bnd_Box
+        """
+        key = ('bounding_box',)
+        if key not in self._cache:
+            box = Bnd_Box()
+            BndLib_AddSurface.Add_(GeomAdaptor_Surface(self.object), 0., box)
+            self._cache[key] = box
+        box = Bnd_Box()
+        box.Add(self._cache[key])
+        return box
+
+    def tessellate(self, deflection=None, max_iter=8):
+        """
+        Tessellate the surface into a triangulated grid of parameters. The
+        tessellation is generated once and stored on the surface until the
+        surface is modified.
+
+        :param float deflection: Maximum distance between the surface and the
+            grid. If *None* then a fraction of the bounding box diagonal is
+            used.
+        :param int max_iter: Maximum number of refinement iterations.
+
+        :return: The tessellation.
+        :rtype: afem.geometry.tessellate.TessellateSurface
+        """
+        # Avoid circular import
+        from afem.geometry.tessellate import TessellateSurface
+
+        key = ('tessellate', deflection, max_iter)
+        if key not in self._cache:
+            self._cache[key] = TessellateSurface(self, deflection, max_iter)
+        return self._cache[key]
+
     def invert(self, p):
         """
         Invert the point on the surface to find the parameters.
@@ -2696,6 +3316,29 @@ class Surface(Geometry):
             return proj.LowerDistanceParameters(0., 0.)
         raise RuntimeError('Failed to invert point.')
 
+    def invert_many(self, pnts, warm_start=True):
+        """
+        Invert many points on the surface to find their parameters.
+
+        :param pnts: The points.
+        :type pnts: collections.Sequence(point_like) or numpy.ndarray
+        :param bool warm_start: Option to seed each inversion with the
+            previous result.
+
+        :return: The nearest parameters on the surface as an array of shape
+            (N, 2).
+        :rtype: numpy.ndarray
+
+        :raise RuntimeError: If algorithm fails for any point.
+        """
+        # Avoid circular import
+        from afem.geometry.project import ProjectPointsToSurface
+
+        proj = ProjectPointsToSurface(pnts, self, warm_start=warm_start)
+        if not proj.success:
+            raise RuntimeError('Failed to invert points.')
+        return proj.parameters
+
     @staticmethod
     def wrap(surface):
         """
@@ -2750,6 +3393,12 @@ class Plane(Surface):
         """
         return self.object.Pln()
 
+    def _pickle_data(self):
+        ax3 = self.gp_pln.Position()
+        p, n, x = ax3.Location(), ax3.Direction(), ax3.XDirection()
+        return 'plane', ((p.X(), p.Y(), p.Z()), (n.X(), n.Y(), n.Z()),
+                         (x.X(), x.Y(), x.Z()), ax3.Direct())
+
     def distance(self, pnt):
         """
         Compute the distance between a point and this plane.
@@ -2775,6 +3424,7 @@ class Plane(Surface):
         pln = self.gp_pln
         pln.Rotate(pln.XAxis(), radians(angle))
         self.object.SetPln(pln)
+        self._invalidate()
 
     def rotate_y(self, angle):
         """
@@ -2787,6 +3437,7 @@ class Plane(Surface):
         pln = self.gp_pln
         pln.Rotate(pln.YAxis(), radians(angle))
         self.object.SetPln(pln)
+        self._invalidate()
 
     @classmethod
     def by_system(cls, ax3):
@@ -2944,6 +3595,132 @@ class NurbsSurface(Surface):
         """
         return geom_utils.homogenize_array2d(self.cp, self.w)
 
+    def _pickle_data(self):
+        w = None
+        if self.object.IsURational() or self.object.IsVRational():
+            w = self.w
+        return 'nurbs', (self.cp, self.uknots, self.vknots, self.umult,
+                         self.vmult, self.p, self.q, w,
+                         self.object.IsUPeriodic(), self.object.IsVPeriodic())
+
+    def eval_many(self, u, v):
+        """
+        Evaluate points on the surface at many (u, v) pairs. Non-periodic
+        surfaces are evaluated in NumPy without calling OpenCASCADE per point.
+
+        :param array_like u: Surface u-parameters.
+        :param array_like v: Surface v-parameters. Must be the same size as
+            *u*.
+
+        :return: Surface points as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+
+        :raise ValueError: If *u* and *v* are not the same size.
+        """
+        if self._is_periodic:
+            return super(NurbsSurface, self).eval_many(u, v)
+        u, v = self._check_uv(u, v)
+        return self._derivs_array(u, v, 0, 0)[:, 0, 0]
+
+    def eval_grid(self, u, v):
+        """
+        Evaluate points on the surface over the tensor product grid of the
+        parameters. Non-periodic surfaces are evaluated in NumPy without
+        calling OpenCASCADE per point.
+
+        :param array_like u: Surface u-parameters of size N.
+        :param array_like v: Surface v-parameters of size M.
+
+        :return: Surface points as an array of shape (N, M, 3).
+        :rtype: numpy.ndarray
+        """
+        if self._is_periodic:
+            return super(NurbsSurface, self).eval_grid(u, v)
+        return self._derivs_grid(u, v, 0, 0)[:, :, 0, 0]
+
+    def deriv_many(self, u, v, nu, nv):
+        """
+        Evaluate derivatives on the surface at many (u, v) pairs. Non-periodic
+        surfaces are evaluated in NumPy without calling OpenCASCADE per point.
+
+        :param array_like u: Surface u-parameters.
+        :param array_like v: Surface v-parameters. Must be the same size as
+            *u*.
+        :param int nu: Derivative in u-direction.
+        :param int nv: Derivative in v-direction.
+
+        :return: Surface derivatives as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+
+        :raise ValueError: If *u* and *v* are not the same size.
+        """
+        if self._is_periodic:
+            return super(NurbsSurface, self).deriv_many(u, v, nu, nv)
+        u, v = self._check_uv(u, v)
+        return self._derivs_array(u, v, nu, nv)[:, nu, nv]
+
+    def norm_many(self, u, v):
+        """
+        Evaluate normals on the surface at many (u, v) pairs. Like
+        :meth:`norm`, the normals are not unit vectors.
+
+        :param array_like u: Surface u-parameters.
+        :param array_like v: Surface v-parameters. Must be the same size as
+            *u*.
+
+        :return: Surface normals as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+
+        :raise ValueError: If *u* and *v* are not the same size.
+        """
+        if self._is_periodic:
+            return super(NurbsSurface, self).norm_many(u, v)
+        u, v = self._check_uv(u, v)
+        skl = self._derivs_array(u, v, 1, 1)
+        return cross(skl[:, 1, 0], skl[:, 0, 1])
+
+    def norm_grid(self, u, v):
+        """
+        Evaluate normals on the surface over the tensor product grid of the
+        parameters. Like :meth:`norm`, the normals are not unit vectors.
+
+        :param array_like u: Surface u-parameters of size N.
+        :param array_like v: Surface v-parameters of size M.
+
+        :return: Surface normals as an array of shape (N, M, 3).
+        :rtype: numpy.ndarray
+        """
+        if self._is_periodic:
+            return super(NurbsSurface, self).norm_grid(u, v)
+        skl = self._derivs_grid(u, v, 1, 1)
+        return cross(skl[:, :, 1, 0], skl[:, :, 0, 1])
+
+    @property
+    def _is_periodic(self):
+        """
+        :return: *True* if the surface is periodic in either direction.
+        :rtype: bool
+        """
+        return self.object.IsUPeriodic() or self.object.IsVPeriodic()
+
+    def _derivs_array(self, u, v, du, dv):
+        """
+        Evaluate the surface and its derivatives at (u, v) pairs using the
+        NumPy kernel.
+        """
+        return geom_utils.surface_derivs_array(self.n - 1, self.p, self.uk,
+                                               self.m - 1, self.q, self.vk,
+                                               self.cpw, u, v, du, dv)
+
+    def _derivs_grid(self, u, v, du, dv):
+        """
+        Evaluate the surface and its derivatives over a grid using the NumPy
+        kernel.
+        """
+        return geom_utils.surface_derivs_grid(self.n - 1, self.p, self.uk,
+                                              self.m - 1, self.q, self.vk,
+                                              self.cpw, u, v, du, dv)
+
     def set_udomain(self, u1=0., u2=1.):
         """
         Reparameterize the knot vector between *u1* and *u2*.
@@ -2960,6 +3737,7 @@ class NurbsSurface(Surface):
         self.object.UKnots(tcol_knots)
         geom_utils.reparameterize_knots(u1, u2, tcol_knots)
         self.object.SetUKnots(tcol_knots)
+        self._invalidate()
         return True
 
     def set_vdomain(self, v1=0., v2=1.):
@@ -2978,6 +3756,7 @@ class NurbsSurface(Surface):
         self.object.VKnots(tcol_knots)
         geom_utils.reparameterize_knots(v1, v2, tcol_knots)
         self.object.SetVKnots(tcol_knots)
+        self._invalidate()
         return True
 
     def local_to_global_param(self, d, *args):
@@ -3027,37 +3806,80 @@ class NurbsSurface(Surface):
         if u1 > u2 or v1 > v2:
             return False
         self.object.CheckAndSegment(u1, u2, v1, v2)
+        self._invalidate()
         return True
 
     def locate_u(self, u, tol2d=1.0e-9, with_knot_repetition=False):
         """
-        Locate the u-value in the knot sequence.
+        Locate the u-value in the knot sequence. The knots are cached as an
+        array so repeated queries do not call OpenCASCADE.
 
-        :param float u: The parameter.
+        :param u: The parameter(s).
+        :type u: float or array_like
         :param int tol2d: The parametric tolerance. Used to determine if *u* is
             at an existing knot.
         :param bool with_knot_repetition: Considers location of knot value
             with repetition of multiple knot value if ``True``.
 
-        :return: Bounding knot locations (i1, i2).
-        :rtype: tuple(int)
+        :return: Bounding knot locations (i1, i2). If *u* is an array then
+            arrays of locations are returned.
+        :rtype: tuple(int) or tuple(numpy.ndarray)
         """
-        return self.object.LocateU(u, tol2d, 0, 0, with_knot_repetition)
+        return self._locate('u', u, tol2d, with_knot_repetition)
 
     def locate_v(self, v, tol2d=1.0e-9, with_knot_repetition=False):
         """
-        Locate the v-value in the knot sequence.
+        Locate the v-value in the knot sequence. The knots are cached as an
+        array so repeated queries do not call OpenCASCADE.
 
-        :param float v: The parameter.
+        :param v: The parameter(s).
+        :type v: float or array_like
         :param int tol2d: The parametric tolerance. Used to determine if *v* is
             at an existing knot.
         :param bool with_knot_repetition: Considers location of knot value
             with repetition of multiple knot value if ``True``.
 
-        :return: Bounding knot locations (i1, i2).
-        :rtype: tuple(int)
+        :return: Bounding knot locations (i1, i2). If *v* is an array then
+            arrays of locations are returned.
+        :rtype: tuple(int) or tuple(numpy.ndarray)
+        """
+        return self._locate('v', v, tol2d, with_knot_repetition)
+
+    def _knot_array(self, d, with_knot_repetition=False):
         """
-        return self.object.LocateV(v, tol2d, 0, 0, with_knot_repetition)
+        Get the cached knots in the direction.
+        """
+        key = ('knots', d, with_knot_repetition)
+        if key not in self._cache:
+            if with_knot_repetition:
+                knots = self.uk if d == 'u' else self.vk
+            else:
+                knots = self.uknots if d == 'u' else self.vknots
+            self._cache[key] = knots
+        return self._cache[key]
+
+    def _locate(self, d, u, tol2d, with_knot_repetition):
+        """
+        Locate parameters in the cached knots of the direction.
+        """
+        knots = self._knot_array(d, with_knot_repetition)
+        is_scalar = ndim(u) == 0
+        u = asarray(u, dtype=float64)
+
+        # Normalize periodic parameters like OpenCASCADE
+        if d == 'u':
+            is_periodic = self.object.IsUPeriodic()
+            k1, k2 = self._knot_array('u')[[0, -1]]
+        else:
+            is_periodic = self.object.IsVPeriodic()
+            k1, k2 = self._knot_array('v')[[0, -1]]
+        if is_periodic:
+            u = k1 + mod(u - k1, k2 - k1)
+
+        i1, i2 = geom_utils.locate_knots(knots, u, tol2d)
+        if is_scalar:
+            return int(i1), int(i2)
+        return i1, i2
 
     def insert_uknot(self, u, m=1, tol2d=1.0e-9):
         """
@@ -3072,6 +3894,7 @@ class NurbsSurface(Surface):
         :return: None.
         """
         self.object.InsertUKnot(u, m, tol2d)
+        self._invalidate()
 
     def insert_vknot(self, v, m=1, tol2d=1.0e-9):
         """
@@ -3086,6 +3909,105 @@ class NurbsSurface(Surface):
         :return: None.
         """
         self.object.InsertVKnot(v, m, tol2d)
+        self._invalidate()
+
+    def insert_uknots(self, uknots, m=1, tol2d=1.0e-9, add=True):
+        """
+        Insert many u-values in the knot sequence at once.
+
+        :param array_like uknots: The knot values.
+        :param m: The multiplicity of each knot.
+        :type m: int or array_like
+        :param float tol2d: Parametric tolerance for comparing knot values.
+        :param bool add: If *True* the multiplicity of an existing knot is
+            increased by *m*. Otherwise it is increased to *m* if lower.
+
+        :return: None.
+        """
+        tcol_knots, tcol_mult = _knots_to_insert(uknots, m)
+        if tcol_knots is None:
+            return None
+        self.object.InsertUKnots(tcol_knots, tcol_mult, tol2d, add)
+        self._invalidate()
+
+    def insert_vknots(self, vknots, m=1, tol2d=1.0e-9, add=True):
+        """
+        Insert many v-values in the knot sequence at once.
+
+        :param array_like vknots: The knot values.
+        :param m: The multiplicity of each knot.
+        :type m: int or array_like
+        :param float tol2d: Parametric tolerance for comparing knot values.
+        :param bool add: If *True* the multiplicity of an existing knot is
+            increased by *m*. Otherwise it is increased to *m* if lower.
+
+        :return: None.
+        """
+        tcol_knots, tcol_mult = _knots_to_insert(vknots, m)
+        if tcol_knots is None:
+            return None
+        self.object.InsertVKnots(tcol_knots, tcol_mult, tol2d, add)
+        self._invalidate()
+
+    def refine_u(self, max_length, nsamples=10):
+        """
+        Insert knots in the u-direction so that the length of each knot span
+        does not exceed the maximum length. The length of a span is the
+        largest polyline length of the surface along the span, sampled at
+        several v-parameters. Spans are split uniformly in a single knot
+        insertion.
+
+        :param float max_length: The maximum span length.
+        :param int nsamples: Number of samples along each span and in the
+            v-direction used to estimate the span lengths.
+
+        :return: Number of knots inserted.
+        :rtype: int
+        """
+        uknots = self._knot_array('u')
+        v = linspace(self.v1, self.v2, max(int(nsamples), 2))
+        lengths = self._span_lengths(uknots, v, nsamples, True)
+        new_knots = geom_utils.knot_refinement(uknots, lengths, max_length)
+        self.insert_uknots(new_knots)
+        return new_knots.size
+
+    def refine_v(self, max_length, nsamples=10):
+        """
+        Insert knots in the v-direction so that the length of each knot span
+        does not exceed the maximum length. The length of a span is the
+        largest polyline length of the surface along the span, sampled at
+        several u-parameters. Spans are split uniformly in a single knot
+        insertion.
+
+        :param float max_length: The maximum span length.
+        :param int nsamples: Number of samples along each span and in the
+            u-direction used to estimate the span lengths.
+
+        :return: Number of knots inserted.
+        :rtype: int
+        """
+        vknots = self._knot_array('v')
+        u = linspace(self.u1, self.u2, max(int(nsamples), 2))
+        lengths = self._span_lengths(vknots, u, nsamples, False)
+        new_knots = geom_utils.knot_refinement(vknots, lengths, max_length)
+        self.insert_vknots(new_knots)
+        return new_knots.size
+
+    def _span_lengths(self, knots, other, nsamples, is_u):
+        """
+        Estimate the length of each knot span by evaluating all spans in a
+        single grid.
+        """
+        t = linspace(0., 1., max(int(nsamples), 2))
+        a, b = knots[:-1], knots[1:]
+        prms = (a[:, None] + (b - a)[:, None] * t).ravel()
+        if is_u:
+            pnts = self.eval_grid(prms, other)
+        else:
+            pnts = self.eval_grid(other, prms).transpose((1, 0, 2))
+        pnts = pnts.reshape(a.size, t.size, other.size, 3)
+        seg = norm(diff(pnts, axis=1), axis=3).sum(axis=1)
+        return seg.max(axis=1)
 
     def set_uknots(self, uknots):
         """
@@ -3102,6 +4024,7 @@ class NurbsSurface(Surface):
         if uk.Size() != self.object.NbUKnots():
             raise ValueError('Incorrect number of knot values.')
         self.object.SetUKnots(uk)
+        self._invalidate()
 
     def set_vknots(self, vknots):
         """
@@ -3118,6 +4041,7 @@ class NurbsSurface(Surface):
         if vk.Size() != self.object.NbVKnots():
             raise ValueError('Incorrect number of knot values.')
         self.object.SetVKnots(vk)
+        self._invalidate()
 
     def set_cp(self, i, j, cp, weight=None):
         """
@@ -3135,6 +4059,7 @@ class NurbsSurface(Surface):
             self.object.SetPole(i, j, cp)
         else:
             self.object.SetPole(i, j, cp, weight)
+        self._invalidate()
 
     def set_cp_row(self, u_index, cp, weights=None):
         """
@@ -3154,6 +4079,7 @@ class NurbsSurface(Surface):
         else:
             tcol_w = occ_utils.to_tcolstd_array1_real(weights)
             self.object.SetPoleRow(u_index, tcol_gp, tcol_w)
+        self._invalidate()
 
     def set_cp_col(self, v_index, cp, weights=None):
         """
@@ -3173,6 +4099,7 @@ class NurbsSurface(Surface):
         else:
             tcol_w = occ_utils.to_tcolstd_array1_real(weights)
             self.object.SetPoleCol(v_index, tcol_gp, tcol_w)
+        self._invalidate()
 
     @classmethod
     def by_data(cls, cp, uknots, vknots, umult, vmult, p, q, weights=None,
@@ -3198,17 +4125,139 @@ class NurbsSurface(Surface):
         tcol_umult = occ_utils.to_tcolstd_array1_integer(umult)
         tcol_vknots = occ_utils.to_tcolstd_array1_real(vknots)
         tcol_vmult = occ_utils.to_tcolstd_array1_integer(vmult)
-        if weights is None:
-            weights = ones((tcol_cp.ColLength(), tcol_cp.RowLength()))
-        tcol_weights = occ_utils.to_tcolstd_array2_real(weights)
 
         geom_srf = Geom_BSplineSurface(tcol_cp, tcol_uknots, tcol_vknots,
                                        tcol_umult, tcol_vmult, p, q,
                                        is_u_periodic, is_v_periodic)
+        if weights is None:
+            return cls(geom_srf)
 
-        # Set the weights since using in construction causes an error.
-        for i in range(1, tcol_weights.ColLength() + 1):
-            for j in range(1, tcol_weights.RowLength() + 1):
-                geom_srf.SetWeight(i, j, tcol_weights.Value(i, j))
+        # Set the weights since using in construction causes an error. Skip
+        # this if the surface is not rational.
+        weights = asarray(weights, dtype=float64)
+        if (weights == 1.).all():
+            return cls(geom_srf)
+        for i, row in enumerate(weights, 1):
+            tcol_w = occ_utils.to_tcolstd_array1_real(row)
+            geom_srf.SetWeightRow(i, tcol_w)
 
         return cls(geom_srf)
+
+
+def _knots_to_insert(knots, m):
+    """
+    Convert sorted knots and multiplicities to OCC data for insertion.
+    """
+    knots = asarray(knots, dtype=float64).ravel()
+    if knots.size == 0:
+        return None, None
+    mult = broadcast_to(asarray(m, dtype=int), knots.shape)
+    indx = argsort(knots, kind='mergesort')
+    tcol_knots = occ_utils.to_tcolstd_array1_real(knots[indx])
+    tcol_mult = occ_utils.to_tcolstd_array1_integer(mult[indx])
+    return tcol_knots, tcol_mult
+
+
+def _unpickle_geometry(version, cls, data, state):
+    """
+    Rebuild geometry from its pickled state.
+    """
+    if version != _PICKLE_VERSION:
+        msg = 'Unsupported geometry pickle version {}.'.format(version)
+        raise ValueError(msg)
+
+    kind, args = data
+    if kind == 'nurbs':
+        geom = cls.by_data(*args)
+    elif kind == 'line':
+        p, d = args
+        geom = cls(Geom_Line(gp_Pnt(*p), gp_Dir(*d)))
+    elif kind == 'plane':
+        p, n, x, is_direct = args
+        ax3 = gp_Ax3(gp_Pnt(*p), gp_Dir(*n), gp_Dir(*x))
+        if not is_direct:
+            ax3.YReverse()
+        geom = cls(Geom_Plane(ax3))
+    elif kind == 'trimmed':
+        basis_cls, basis_data, u1, u2 = args
+        basis = _unpickle_geometry(version, basis_cls, basis_data,
+                                   (None, 0.))
+        geom = cls(Geom_TrimmedCurve(basis.object, u1, u2))
+    elif kind == 'brep':
+        shape = _brep_loads(args)
+        if issubclass(cls, Curve):
+            edge = TopoDS.Edge_(shape)
+            occ_obj = BRep_Tool.Curve_(edge, 0., 0.)[0]
+        else:
+            face = TopoDS.Face_(shape)
+            occ_obj = BRep_Tool.Surface_(face)
+        geom = cls(occ_obj)
+    else:
+        msg = 'Unknown geometry pickle data {}.'.format(kind)
+        raise ValueError(msg)
+
+    _set_pickle_state(geom, state)
+    return geom
+
+
+def _unpickle_point(version, cls, xyz, state):
+    """
+    Rebuild a point from its pickled state.
+    """
+    if version != _PICKLE_VERSION:
+        msg = 'Unsupported geometry pickle version {}.'.format(version)
+        raise ValueError(msg)
+
+    p = cls(*xyz)
+    _set_pickle_state(p, state)
+    return p
+
+
+def _pickle_state(item):
+    """
+    Color and transparency of a viewable item for pickling.
+    """
+    color = None
+    if item.color is not None:
+        color = (item.color.Red(), item.color.Green(), item.color.Blue())
+    return color, item.transparency
+
+
+def _set_pickle_state(item, state):
+    """
+    Restore the color and transparency of an unpickled viewable item.
+    """
+    color, transparency = state
+    if color is not None:
+        item.set_color(*color)
+    item.set_transparency(transparency)
+
+
+def _brep_dumps(shape):
+    """
+    Write the shape to a BRep string.
+    """
+    fd, fn = mkstemp(suffix='.brep')
+    os.close(fd)
+    try:
+        BRepTools.Write_(shape, fn)
+        with open(fn, 'r') as f:
+            return f.read()
+    finally:
+        os.remove(fn)
+
+
+def _brep_loads(brep):
+    """
+    Read a shape from a BRep string.
+    """
+    fd, fn = mkstemp(suffix='.brep')
+    os.close(fd)
+    try:
+        with open(fn, 'w') as f:
+            f.write(brep)
+        shape = TopoDS_Shape()
+        BRepTools.Read_(shape, fn, BRep_Builder())
+        return shape
+    finally:
+        os.remove(fn)
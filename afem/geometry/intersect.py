@@ -17,24 +17,195 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from collections import OrderedDict
+
 from OCCT.BRepBuilderAPI import BRepBuilderAPI_MakeEdge
+from OCCT.Bnd import Bnd_Box
+from OCCT.BndLib import BndLib_Add3dCurve, BndLib_AddSurface
 from OCCT.Extrema import Extrema_ExtPC
 from OCCT.GeomAPI import GeomAPI_IntCS
+from OCCT.GeomAdaptor import GeomAdaptor_Curve, GeomAdaptor_Surface
 from OCCT.GeomInt import GeomInt_IntSS
 from OCCT.IntTools import IntTools_EdgeEdge
 from OCCT.ShapeFix import ShapeFix_ShapeTolerance
 from OCCT.TopAbs import TopAbs_VERTEX
-from numpy import float64, inf, mean, sqrt, zeros
-from scipy.spatial import KDTree
+from OCCT.gp import gp_Pnt
+from numpy import array, float64, inf, mean, sqrt, zeros
 
 from afem.adaptor.entities import AdaptorCurve
 from afem.geometry.check import CheckGeom
-from afem.geometry.entities import Curve, Point
+from afem.geometry.distance import PointIndex
+from afem.geometry.entities import Curve, Geometry, Point
+from afem.misc.utils import map_in_processes
 
-__all__ = ["CurveIntersector", "IntersectCurveCurve",
-           "IntersectCurveSurface", "SurfaceIntersector",
+__all__ = ["IntersectionCache", "CurveIntersector", "IntersectCurveCurve",
+           "IntersectCurveSurface", "IntersectCurvesSurface",
+           "SurfaceIntersector",
            "IntersectSurfaceSurface"]
 
+# Default cache used when enabled
+_default_cache = None
+
+
+class IntersectionCache(object):
+    """
+    Least recently used cache for intersection results. Results are keyed
+    on the identity of the input geometry (or the shapes for topological
+    intersections), the number of times the geometry has been modified, and
+    the options used for the intersection. The cache holds a reference to the
+    input geometry so its identity cannot be reused while the result is
+    stored.
+
+    :param int maxsize: Maximum number of results to keep. The least
+        recently used result is removed when this is exceeded.
+
+    .. note::
+
+        Geometry modified by its own methods (e.g.,
+        :meth:`afem.geometry.entities.Geometry.translate`) is not found in
+        the cache. If the underlying OpenCASCADE object is modified directly
+        then use :meth:`clear`.
+    """
+
+    def __init__(self, maxsize=128):
+        self._maxsize = max(int(maxsize), 1)
+        self._data = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    @property
+    def maxsize(self):
+        """
+        :return: Maximum number of results to keep.
+        :rtype: int
+        """
+        return self._maxsize
+
+    @property
+    def hits(self):
+        """
+        :return: Number of times a result was found in the cache.
+        :rtype: int
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        :return: Number of times a result was not found in the cache.
+        :rtype: int
+        """
+        return self._misses
+
+    @property
+    def hit_rate(self):
+        """
+        :return: Ratio of hits to total lookups. Zero if there have been
+            no lookups.
+        :rtype: float
+        """
+        n = self._hits + self._misses
+        if n == 0:
+            return 0.
+        return self._hits / n
+
+    @staticmethod
+    def key(*args):
+        """
+        Build a cache key. Geometry is replaced by its underlying OpenCASCADE
+        object and its modification count so it is keyed on identity and
+        state. Other arguments (e.g., shapes, tolerances, and flags) must be
+        hashable.
+
+        :param args: The intersection inputs and options.
+
+        :return: The key.
+        :rtype: tuple
+        """
+        return tuple((a.object, a._nmod) if isinstance(a, Geometry) else a
+                     for a in args)
+
+    def get(self, key):
+        """
+        Get a result and mark it as most recently used.
+
+        :param tuple key: The key.
+
+        :return: The result or *None* if not available.
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self._misses += 1
+            return None
+        self._data.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Store a result and remove the least recently used one if the cache
+        is full.
+
+        :param tuple key: The key.
+        :param value: The result.
+
+        :return: None.
+        """
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all results and reset the statistics.
+
+        :return: None.
+        """
+        self._data.clear()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def enable(maxsize=128):
+        """
+        Enable a global cache used by intersection tools when one is not
+        provided.
+
+        :param int maxsize: Maximum number of results to keep.
+
+        :return: The global cache.
+        :rtype: afem.geometry.intersect.IntersectionCache
+        """
+        global _default_cache
+        _default_cache = IntersectionCache(maxsize)
+        return _default_cache
+
+    @staticmethod
+    def disable():
+        """
+        Disable the global cache.
+
+        :return: None.
+        """
+        global _default_cache
+        _default_cache = None
+
+    @staticmethod
+    def get_default():
+        """
+        :return: The global cache if enabled, otherwise *None*.
+        :rtype: afem.geometry.intersect.IntersectionCache or None
+        """
+        return _default_cache
+
 
 class CurveIntersector(object):
     """
@@ -46,7 +217,7 @@ class CurveIntersector(object):
         self._c2 = c2
         self._npts = 0
         self._results = []
-        self._kdt = None
+        self._index = None
 
     def _set_results(self, npts, results):
         """
@@ -54,12 +225,9 @@ class CurveIntersector(object):
         """
         if npts > 0:
             self._npts = npts
-            # Replace ndarrays with point instances and build kd-tree.
-            data = zeros((npts, 3), dtype=float64)
-            for i in range(npts):
-                data[i] = results[i][1]
+            # Build point index of results.
             self._results = results
-            self._kdt = KDTree(data)
+            self._index = PointIndex([row[1] for row in results])
 
     @property
     def npts(self):
@@ -128,8 +296,8 @@ class CurveIntersector(object):
         if not self.success:
             return None, None
         p0 = CheckGeom.to_point(p0)
-        d, i = self._kdt.query(p0.xyz, 1, 0., 2, distance_upper_bound)
-        return d, i
+        d, i = self._index.nearest_many([p0.xyz], distance_upper_bound)
+        return d[0], i[0]
 
 
 class IntersectCurveCurve(CurveIntersector):
@@ -215,6 +383,122 @@ class IntersectCurveSurface(CurveIntersector):
         return [results[0][1:] for results in self._results]
 
 
+class IntersectCurvesSurface(object):
+    """
+    Intersect many curves with a single surface. Curves whose bounding box
+    does not overlap the bounding box of the surface are skipped. The
+    remaining curves are intersected using ``GeomAPI_IntCS`` and the work can
+    be distributed over worker processes. Results are stored in the same
+    order as the input curves.
+
+    :param collections.Sequence(afem.geometry.entities.Curve) crvs: The
+        curves.
+    :param afem.geometry.entities.Surface srf: The surface.
+    :param float tol: Tolerance used to enlarge the bounding boxes.
+    :param int nprocs: Number of worker processes. The candidate curves and
+        the surface are pickled and sent to the workers in chunks. If *None*
+        the intersections are performed in the current process.
+    """
+
+    def __init__(self, crvs, srf, tol=1.0e-7, nprocs=None):
+        crvs = list(crvs)
+        occ_srf = srf.object
+
+        # Bounding box filter
+        srf_box = Bnd_Box()
+        BndLib_AddSurface.Add_(GeomAdaptor_Surface(occ_srf), tol, srf_box)
+        is_candidate = []
+        for c in crvs:
+            crv_box = Bnd_Box()
+            BndLib_Add3dCurve.Add_(GeomAdaptor_Curve(c.object), tol, crv_box)
+            is_candidate.append(not srf_box.IsOut(crv_box))
+
+        # Intersect the candidates
+        indices = [i for i, flag in enumerate(is_candidate) if flag]
+        candidates = [crvs[i] for i in indices]
+        results = map_in_processes(_intersect_curves_surface, candidates,
+                                   nprocs, (srf,))
+
+        # Gather results in input order
+        empty_result = (zeros(0, dtype=float64), zeros((0, 2), dtype=float64),
+                        zeros((0, 3), dtype=float64))
+        self._results = [empty_result] * len(crvs)
+        for i, result in zip(indices, results):
+            self._results[i] = result
+        self._is_candidate = array(is_candidate, dtype=bool)
+
+    @property
+    def ncrvs(self):
+        """
+        :return: Number of curves.
+        :rtype: int
+        """
+        return len(self._results)
+
+    @property
+    def npts(self):
+        """
+        :return: Number of intersection points for each curve.
+        :rtype: list(int)
+        """
+        return [r[0].size for r in self._results]
+
+    @property
+    def success(self):
+        """
+        :return: *True* if at least one curve intersects the surface, *False*
+            if not.
+        :rtype: bool
+        """
+        return sum(self.npts) > 0
+
+    @property
+    def is_candidate(self):
+        """
+        :return: Flags indicating which curves passed the bounding box filter
+            and were intersected.
+        :rtype: numpy.ndarray
+        """
+        return self._is_candidate
+
+    @property
+    def curve_parameters(self):
+        """
+        :return: Intersection parameters on each curve.
+        :rtype: list(numpy.ndarray)
+        """
+        return [r[0] for r in self._results]
+
+    @property
+    def surface_parameters(self):
+        """
+        :return: Intersection parameters on the surface for each curve as
+            arrays of shape (N, 2).
+        :rtype: list(numpy.ndarray)
+        """
+        return [r[1] for r in self._results]
+
+    @property
+    def points(self):
+        """
+        :return: Intersection points for each curve as arrays of shape
+            (N, 3).
+        :rtype: list(numpy.ndarray)
+        """
+        return [r[2] for r in self._results]
+
+    def results(self, indx):
+        """
+        Get the results for a curve.
+
+        :param int indx: Index of the curve in the input list.
+
+        :return: The curve parameters, surface parameters, and points.
+        :rtype: tuple(numpy.ndarray)
+        """
+        return self._results[indx]
+
+
 class SurfaceIntersector(object):
     """
     Base class for handling surface intersection methods and results.
@@ -279,11 +563,27 @@ class IntersectSurfaceSurface(SurfaceIntersector):
     :param afem.geometry.entities.Surface srf2: The second surface.
     :param float itol: Intersection tolerance.
     :param bool approx: Approximate intersection curves.
+    :param cache: Cache for the results. If not provided the global cache
+        is used if enabled. Cached curves are copied so they can be modified.
+    :type cache: afem.geometry.intersect.IntersectionCache or None
     """
 
-    def __init__(self, srf1, srf2, itol=1.0e-7, approx=True):
+    def __init__(self, srf1, srf2, itol=1.0e-7, approx=True, cache=None):
         super(IntersectSurfaceSurface, self).__init__()
 
+        if cache is None:
+            cache = IntersectionCache.get_default()
+
+        key = None
+        if cache is not None:
+            key = cache.key('ssi', srf1, srf2, itol, approx)
+            result = cache.get(key)
+            if result is not None:
+                crvs, tol3d = result
+                self._crvs = [c.copy() for c in crvs]
+                self._tol3d = tol3d
+                return
+
         # OCC intersect
         ssi = GeomInt_IntSS(srf1.object, srf2.object, itol,
                             approx, False, False)
@@ -298,6 +598,9 @@ class IntersectSurfaceSurface(SurfaceIntersector):
         self._crvs = crvs
         self._tol3d = ssi.TolReached3d()
 
+        if cache is not None:
+            cache.put(key, ([c.copy() for c in crvs], self._tol3d))
+
     @property
     def tol3d(self):
         """
@@ -307,6 +610,35 @@ class IntersectSurfaceSurface(SurfaceIntersector):
         return self._tol3d
 
 
+def _intersect_curves_surface(crvs, srf):
+    """
+    Intersect each curve with the surface.
+    """
+    occ_srf = srf.object
+    return [_intersect_curve_surface(c.object, occ_srf) for c in crvs]
+
+
+def _intersect_curve_surface(occ_crv, occ_srf):
+    """
+    Intersect a curve and a surface and return the results as arrays.
+    """
+    csi = GeomAPI_IntCS(occ_crv, occ_srf)
+    n = csi.NbPoints()
+    prms_c = zeros(n, dtype=float64)
+    prms_s = zeros((n, 2), dtype=float64)
+    pnts = zeros((n, 3), dtype=float64)
+    pc, ps = gp_Pnt(), gp_Pnt()
+    for i in range(n):
+        u, v, t = csi.Parameters(i + 1, 0., 0., 0.)
+        occ_crv.D0(t, pc)
+        occ_srf.D0(u, v, ps)
+        prms_c[i] = t
+        prms_s[i] = u, v
+        pnts[i] = (0.5 * (pc.X() + ps.X()), 0.5 * (pc.Y() + ps.Y()),
+                   0.5 * (pc.Z() + ps.Z()))
+    return prms_c, prms_s, pnts
+
+
 def _distance_point_to_curve(point, curve):
     """
     Find the minimum distance between a point and a curve.
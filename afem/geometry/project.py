@@ -20,15 +20,22 @@
 from math import sqrt
 
 from OCCT.Extrema import (Extrema_ExtPC, Extrema_ExtCC, Extrema_POnCurv,
-                          Extrema_ExtPS, Extrema_ExtCS, Extrema_POnSurf)
+                          Extrema_ExtPS, Extrema_ExtCS, Extrema_POnSurf,
+                          Extrema_GenLocateExtPS, Extrema_LocateExtPC)
 from OCCT.GeomProjLib import GeomProjLib
+from OCCT.Precision import Precision
+from OCCT.gp import gp_Pnt
+from numpy import array, float64, full, isnan, linspace, nan, repeat, tile
+from numpy.linalg import norm
 
 from afem.adaptor.entities import AdaptorCurve, AdaptorSurface
 from afem.geometry.check import CheckGeom
-from afem.geometry.entities import Curve, Line
+from afem.geometry.distance import PointIndex
+from afem.geometry.entities import Curve, Line, Surface
 
 __all__ = ["PointProjector", "ProjectPointToCurve",
-           "ProjectPointToSurface", "CurveProjector", "ProjectCurveToPlane",
+           "ProjectPointToSurface", "PointsProjector", "ProjectPointsToCurve",
+           "ProjectPointsToSurface", "CurveProjector", "ProjectCurveToPlane",
            "ProjectCurveToSurface"]
 
 
@@ -251,6 +258,268 @@ class ProjectPointToSurface(PointProjector):
             pnt.set_xyz(self.nearest_point)
 
 
+class PointsProjector(object):
+    """
+    Base class for batch point projections.
+    """
+
+    def __init__(self, pnts):
+        xyz = array(pnts, dtype=float64).reshape(-1, 3)
+        npts = xyz.shape[0]
+        self._xyz = xyz
+        self._pnts = full((npts, 3), nan, dtype=float64)
+        self._dist = full(npts, nan, dtype=float64)
+        self._prms = None
+
+    @property
+    def npts(self):
+        """
+        :return: Number of points that were projected.
+        :rtype: int
+        """
+        return self._xyz.shape[0]
+
+    @property
+    def status(self):
+        """
+        :return: Array of flags indicating if each point was projected.
+        :rtype: numpy.ndarray
+        """
+        return ~isnan(self._dist)
+
+    @property
+    def success(self):
+        """
+        :return: *True* if all points were projected, *False* if not.
+        :rtype: bool
+        """
+        return bool(self.status.all())
+
+    @property
+    def points(self):
+        """
+        :return: Projected points as an array of shape (N, 3). Rows are *nan*
+            for points that could not be projected.
+        :rtype: numpy.ndarray
+        """
+        return self._pnts
+
+    @property
+    def parameters(self):
+        """
+        :return: Parameters of projected points. Values are *nan* for points
+            that could not be projected.
+        :rtype: numpy.ndarray
+        """
+        return self._prms
+
+    @property
+    def distances(self):
+        """
+        :return: Distance between each original point and its projection.
+            Values are *nan* for points that could not be projected.
+        :rtype: numpy.ndarray
+        """
+        return self._dist
+
+    def update_points(self, pnts):
+        """
+        Move the points to their projected location. Points that could not
+        be projected are not modified.
+
+        :param list(afem.geometry.entities.Point) pnts: The points. These
+            should be the same points that were projected.
+
+        :return: List of status for each point.
+        :rtype: list(bool)
+        """
+        status = self.status.tolist()
+        for p, xyz, flag in zip(pnts, self._pnts, status):
+            if flag:
+                p.set_xyz(xyz)
+        return status
+
+
+class ProjectPointsToCurve(PointsProjector):
+    """
+    Project many points to a curve. A single local extrema tool is
+    initialized for the curve and each solution is seeded by either the
+    previous result or the nearest sample of a coarse grid along the curve,
+    whichever is closer. The global extrema tool is only used if the local
+    solution fails or is not better than the seed.
+
+    :param pnts: Points to project.
+    :type pnts: collections.Sequence(point_like) or numpy.ndarray
+    :param crv: Curve to project to.
+    :type crv: afem.adaptor.entities.AdaptorCurve or
+        afem.geometry.entities.Curve or afem.topology.entities.Edge or
+        afem.topology.entities.Wire
+    :param int nsamples: Number of samples used for the coarse grid. If
+        *crv* is a curve then its cached tessellation is used instead.
+    :param bool warm_start: Option to seed each solution with the previous
+        result. This helps when consecutive points are close to each other.
+    :param float tol: Tolerance.
+    """
+
+    def __init__(self, pnts, crv, nsamples=50, warm_start=True, tol=1.0e-10):
+        super(ProjectPointsToCurve, self).__init__(pnts)
+
+        adp_crv = AdaptorCurve.to_adaptor(crv)
+        occ_crv = adp_crv.object
+        u1, u2 = adp_crv.u1, adp_crv.u2
+        xyz = self._xyz
+        self._prms = full(self.npts, nan, dtype=float64)
+
+        # Extrema tools are initialized once
+        ext = Extrema_ExtPC()
+        ext.Initialize(occ_crv, u1, u2, tol)
+        loc = Extrema_LocateExtPC()
+        loc.Initialize(occ_crv, u1, u2, tol)
+
+        # Coarse grid for seeds
+        bounded = not (Precision.IsInfinite_(u1) or
+                       Precision.IsInfinite_(u2))
+        if bounded:
+            if isinstance(crv, Curve):
+                tess = crv.tessellate()
+                su, spnts = tess.parameters, tess.points
+            else:
+                su = linspace(u1, u2, max(int(nsamples), 2))
+                spnts = adp_crv.eval_many(su)
+            index = PointIndex(spnts)
+            dseed, iseed = index.nearest_many(xyz)
+
+        p, pc = gp_Pnt(), gp_Pnt()
+        uprev, pprev = None, None
+        for i, (x, y, z) in enumerate(xyz.tolist()):
+            p.SetCoord(x, y, z)
+            ui = None
+
+            # Local solution from the best seed
+            if bounded:
+                u0, d0 = su[iseed[i]], dseed[i]
+                if warm_start and uprev is not None:
+                    dprev = norm(xyz[i] - pprev)
+                    if dprev < d0:
+                        u0, d0 = uprev, dprev
+                loc.Perform(p, u0)
+                if loc.IsDone() and sqrt(loc.SquareDistance()) <= d0 + tol:
+                    ui = loc.Point().Parameter()
+
+            # Global solution
+            if ui is None:
+                ext.Perform(p)
+                if ext.IsDone() and ext.NbExt() > 0:
+                    dmin = None
+                    for j in range(1, ext.NbExt() + 1):
+                        dj = ext.SquareDistance(j)
+                        if dmin is None or dj < dmin:
+                            dmin = dj
+                            ui = ext.Point(j).Parameter()
+
+            if ui is None:
+                continue
+
+            occ_crv.D0(ui, pc)
+            self._prms[i] = ui
+            self._pnts[i] = pc.X(), pc.Y(), pc.Z()
+            self._dist[i] = p.Distance(pc)
+            uprev, pprev = ui, self._pnts[i]
+
+
+class ProjectPointsToSurface(PointsProjector):
+    """
+    Project many points to a surface. A single local extrema tool is
+    initialized for the surface and each solution is seeded by either the
+    previous result or the nearest sample of a coarse grid on the surface,
+    whichever is closer. The global extrema tool is only used if the local
+    solution fails or is not better than the seed.
+
+    :param pnts: Points to project.
+    :type pnts: collections.Sequence(point_like) or numpy.ndarray
+    :param srf: Surface to project to.
+    :type srf: afem.adaptor.entities.AdaptorSurface or
+        afem.geometry.entities.Surface or afem.topology.entities.Face
+    :param int nsamples: Number of samples in each direction used for the
+        coarse grid. If *srf* is a surface then its cached tessellation is
+        used instead.
+    :param bool warm_start: Option to seed each solution with the previous
+        result. This helps when consecutive points are close to each other.
+    :param float tol: Tolerance.
+
+    .. note::
+
+        The parameters are returned as an array of shape (N, 2).
+    """
+
+    def __init__(self, pnts, srf, nsamples=20, warm_start=True, tol=1.0e-7):
+        super(ProjectPointsToSurface, self).__init__(pnts)
+
+        adp_srf = AdaptorSurface.to_adaptor(srf)
+        occ_srf = adp_srf.object
+        u1, u2 = adp_srf.u1, adp_srf.u2
+        v1, v2 = adp_srf.v1, adp_srf.v2
+        xyz = self._xyz
+        self._prms = full((self.npts, 2), nan, dtype=float64)
+
+        # Extrema tools are initialized once
+        ext = Extrema_ExtPS()
+        ext.Initialize(occ_srf, u1, u2, v1, v2, tol, tol)
+        loc = Extrema_GenLocateExtPS(occ_srf, tol, tol)
+
+        # Coarse grid for seeds
+        bounded = not any(Precision.IsInfinite_(x) for x in [u1, u2, v1, v2])
+        if bounded:
+            if isinstance(srf, Surface):
+                tess = srf.tessellate()
+                su, sv = tess.parameters.T
+                spnts = tess.points
+            else:
+                nsamples = max(int(nsamples), 2)
+                su = repeat(linspace(u1, u2, nsamples), nsamples)
+                sv = tile(linspace(v1, v2, nsamples), nsamples)
+                spnts = adp_srf.eval_many(su, sv)
+            index = PointIndex(spnts)
+            dseed, iseed = index.nearest_many(xyz)
+
+        p, ps = gp_Pnt(), gp_Pnt()
+        uvprev, pprev = None, None
+        for i, (x, y, z) in enumerate(xyz.tolist()):
+            p.SetCoord(x, y, z)
+            uvi = None
+
+            # Local solution from the best seed
+            if bounded:
+                u0, v0, d0 = su[iseed[i]], sv[iseed[i]], dseed[i]
+                if warm_start and uvprev is not None:
+                    dprev = norm(xyz[i] - pprev)
+                    if dprev < d0:
+                        (u0, v0), d0 = uvprev, dprev
+                loc.Perform(p, u0, v0)
+                if loc.IsDone() and sqrt(loc.SquareDistance()) <= d0 + tol:
+                    uvi = loc.Point().Parameter(0., 0.)
+
+            # Global solution
+            if uvi is None:
+                ext.Perform(p)
+                if ext.IsDone() and ext.NbExt() > 0:
+                    dmin = None
+                    for j in range(1, ext.NbExt() + 1):
+                        dj = ext.SquareDistance(j)
+                        if dmin is None or dj < dmin:
+                            dmin = dj
+                            uvi = ext.Point(j).Parameter(0., 0.)
+
+            if uvi is None:
+                continue
+
+            occ_srf.D0(uvi[0], uvi[1], ps)
+            self._prms[i] = uvi
+            self._pnts[i] = ps.X(), ps.Y(), ps.Z()
+            self._dist[i] = p.Distance(ps)
+            uvprev, pprev = uvi, self._pnts[i]
+
+
 class CurveProjector(object):
     """
     Base class for curve projections.
@@ -0,0 +1,346 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018 Laughlin Research, LLC
+# Copyright (C) 2019-2020 Trevor Laughlin
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from OCCT.Bnd import Bnd_Box
+from OCCT.BndLib import BndLib_Add3dCurve, BndLib_AddSurface
+from OCCT.GCPnts import GCPnts_TangentialDeflection
+from OCCT.GeomAdaptor import GeomAdaptor_Curve, GeomAdaptor_Surface
+from OCCT.Precision import Precision
+from numpy import (arange, column_stack, concatenate, empty, float64,
+                   int32, linspace, meshgrid, unique)
+from numpy.linalg import norm
+
+from afem.config import logger
+from afem.geometry.entities import NurbsSurface
+
+__all__ = ["TessellateCurve", "TessellateSurface"]
+
+# Default deflection as a fraction of the bounding box diagonal
+_REL_DEFLECTION = 1.0e-3
+
+
+class TessellateCurve(object):
+    """
+    Tessellate a curve into a polyline using ``GCPnts_TangentialDeflection``.
+    Usually this is not called directly but through
+    :meth:`afem.geometry.entities.Curve.tessellate` so the result is cached on
+    the curve.
+
+    :param afem.geometry.entities.Curve crv: The curve.
+    :param float deflection: Maximum distance between the curve and the
+        polyline. If *None* then a fraction of the bounding box diagonal is
+        used.
+    :param float angular_deflection: Maximum angle in radians between the
+        tangents at consecutive points.
+
+    :raise ValueError: If the curve is not bounded.
+    :raise RuntimeError: If the algorithm fails.
+    """
+
+    def __init__(self, crv, deflection=None, angular_deflection=0.1):
+        adp_crv = GeomAdaptor_Curve(crv.object)
+        u1, u2 = adp_crv.FirstParameter(), adp_crv.LastParameter()
+        if Precision.IsInfinite_(u1) or Precision.IsInfinite_(u2):
+            raise ValueError('Cannot tessellate an unbounded curve.')
+
+        if deflection is None:
+            box = Bnd_Box()
+            BndLib_Add3dCurve.Add_(adp_crv, 0., box)
+            deflection = _REL_DEFLECTION * _diagonal(box)
+        deflection = max(deflection, Precision.Confusion_())
+
+        tool = GCPnts_TangentialDeflection(adp_crv, angular_deflection,
+                                           deflection, 2)
+        npts = tool.NbPoints()
+        if npts < 2:
+            raise RuntimeError('Failed to tessellate the curve.')
+
+        prms = empty(npts, dtype=float64)
+        pnts = empty((npts, 3), dtype=float64)
+        for i in range(1, npts + 1):
+            p = tool.Value(i)
+            prms[i - 1] = tool.Parameter(i)
+            pnts[i - 1] = p.X(), p.Y(), p.Z()
+
+        self._deflection = deflection
+        self._prms = prms
+        self._pnts = pnts
+
+    @property
+    def deflection(self):
+        """
+        :return: The deflection used for the tessellation.
+        :rtype: float
+        """
+        return self._deflection
+
+    @property
+    def npts(self):
+        """
+        :return: Number of points.
+        :rtype: int
+        """
+        return self._prms.size
+
+    @property
+    def parameters(self):
+        """
+        :return: Curve parameters of the points.
+        :rtype: numpy.ndarray
+        """
+        return self._prms
+
+    @property
+    def points(self):
+        """
+        :return: Polyline points as an array of shape (N, 3).
+        :rtype: numpy.ndarray
+        """
+        return self._pnts
+
+    @property
+    def bounding_box(self):
+        """
+        :return: Bounding box of the points enlarged by the deflection.
+        :rtype: OCCT.Bnd.Bnd_Box
+        """
+        return _points_box(self._pnts, self._deflection)
+
+
+class TessellateSurface(object):
+    """
+    Tessellate a surface into a triangulated grid of parameters. The grid
+    starts from a few samples and the knots of NURBS surfaces, and spans are
+    bisected until the distance between the surface and the grid at the span
+    midpoints and cell centers is within the deflection. A warning is logged
+    if this is not reached within the maximum number of iterations. Usually
+    this is not called directly but through
+    :meth:`afem.geometry.entities.Surface.tessellate` so the result is cached
+    on the surface.
+
+    :param afem.geometry.entities.Surface srf: The surface.
+    :param float deflection: Maximum distance between the surface and the
+        grid. If *None* then a fraction of the bounding box diagonal is used.
+    :param int max_iter: Maximum number of refinement iterations.
+
+    :raise ValueError: If the surface is not bounded.
+    """
+
+    def __init__(self, srf, deflection=None, max_iter=8):
+        u1, u2, v1, v2 = srf.u1, srf.u2, srf.v1, srf.v2
+        if any(Precision.IsInfinite_(x) for x in [u1, u2, v1, v2]):
+            raise ValueError('Cannot tessellate an unbounded surface.')
+
+        if deflection is None:
+            box = Bnd_Box()
+            BndLib_AddSurface.Add_(GeomAdaptor_Surface(srf.object), 0., box)
+            deflection = _REL_DEFLECTION * _diagonal(box)
+        deflection = max(deflection, Precision.Confusion_())
+
+        # Initial grid
+        u = linspace(u1, u2, 5)
+        v = linspace(v1, v2, 5)
+        if isinstance(srf, NurbsSurface):
+            uk, vk = srf.uknots, srf.vknots
+            u = unique(concatenate([u, uk[(uk > u1) & (uk < u2)]]))
+            v = unique(concatenate([v, vk[(vk > v1) & (vk < v2)]]))
+
+        # Bisect spans where the span midpoints or cell centers deviate from
+        # the grid
+        pnts = srf.eval_grid(u, v)
+        is_converged = False
+        for i in range(max_iter + 1):
+            du, dv, dc = _grid_deviation(srf, u, v, pnts)
+            csplit = dc > deflection
+            usplit = (du > deflection) | csplit.any(axis=1)
+            vsplit = (dv > deflection) | csplit.any(axis=0)
+            if not usplit.any() and not vsplit.any():
+                is_converged = True
+                break
+            if i == max_iter:
+                break
+            um = 0.5 * (u[:-1] + u[1:])
+            vm = 0.5 * (v[:-1] + v[1:])
+            u = unique(concatenate([u, um[usplit]]))
+            v = unique(concatenate([v, vm[vsplit]]))
+            pnts = srf.eval_grid(u, v)
+
+        if not is_converged:
+            msg = ('Surface tessellation did not reach the deflection {} '
+                   'after {} iterations.'.format(deflection, max_iter))
+            logger.warning(msg)
+
+        self._deflection = deflection
+        self._max_dev = max(du.max(), dv.max(), dc.max())
+        self._is_converged = is_converged
+        self._u = u
+        self._v = v
+        self._pnts = pnts.reshape(-1, 3)
+        self._tris = _grid_triangles(u.size, v.size)
+
+    @property
+    def deflection(self):
+        """
+        :return: The deflection used for the tessellation.
+        :rtype: float
+        """
+        return self._deflection
+
+    @property
+    def npts(self):
+        """
+        :return: Number of points.
+        :rtype: int
+        """
+        return self._pnts.shape[0]
+
+    @property
+    def ntris(self):
+        """
+        :return: Number of triangles.
+        :rtype: int
+        """
+        return self._tris.shape[0]
+
+    @property
+    def uparameters(self):
+        """
+        :return: Grid parameters in the u-direction.
+        :rtype: numpy.ndarray
+        """
+        return self._u
+
+    @property
+    def vparameters(self):
+        """
+        :return: Grid parameters in the v-direction.
+        :rtype: numpy.ndarray
+        """
+        return self._v
+
+    @property
+    def parameters(self):
+        """
+        :return: Surface parameters of the points as an array of shape
+            (N, 2).
+        :rtype: numpy.ndarray
+        """
+        uu, vv = meshgrid(self._u, self._v, indexing='ij')
+        return column_stack([uu.ravel(), vv.ravel()])
+
+    @property
+    def points(self):
+        """
+        :return: Grid points as an array of shape (N, 3). The points are
+            ordered with the v-direction varying fastest.
+        :rtype: numpy.ndarray
+        """
+        return self._pnts
+
+    @property
+    def triangles(self):
+        """
+        :return: Indices of the triangle vertices as an array of shape
+            (M, 3).
+        :rtype: numpy.ndarray
+        """
+        return self._tris
+
+    @property
+    def is_converged(self):
+        """
+        :return: *True* if the deviation at the span midpoints and cell
+            centers is within the deflection, *False* if the maximum number
+            of iterations was reached first.
+        :rtype: bool
+        """
+        return self._is_converged
+
+    @property
+    def max_deviation(self):
+        """
+        :return: The largest distance between the surface and the grid
+            measured at the span midpoints and cell centers.
+        :rtype: float
+        """
+        return self._max_dev
+
+    @property
+    def bounding_box(self):
+        """
+        :return: Bounding box of the points enlarged by the larger of the
+            deflection and the measured deviation. This is an estimate. Use
+            ``BndLib`` when a box that is guaranteed to contain the surface
+            is needed.
+        :rtype: OCCT.Bnd.Bnd_Box
+        """
+        return _points_box(self._pnts, max(self._deflection, self._max_dev))
+
+
+def _diagonal(box):
+    """
+    Length of the bounding box diagonal.
+    """
+    if box.IsVoid():
+        return 0.
+    return box.CornerMin().Distance(box.CornerMax())
+
+
+def _grid_deviation(srf, u, v, pnts):
+    """
+    Distance between the surface and the grid at the midpoints of the spans
+    in each direction and at the cell centers.
+    """
+    um = 0.5 * (u[:-1] + u[1:])
+    vm = 0.5 * (v[:-1] + v[1:])
+    du = norm(srf.eval_grid(um, v) - 0.5 * (pnts[:-1] + pnts[1:]),
+              axis=2).max(axis=1)
+    dv = norm(srf.eval_grid(u, vm) - 0.5 * (pnts[:, :-1] + pnts[:, 1:]),
+              axis=2).max(axis=0)
+    avg = 0.25 * (pnts[:-1, :-1] + pnts[1:, :-1] + pnts[:-1, 1:] +
+                  pnts[1:, 1:])
+    dc = norm(srf.eval_grid(um, vm) - avg, axis=2)
+    return du, dv, dc
+
+
+def _points_box(pnts, gap):
+    """
+    Bounding box of an array of points enlarged by the gap.
+    """
+    box = Bnd_Box()
+    xmin, ymin, zmin = pnts.min(axis=0).tolist()
+    xmax, ymax, zmax = pnts.max(axis=0).tolist()
+    box.Update(xmin, ymin, zmin, xmax, ymax, zmax)
+    box.Enlarge(gap)
+    return box
+
+
+def _grid_triangles(nu, nv):
+    """
+    Triangles of a structured grid with two triangles per cell.
+    """
+    i, j = meshgrid(arange(nu - 1), arange(nv - 1), indexing='ij')
+    a = (i * nv + j).ravel()
+    b = a + nv
+    c = b + 1
+    d = a + 1
+    tris = empty((2 * a.size, 3), dtype=int32)
+    tris[0::2] = column_stack([a, b, c])
+    tris[1::2] = column_stack([a, c, d])
+    return tris
@@ -19,9 +19,16 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
 from __future__ import division, division
 
+from math import factorial
+
 from OCCT.BSplCLib import BSplCLib
-from numpy import array, diff, float64, floor, hstack, sqrt, sum, zeros
+from numpy import (arange, array, asarray, ceil, clip, concatenate, cumsum,
+                   diff, einsum, empty, float64, floor, hstack, linspace,
+                   repeat, searchsorted, sqrt, tensordot, where, zeros)
 from numpy.linalg import norm
+from scipy.linalg import solve_banded
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import spsolve
 
 
 def local_to_global_param(a, b, *args):
@@ -71,13 +78,8 @@ def homogenize_array1d(cp, w):
 
 
 def homogenize_array2d(cp, w):
-    n, m, _ = cp.shape
-    cpw = zeros((n, m, 4), dtype=float)
-    for i in range(n):
-        for j in range(m):
-            cpw[i, j, :3] = cp[i, j] * w[i, j]
-            cpw[i, j, 3] = w[i, j]
-    return cpw
+    _w = w[:, :, None]
+    return concatenate((cp * _w, _w), axis=2)
 
 
 def dehomogenize_array1d(cpw):
@@ -87,12 +89,8 @@ def dehomogenize_array1d(cpw):
 
 
 def dehomogenize_array2d(cpw):
-    cp = cpw[:, :, :3]
     w = cpw[:, :, -1]
-    n, m = cp.shape[0:2]
-    for i in range(n):
-        for j in range(m):
-            cp[i, j] /= w[i, j]
+    cp = cpw[:, :, :-1] / w[:, :, None]
     return cp, w
 
 
@@ -118,61 +116,55 @@ def uniform_parameters(n, a=0., b=1.):
     :return: Parameters between [a, b].
     :rtype: numpy.ndarray
     """
-    u = zeros(n, dtype=float64)
-    u[0] = a
-    u[-1] = b
-    for i in range(1, n - 1):
-        u[i] = a + i * (b - a) / n
-    return u
+    return linspace(a, b, n, dtype=float64)
 
 
 def chord_parameters(pnts, a=0., b=1.):
     """
     Generate parameters using chord length method.
 
-    :param list(point_like) pnts: List of ordered points.
+    :param pnts: Ordered points.
+    :type pnts: collections.Sequence(point_like) or numpy.ndarray
     :param float a: Lower bound.
     :param float b: Upper bound.
 
     :return: Parameters between [a, b].
     :rtype: numpy.ndarray
     """
-    pnts = array(pnts, dtype=float64)
-    n = len(pnts)
-    dtotal = sum(norm(diff(pnts, axis=0), axis=1))
-    u = zeros(n, dtype=float64)
-    u[0] = a
-    u[-1] = b
-    if dtotal <= 0.:
-        return u
-    for i in range(1, n - 1):
-        di = norm(pnts[i] - pnts[i - 1]) / dtotal
-        u[i] = u[i - 1] + di
-    return u
+    pnts = asarray(pnts, dtype=float64)
+    d = norm(diff(pnts, axis=0), axis=1)
+    return _cumulative_parameters(d, a, b)
 
 
 def centripetal_parameters(pnts, a=0., b=1.):
     """
     Generate parameters using centripetal method.
 
-    :param list[(point_like) pnts: List of ordered points.
+    :param pnts: Ordered points.
+    :type pnts: collections.Sequence(point_like) or numpy.ndarray
     :param float a: Lower domain.
     :param float b: Upper domain.
 
     :return: Parameters between [a, b].
     :rtype: numpy.ndarray
     """
-    pnts = array(pnts, dtype=float64)
-    n = len(pnts)
-    dtotal = sum(norm(diff(pnts, axis=0), axis=1))
-    u = zeros(n, dtype=float64)
+    pnts = asarray(pnts, dtype=float64)
+    d = sqrt(norm(diff(pnts, axis=0), axis=1))
+    return _cumulative_parameters(d, a, b)
+
+
+def _cumulative_parameters(d, a, b):
+    """
+    Generate parameters between [a, b] proportional to the cumulative sum of
+    the distances between points.
+    """
+    u = zeros(d.size + 1, dtype=float64)
     u[0] = a
     u[-1] = b
+    dtotal = d.sum()
     if dtotal <= 0.:
         return u
-    for i in range(1, n - 1):
-        di = sqrt((norm(pnts[i] - pnts[i - 1]) / dtotal))
-        u[i] = u[i - 1] + di
+    u[1:-1] = a + (b - a) * cumsum(d[:-1]) / dtotal
     return u
 
 
@@ -244,3 +236,508 @@ def basis_funs(i, u, p, uk):
             saved = left[j - r] * temp
         bf[j] = saved
     return array(bf, dtype=float)
+
+
+def find_spans(n, p, u, uk):
+    """
+    Determine the knot span indices for an array of parameters. This is the
+    vectorized version of :func:`find_span`.
+
+    :param int n: Number of control points - 1.
+    :param int p: Degree.
+    :param array_like u: Parameters.
+    :param ndarray uk: Knot vector.
+
+    :return: Knot spans.
+    :rtype: ndarray
+    """
+    u = asarray(u, dtype=float64)
+    spans = searchsorted(uk, u, side='right') - 1
+    return clip(spans, p, n)
+
+
+def locate_knots(knots, u, tol=1.0e-9):
+    """
+    Locate parameters in a sorted array of knots. This follows the
+    conventions of ``Geom_BSplineSurface::LocateU`` using a binary search
+    for all the parameters at once.
+
+    :param ndarray knots: Knot values in increasing order.
+    :param array_like u: Parameters.
+    :param float tol: Parametric tolerance. Used to determine if a parameter
+        is at an existing knot.
+
+    :return: 1-based knot indices (i1, i2) such that knots(i1) <= u <=
+        knots(i2). If a parameter is at a knot then i1 = i2. If a parameter
+        is before the first knot then (0, 1) and if it is after the last
+        knot then (n, n + 1).
+    :rtype: tuple(ndarray)
+    """
+    u = asarray(u, dtype=float64)
+    n = knots.size
+    tol = abs(tol)
+
+    # Last knot within tolerance of or below each parameter
+    i1 = clip(searchsorted(knots, u + tol, side='right'), 1, n)
+    i2 = where(abs(knots[i1 - 1] - u) <= tol, i1, i1 + 1)
+
+    # End conditions
+    at_first = abs(u - knots[0]) <= tol
+    at_last = abs(u - knots[-1]) <= tol
+    before = u < knots[0] - tol
+    after = u > knots[-1] + tol
+    i1 = where(at_first, 1, where(at_last, n, where(before, 0, i1)))
+    i2 = where(at_first, 1, where(at_last, n, where(before, 1,
+                                                    where(after, n + 1, i2))))
+    return i1, i2
+
+
+def knot_refinement(knots, lengths, max_length):
+    """
+    Determine the knots to insert so that the length of each knot span does
+    not exceed the maximum length. Each span is split uniformly.
+
+    :param ndarray knots: Knot values in increasing order.
+    :param array_like lengths: Length of each knot span.
+    :param float max_length: Maximum span length.
+
+    :return: Knots to insert.
+    :rtype: ndarray
+    """
+    lengths = asarray(lengths, dtype=float64)
+    nsplit = ceil(lengths / max_length).astype(int)
+    new_knots = []
+    for a, b, k in zip(knots[:-1].tolist(), knots[1:].tolist(),
+                       nsplit.tolist()):
+        if k > 1:
+            new_knots.append(a + (b - a) * arange(1, k) / k)
+    if not new_knots:
+        return zeros(0, dtype=float64)
+    return concatenate(new_knots)
+
+
+def basis_funs_array(spans, u, p, uk):
+    """
+    Compute the non-vanishing basis functions for an array of parameters.
+    This is the vectorized version of :func:`basis_funs`.
+
+    :param ndarray spans: Knot span indices.
+    :param ndarray u: Parameters.
+    :param int p: Degree.
+    :param ndarray uk: Knot vector.
+
+    :return: Non-vanishing basis functions of shape (N, p + 1).
+    :rtype: ndarray
+    """
+    u = asarray(u, dtype=float64)
+    npts = u.size
+    bf = zeros((npts, p + 1), dtype=float64)
+    bf[:, 0] = 1.
+    left = zeros((npts, p + 1), dtype=float64)
+    right = zeros((npts, p + 1), dtype=float64)
+    for j in range(1, p + 1):
+        left[:, j] = u - uk[spans + 1 - j]
+        right[:, j] = uk[spans + j] - u
+        saved = zeros(npts, dtype=float64)
+        for r in range(0, j):
+            temp = bf[:, r] / (right[:, r + 1] + left[:, j - r])
+            bf[:, r] = saved + right[:, r + 1] * temp
+            saved = left[:, j - r] * temp
+        bf[:, j] = saved
+    return bf
+
+
+def ders_basis_funs_array(spans, u, p, nd, uk):
+    """
+    Compute the non-vanishing basis functions and their derivatives for an
+    array of parameters.
+
+    :param ndarray spans: Knot span indices.
+    :param ndarray u: Parameters.
+    :param int p: Degree.
+    :param int nd: Number of derivatives to compute.
+    :param ndarray uk: Knot vector.
+
+    :return: Basis functions and derivatives of shape (N, nd + 1, p + 1).
+        The first index of the second axis is the derivative order.
+    :rtype: ndarray
+
+    *Reference:* Algorithm A2.3 from "The NURBS Book".
+    """
+    u = asarray(u, dtype=float64)
+    npts = u.size
+    ders = zeros((npts, nd + 1, p + 1), dtype=float64)
+
+    ndu = zeros((npts, p + 1, p + 1), dtype=float64)
+    ndu[:, 0, 0] = 1.
+    left = zeros((npts, p + 1), dtype=float64)
+    right = zeros((npts, p + 1), dtype=float64)
+    for j in range(1, p + 1):
+        left[:, j] = u - uk[spans + 1 - j]
+        right[:, j] = uk[spans + j] - u
+        saved = zeros(npts, dtype=float64)
+        for r in range(0, j):
+            # Lower triangle
+            ndu[:, j, r] = right[:, r + 1] + left[:, j - r]
+            temp = ndu[:, r, j - 1] / ndu[:, j, r]
+            # Upper triangle
+            ndu[:, r, j] = saved + right[:, r + 1] * temp
+            saved = left[:, j - r] * temp
+        ndu[:, j, j] = saved
+
+    # Basis functions
+    ders[:, 0, :] = ndu[:, :, p]
+
+    # Derivatives are zero above the degree
+    nk = min(nd, p)
+    a = zeros((npts, 2, p + 1), dtype=float64)
+    for r in range(0, p + 1):
+        s1, s2 = 0, 1
+        a[:, 0, :] = 0.
+        a[:, 0, 0] = 1.
+        for k in range(1, nk + 1):
+            d = zeros(npts, dtype=float64)
+            rk = r - k
+            pk = p - k
+            if r >= k:
+                a[:, s2, 0] = a[:, s1, 0] / ndu[:, pk + 1, rk]
+                d += a[:, s2, 0] * ndu[:, rk, pk]
+            if rk >= -1:
+                j1 = 1
+            else:
+                j1 = -rk
+            if r - 1 <= pk:
+                j2 = k - 1
+            else:
+                j2 = p - r
+            for j in range(j1, j2 + 1):
+                a[:, s2, j] = ((a[:, s1, j] - a[:, s1, j - 1]) /
+                               ndu[:, pk + 1, rk + j])
+                d += a[:, s2, j] * ndu[:, rk + j, pk]
+            if r <= pk:
+                a[:, s2, k] = -a[:, s1, k - 1] / ndu[:, pk + 1, r]
+                d += a[:, s2, k] * ndu[:, r, pk]
+            ders[:, k, r] = d
+            s1, s2 = s2, s1
+
+    # Multiply through by the correct factors
+    r = p
+    for k in range(1, nk + 1):
+        ders[:, k, :] *= r
+        r *= (p - k)
+    return ders
+
+
+def basis_matrix(n, p, u, uk, nd=0):
+    """
+    Build the dense matrix of basis functions (and derivatives) evaluated at
+    an array of parameters.
+
+    :param int n: Number of control points - 1.
+    :param int p: Degree.
+    :param array_like u: Parameters.
+    :param ndarray uk: Knot vector.
+    :param int nd: Number of derivatives to compute.
+
+    :return: Basis matrix of shape (N, nd + 1, n + 1).
+    :rtype: ndarray
+    """
+    u = asarray(u, dtype=float64).ravel()
+    spans = find_spans(n, p, u, uk)
+    ders = ders_basis_funs_array(spans, u, p, nd, uk)
+    npts = u.size
+    rows = arange(npts)
+    bmat = zeros((npts, nd + 1, n + 1), dtype=float64)
+    for i in range(p + 1):
+        bmat[rows, :, spans - p + i] = ders[:, :, i]
+    return bmat
+
+
+def basis_matrix_sparse(n, p, u, uk):
+    """
+    Build the sparse matrix of basis functions evaluated at an array of
+    parameters. Each row has at most *p* + 1 non-zero entries.
+
+    :param int n: Number of control points - 1.
+    :param int p: Degree.
+    :param array_like u: Parameters.
+    :param ndarray uk: Knot vector.
+
+    :return: Basis matrix of shape (N, n + 1).
+    :rtype: scipy.sparse.csr_matrix
+    """
+    u = asarray(u, dtype=float64).ravel()
+    spans = find_spans(n, p, u, uk)
+    bf = basis_funs_array(spans, u, p, uk)
+    rows = repeat(arange(u.size), p + 1)
+    cols = (spans[:, None] - p + arange(p + 1)).ravel()
+    return csr_matrix((bf.ravel(), (rows, cols)), shape=(u.size, n + 1))
+
+
+def _binomial(k, i):
+    """
+    Binomial coefficient.
+    """
+    return factorial(k) // (factorial(i) * factorial(k - i))
+
+
+def _rational_curve_derivs(aders):
+    """
+    Derivatives of a rational curve from the derivatives of its homogeneous
+    form.
+
+    *Reference:* Algorithm A4.2 from "The NURBS Book".
+    """
+    a = aders[:, :, :-1]
+    w = aders[:, :, -1:]
+    ck = zeros(a.shape, dtype=float64)
+    for k in range(aders.shape[1]):
+        v = a[:, k].copy()
+        for i in range(1, k + 1):
+            v -= _binomial(k, i) * w[:, i] * ck[:, k - i]
+        ck[:, k] = v / w[:, 0]
+    return ck
+
+
+def _rational_surface_derivs(sders):
+    """
+    Derivatives of a rational surface from the derivatives of its
+    homogeneous form.
+
+    *Reference:* Algorithm A4.4 from "The NURBS Book".
+    """
+    a = sders[..., :-1]
+    w = sders[..., -1:]
+    skl = zeros(a.shape, dtype=float64)
+    du, dv = sders.shape[1] - 1, sders.shape[2] - 1
+    for k in range(du + 1):
+        for l in range(dv + 1):
+            v = a[:, k, l].copy()
+            for j in range(1, l + 1):
+                v -= _binomial(l, j) * w[:, 0, j] * skl[:, k, l - j]
+            for i in range(1, k + 1):
+                v -= _binomial(k, i) * w[:, i, 0] * skl[:, k - i, l]
+                v2 = zeros(v.shape, dtype=float64)
+                for j in range(1, l + 1):
+                    v2 += _binomial(l, j) * w[:, i, j] * skl[:, k - i, l - j]
+                v -= _binomial(k, i) * v2
+            skl[:, k, l] = v / w[:, 0, 0]
+    return skl
+
+
+def curve_derivs_array(n, p, uk, cpw, u, d=0):
+    """
+    Evaluate a NURBS curve and its derivatives at an array of parameters.
+
+    :param int n: Number of control points - 1.
+    :param int p: Degree.
+    :param ndarray uk: Knot vector.
+    :param ndarray cpw: Homogeneous control points of shape (n + 1, dim + 1).
+    :param array_like u: Parameters.
+    :param int d: Highest derivative to compute.
+
+    :return: Points and derivatives of shape (N, d + 1, dim). The first
+        index of the second axis is the derivative order.
+    :rtype: ndarray
+    """
+    u = asarray(u, dtype=float64).ravel()
+    spans = find_spans(n, p, u, uk)
+    nders = ders_basis_funs_array(spans, u, p, d, uk)
+    indx = spans[:, None] - p + arange(p + 1)
+    aders = einsum('nkj,njd->nkd', nders, cpw[indx])
+    return _rational_curve_derivs(aders)
+
+
+def surface_derivs_array(n, p, uk, m, q, vk, cpw, u, v, du=0, dv=0):
+    """
+    Evaluate a NURBS surface and its derivatives at arrays of (u, v) pairs.
+
+    :param int n: Number of control points in u-direction - 1.
+    :param int p: Degree in u-direction.
+    :param ndarray uk: Knot vector in u-direction.
+    :param int m: Number of control points in v-direction - 1.
+    :param int q: Degree in v-direction.
+    :param ndarray vk: Knot vector in v-direction.
+    :param ndarray cpw: Homogeneous control points of shape
+        (n + 1, m + 1, 4).
+    :param array_like u: Parameters in u-direction.
+    :param array_like v: Parameters in v-direction.
+    :param int du: Highest derivative to compute in u-direction.
+    :param int dv: Highest derivative to compute in v-direction.
+
+    :return: Points and derivatives of shape (N, du + 1, dv + 1, 3).
+    :rtype: ndarray
+    """
+    u = asarray(u, dtype=float64).ravel()
+    v = asarray(v, dtype=float64).ravel()
+    uspans = find_spans(n, p, u, uk)
+    vspans = find_spans(m, q, v, vk)
+    nu = ders_basis_funs_array(uspans, u, p, du, uk)
+    nv = ders_basis_funs_array(vspans, v, q, dv, vk)
+    iu = uspans[:, None] - p + arange(p + 1)
+    iv = vspans[:, None] - q + arange(q + 1)
+    pw = cpw[iu[:, :, None], iv[:, None, :]]
+    sders = einsum('nki,nlj,nijd->nkld', nu, nv, pw, optimize=True)
+    return _rational_surface_derivs(sders)
+
+
+def surface_derivs_grid(n, p, uk, m, q, vk, cpw, u, v, du=0, dv=0):
+    """
+    Evaluate a NURBS surface and its derivatives over the tensor product grid
+    of the parameters.
+
+    :param int n: Number of control points in u-direction - 1.
+    :param int p: Degree in u-direction.
+    :param ndarray uk: Knot vector in u-direction.
+    :param int m: Number of control points in v-direction - 1.
+    :param int q: Degree in v-direction.
+    :param ndarray vk: Knot vector in v-direction.
+    :param ndarray cpw: Homogeneous control points of shape
+        (n + 1, m + 1, 4).
+    :param array_like u: Parameters in u-direction of size N.
+    :param array_like v: Parameters in v-direction of size M.
+    :param int du: Highest derivative to compute in u-direction.
+    :param int dv: Highest derivative to compute in v-direction.
+
+    :return: Points and derivatives of shape (N, M, du + 1, dv + 1, 3).
+    :rtype: ndarray
+    """
+    bu = basis_matrix(n, p, u, uk, du)
+    bv = basis_matrix(m, q, v, vk, dv)
+    nu, nv = bu.shape[0], bv.shape[0]
+    tmp = tensordot(bu, cpw, axes=([2], [0]))
+    sders = einsum('nkjd,mlj->nmkld', tmp, bv, optimize=True)
+    sders = sders.reshape(nu * nv, du + 1, dv + 1, 4)
+    skl = _rational_surface_derivs(sders)
+    return skl.reshape(nu, nv, du + 1, dv + 1, 3)
+
+
+def averaged_knots(params, p):
+    """
+    Build a clamped knot vector by averaging the parameters.
+
+    :param array_like params: Parameters of the interpolated points between
+        [0, 1].
+    :param int p: Degree.
+
+    :return: Knot vector.
+    :rtype: ndarray
+
+    *Reference:* Equation 9.8 from "The NURBS Book".
+    """
+    params = asarray(params, dtype=float64)
+    n = params.size - 1
+    uk = zeros(n + p + 2, dtype=float64)
+    uk[n + 1:] = 1.
+    for j in range(1, n - p + 1):
+        uk[j + p] = params[j:j + p].sum() / p
+    return uk
+
+
+def interpolate_stack(qp, p, params, uk):
+    """
+    Solve for the control points of a stack of curves that interpolate
+    points at shared parameters and with a shared knot vector. The banded
+    collocation matrix is assembled and factored once and all curves are
+    solved together as multiple right-hand sides.
+
+    :param array_like qp: Points to interpolate of shape (K, n + 1, d) where
+        K is the number of curves and d is the dimension of the points.
+    :param int p: Degree.
+    :param array_like params: Parameters of the interpolated points.
+    :param ndarray uk: Knot vector.
+
+    :return: Control points of shape (K, n + 1, d).
+    :rtype: ndarray
+    """
+    qp = asarray(qp, dtype=float64)
+    params = asarray(params, dtype=float64)
+    k, npts, d = qp.shape
+    n = npts - 1
+
+    # Assemble the collocation matrix in banded storage
+    spans = find_spans(n, p, params, uk)
+    bf = basis_funs_array(spans, params, p, uk)
+    rows = arange(npts)
+    cols = spans[:, None] - p + arange(p + 1)
+    lower = max(int((rows - cols[:, 0]).max()), 0)
+    upper = max(int((cols[:, -1] - rows).max()), 0)
+    ab = zeros((lower + upper + 1, npts), dtype=float64)
+    ab[upper + rows[:, None] - cols, cols] = bf
+
+    # Solve all curves at once
+    rhs = qp.transpose((1, 0, 2)).reshape(npts, k * d)
+    cp = solve_banded((lower, upper), ab, rhs, overwrite_ab=True,
+                      overwrite_b=True, check_finite=False)
+    return cp.reshape(npts, k, d).transpose((1, 0, 2))
+
+
+def approximation_knots(params, p, n):
+    """
+    Build a clamped knot vector for a least squares approximation so that
+    every knot span contains at least one parameter.
+
+    :param array_like params: Parameters of the approximated points between
+        [0, 1].
+    :param int p: Degree.
+    :param int n: Number of control points - 1.
+
+    :return: Knot vector.
+    :rtype: ndarray
+
+    *Reference:* Equations 9.68 and 9.69 from "The NURBS Book".
+    """
+    params = asarray(params, dtype=float64)
+    m = params.size - 1
+    uk = zeros(n + p + 2, dtype=float64)
+    uk[n + 1:] = 1.
+    d = (m + 1) / (n - p + 1)
+    j = arange(1, n - p + 1)
+    i = floor(j * d).astype(int)
+    alpha = j * d - i
+    uk[j + p] = (1. - alpha) * params[i - 1] + alpha * params[i]
+    return uk
+
+
+def approximate_stack(qp, p, params, uk, n):
+    """
+    Solve for the control points of a stack of curves that approximate points
+    in the least squares sense at shared parameters and with a shared knot
+    vector. The first and last points of each curve are interpolated. The
+    sparse normal equations are assembled and solved once for all curves as
+    multiple right-hand sides.
+
+    :param array_like qp: Points to approximate of shape (K, m + 1, d) where
+        K is the number of curves and d is the dimension of the points.
+    :param int p: Degree.
+    :param array_like params: Parameters of the approximated points.
+    :param ndarray uk: Knot vector.
+    :param int n: Number of control points - 1.
+
+    :return: Control points of shape (K, n + 1, d).
+    :rtype: ndarray
+
+    *Reference:* Section 9.4.1 from "The NURBS Book".
+    """
+    qp = asarray(qp, dtype=float64)
+    k, npts, d = qp.shape
+    cp = empty((k, n + 1, d), dtype=float64)
+    cp[:, 0] = qp[:, 0]
+    cp[:, -1] = qp[:, -1]
+    if n < 2:
+        return cp
+
+    # Remove the contribution of the end points from the interior points
+    bmat = basis_matrix_sparse(n, p, params, uk)
+    b0 = bmat[1:-1, 0].toarray()
+    bn = bmat[1:-1, n].toarray()
+    rk = (qp[:, 1:-1] - b0[None, :, :] * qp[:, :1] -
+          bn[None, :, :] * qp[:, -1:])
+
+    # Assemble and solve the normal equations
+    ninner = bmat[1:-1, 1:-1]
+    lhs = ninner.T.dot(ninner).tocsc()
+    rhs = ninner.T.dot(rk.transpose((1, 0, 2)).reshape(npts - 2, k * d))
+    sol = spsolve(lhs, rhs)
+    cp[:, 1:-1] = sol.reshape(n - 1, k, d).transpose((1, 0, 2))
+    return cp
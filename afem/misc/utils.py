@@ -23,7 +23,9 @@ except ImportError:
     _zip = zip
 
 from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
 from itertools import tee
+from math import ceil
 
 from numpy import ndarray
 
@@ -47,3 +49,36 @@ def pairwise(iterable):
     a, b = tee(iterable)
     next(b, None)
     return _zip(a, b)
+
+
+def map_in_processes(func, items, nprocs=None, args=()):
+    """
+    Apply a function to chunks of items in worker processes. The items are
+    split into one contiguous chunk per process and ``func(chunk, *args)`` is
+    called for each chunk. The function must be defined at module level and
+    the items, extra arguments, and results must be picklable (e.g.,
+    geometry and NumPy arrays).
+
+    :param func: The function. It takes a list of items and the extra
+        arguments and returns a list with one result per item.
+    :param collections.Sequence items: The items.
+    :param int nprocs: Number of worker processes. If *None* or less than two
+        the function is called once in the current process.
+    :param tuple args: Extra arguments passed to every call.
+
+    :return: The results in the same order as the items.
+    :rtype: list
+    """
+    items = list(items)
+    if nprocs is None or nprocs < 2 or len(items) < 2:
+        return list(func(items, *args))
+
+    nchunks = min(int(nprocs), len(items))
+    size = int(ceil(len(items) / float(nchunks)))
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=nchunks) as executor:
+        futures = [executor.submit(func, chunk, *args) for chunk in chunks]
+        for future in futures:
+            results += future.result()
+    return results
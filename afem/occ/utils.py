@@ -24,7 +24,7 @@ from OCCT.TColgp import (TColgp_Array1OfPnt, TColgp_Array1OfPnt2d,
                          TColgp_HArray1OfPnt2d)
 from OCCT.TopoDS import TopoDS_ListOfShape
 from OCCT.gp import gp_Pnt, gp_Pnt2d
-from numpy import array as np_array, zeros
+from numpy import array as np_array, ndarray
 
 from afem.misc.utils import is_array_like
 
@@ -60,6 +60,12 @@ def to_tcolgp_array1_pnt(pnts):
     :return: OCC array of points.
     :rtype: TColgp_Array1OfPnt
     """
+    xyz = _to_np_coords(pnts, 3)
+    if xyz is not None:
+        array = TColgp_Array1OfPnt(1, len(xyz))
+        _fill_array1_pnt(array, xyz, gp_Pnt())
+        return array
+
     gp_pnts = []
     for gp in pnts:
         gp = to_gp_pnt(gp)
@@ -84,6 +90,12 @@ def to_tcolgp_array1_pnt2d(pnts):
     :return: OCC array of points.
     :rtype: TColgp_Array1OfPnt2d
     """
+    xy = _to_np_coords(pnts, 2)
+    if xy is not None:
+        array = TColgp_Array1OfPnt2d(1, len(xy))
+        _fill_array1_pnt(array, xy, gp_Pnt2d())
+        return array
+
     gp_pnts = []
     for gp in pnts:
         gp = to_gp_pnt2d(gp)
@@ -108,6 +120,12 @@ def to_tcolgp_harray1_pnt(pnts):
     :return: OCC array of points.
     :rtype: TColgp_HArray1OfPnt
     """
+    xyz = _to_np_coords(pnts, 3)
+    if xyz is not None:
+        harray = TColgp_HArray1OfPnt(1, len(xyz))
+        _fill_array1_pnt(harray, xyz, gp_Pnt())
+        return harray
+
     gp_pnts = []
     for gp in pnts:
         gp = to_gp_pnt(gp)
@@ -132,6 +150,12 @@ def to_tcolgp_harray1_pnt2d(pnts):
     :return: OCC array of points.
     :rtype: TColgp_HArray1OfPnt2d
     """
+    xy = _to_np_coords(pnts, 2)
+    if xy is not None:
+        harray = TColgp_HArray1OfPnt2d(1, len(xy))
+        _fill_array1_pnt(harray, xy, gp_Pnt2d())
+        return harray
+
     gp_pnts = []
     for gp in pnts:
         gp = to_gp_pnt2d(gp)
@@ -156,7 +180,7 @@ def to_tcolstd_array1_real(array):
     :return: OCC array of floats.
     :rtype: TColStd_Array1OfReal
     """
-    flts = [float(x) for x in array]
+    flts = _to_float_list(array)
     n = len(flts)
     array = TColStd_Array1OfReal(1, n)
     for i, x in enumerate(flts, 1):
@@ -174,7 +198,10 @@ def to_tcolstd_array1_integer(array):
     :return: OCC array of integers.
     :rtype: TColStd_Array1OfInteger
     """
-    ints = [int(x) for x in array]
+    if isinstance(array, ndarray):
+        ints = array.astype(int).ravel().tolist()
+    else:
+        ints = [int(x) for x in array]
     n = len(ints)
     array = TColStd_Array1OfInteger(1, n)
     for i, x in enumerate(ints, 1):
@@ -194,17 +221,11 @@ def to_tcolgp_array2_pnt(pnts):
     """
     pnts = np_array(pnts, dtype=float)
     n, m = pnts.shape[0:2]
-    gp_pnts = []
-    for i in range(0, n):
-        row = []
-        for j in range(0, m):
-            gp = to_gp_pnt(pnts[i, j])
-            row.append(gp)
-        gp_pnts.append(row)
-
     array = TColgp_Array2OfPnt(1, n, 1, m)
-    for i, row in enumerate(gp_pnts, 1):
-        for j, gp in enumerate(row, 1):
+    gp = gp_Pnt()
+    for i, row in enumerate(pnts[:, :, :3].tolist(), 1):
+        for j, (x, y, z) in enumerate(row, 1):
+            gp.SetCoord(x, y, z)
             array.SetValue(i, j, gp)
 
     return array
@@ -220,7 +241,7 @@ def to_tcolstd_hseq_real(array):
     :rtype: OCCT.TColStd.TColStd_HSequenceOfReal
     """
     hseq = TColStd_HSequenceOfReal()
-    for x in array:
+    for x in _to_float_list(array):
         hseq.Append(x)
     return hseq
 
@@ -237,9 +258,8 @@ def to_tcolstd_array2_real(array):
     flts = np_array(array, dtype=float)
     n, m = flts.shape
     array = TColStd_Array2OfReal(1, n, 1, m)
-    for i in range(1, n + 1):
-        for j in range(1, m + 1):
-            x = float(flts[i - 1, j - 1])
+    for i, row in enumerate(flts.tolist(), 1):
+        for j, x in enumerate(row, 1):
             array.SetValue(i, j, x)
 
     return array
@@ -255,12 +275,9 @@ def to_np_from_tcolstd_array1_real(tcol_array):
     :return: NumPy array of floats.
     :rtype: ndarray
     """
-    n = tcol_array.Length()
-    array = zeros(n, dtype=float)
-    for i in range(n):
-        x = tcol_array.Value(i + 1)
-        array[i] = x
-    return array
+    i1, i2 = tcol_array.Lower(), tcol_array.Upper()
+    return np_array([tcol_array.Value(i) for i in range(i1, i2 + 1)],
+                    dtype=float)
 
 
 def to_np_from_tcolstd_array1_integer(tcol_array):
@@ -273,12 +290,9 @@ def to_np_from_tcolstd_array1_integer(tcol_array):
     :return: NumPy array of integers.
     :rtype: ndarray
     """
-    n = tcol_array.Length()
-    array = zeros(n, dtype=int)
-    for i in range(n):
-        x = tcol_array.Value(i + 1)
-        array[i] = x
-    return array
+    i1, i2 = tcol_array.Lower(), tcol_array.Upper()
+    return np_array([tcol_array.Value(i) for i in range(i1, i2 + 1)],
+                    dtype=int)
 
 
 def to_np_from_tcolgp_array1_pnt(tcol_array):
@@ -291,12 +305,30 @@ def to_np_from_tcolgp_array1_pnt(tcol_array):
     :return: NumPy array of points.
     :rtype: ndarray
     """
-    n = tcol_array.Length()
-    array = zeros((n, 3), dtype=float)
-    for i in range(n):
-        p = tcol_array.Value(i + 1)
-        array[i, :] = p.X(), p.Y(), p.Z()
-    return array
+    i1, i2 = tcol_array.Lower(), tcol_array.Upper()
+    xyz = []
+    for i in range(i1, i2 + 1):
+        p = tcol_array.Value(i)
+        xyz.append((p.X(), p.Y(), p.Z()))
+    return np_array(xyz, dtype=float).reshape(-1, 3)
+
+
+def to_np_from_tcolgp_array1_pnt2d(tcol_array):
+    """
+    Convert OCC data to NumPy array.
+
+    :param tcol_array: OCC array of 2-D points.
+    :type tcol_array: TColgp_Array1OfPnt2d
+
+    :return: NumPy array of 2-D points.
+    :rtype: ndarray
+    """
+    i1, i2 = tcol_array.Lower(), tcol_array.Upper()
+    xy = []
+    for i in range(i1, i2 + 1):
+        p = tcol_array.Value(i)
+        xy.append((p.X(), p.Y()))
+    return np_array(xy, dtype=float).reshape(-1, 2)
 
 
 def to_np_from_tcolgp_array2_pnt(tcol_array):
@@ -309,13 +341,15 @@ def to_np_from_tcolgp_array2_pnt(tcol_array):
     :return: NumPy array of points.
     :rtype: ndarray
     """
-    n, m = tcol_array.ColLength(), tcol_array.RowLength()
-    array = zeros((n, m, 3), dtype=float)
-    for i in range(n):
-        for j in range(m):
-            p = tcol_array.Value(i + 1, j + 1)
-            array[i, j, :] = p.X(), p.Y(), p.Z()
-    return array
+    i1, i2 = tcol_array.LowerRow(), tcol_array.UpperRow()
+    j1, j2 = tcol_array.LowerCol(), tcol_array.UpperCol()
+    xyz = []
+    for i in range(i1, i2 + 1):
+        for j in range(j1, j2 + 1):
+            p = tcol_array.Value(i, j)
+            xyz.append((p.X(), p.Y(), p.Z()))
+    n, m = i2 - i1 + 1, j2 - j1 + 1
+    return np_array(xyz, dtype=float).reshape(n, m, 3)
 
 
 def to_np_from_tcolstd_array2_real(tcol_array):
@@ -328,13 +362,12 @@ def to_np_from_tcolstd_array2_real(tcol_array):
     :return: NumPy array of floats.
     :rtype: ndarray
     """
-    n, m = tcol_array.ColLength(), tcol_array.RowLength()
-    array = zeros((n, m), dtype=float)
-    for i in range(n):
-        for j in range(m):
-            x = tcol_array.Value(i + 1, j + 1)
-            array[i, j] = x
-    return array
+    i1, i2 = tcol_array.LowerRow(), tcol_array.UpperRow()
+    j1, j2 = tcol_array.LowerCol(), tcol_array.UpperCol()
+    flts = [tcol_array.Value(i, j)
+            for i in range(i1, i2 + 1) for j in range(j1, j2 + 1)]
+    n, m = i2 - i1 + 1, j2 - j1 + 1
+    return np_array(flts, dtype=float).reshape(n, m)
 
 
 def to_topods_list(shapes):
@@ -350,3 +383,38 @@ def to_topods_list(shapes):
     for s in shapes:
         topods_list.Append(s.object)
     return topods_list
+
+
+def _to_np_coords(pnts, dim):
+    """
+    Convert the points to a NumPy array of shape (N, dim) in a single pass.
+    Returns *None* if the points are not all numeric entities of the given
+    dimension so the caller can fall back to converting them one at a time.
+    """
+    try:
+        xyz = np_array(pnts, dtype=float)
+    except (TypeError, ValueError):
+        return None
+    if xyz.ndim != 2 or xyz.shape[1] != dim:
+        return None
+    return xyz
+
+
+def _fill_array1_pnt(array, xyz, gp):
+    """
+    Fill the 1-D OCC array of points from the NumPy coordinates using a
+    single scratch point. The OCC array stores a copy of each point.
+    """
+    i1 = array.Lower()
+    for i, coords in enumerate(xyz.tolist(), i1):
+        gp.SetCoord(*coords)
+        array.SetValue(i, gp)
+
+
+def _to_float_list(array):
+    """
+    Convert the 1-D array of floats to a list of Python floats.
+    """
+    if isinstance(array, ndarray):
+        return array.astype(float).ravel().tolist()
+    return [float(x) for x in array]
@@ -17,15 +17,19 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from math import radians
+
+from OCCT.gp import gp_Ax3, gp_Trsf
+from numpy import float64, loadtxt, zeros
+
 from afem.geometry.check import CheckGeom
 from afem.geometry.create import (PlaneByAxes, NurbsCurve2DByApprox,
                                   NurbsCurve2DByInterp, NurbsCurve2DByPoints)
-from afem.geometry.entities import Point2D
 from afem.topology.bop import FuseShapes
 from afem.topology.create import WiresByConnectedEdges, FaceByPlanarWire
 from afem.topology.entities import Face, Edge
 
-__all__ = ["CrossSection", "Airfoil"]
+__all__ = ["CrossSection", "Airfoil", "SectionsByPlanes"]
 
 
 class CrossSection(object):
@@ -236,24 +240,7 @@ class CrossSection(object):
         if len(edges) == 0:
             return False
 
-        if len(edges) == 1:
-            self._shape = edges[0]
-        else:
-            # Fuse the shape
-            fuse = FuseShapes()
-            fuse.set_args(edges[:-1])
-            fuse.set_tools(edges[-1:])
-            fuse.build()
-            self._shape = fuse.shape
-            edges = fuse.edges
-
-        # Try and make wire(s)
-        self._wire_tool = WiresByConnectedEdges(edges)
-
-        # Try to make a face if one wire was created
-        if self.nwires == 1:
-            self._face = FaceByPlanarWire(self.wires[0]).face
-
+        self._shape, self._wire_tool, self._face = _build_section(edges)
         return True
 
 
@@ -330,31 +317,35 @@ class Airfoil(CrossSection):
             the leading edge, and then proceeds back to the trailing edge along
             the lower surface.
         """
-        with open(fn, 'r') as fin:
-            content = fin.read().splitlines()
-
-        upr, lwr = [], []
-        i = 3
-        while i < len(content):
-            line = content[i].strip().split()
-            i += 1
-            if not line:
-                break
-            x = float(line[0])
-            z = float(line[1])
-            upr.append(Point2D(x, z))
-
-        while i < len(content):
-            line = content[i].strip().split()
-            i += 1
-            if not line:
-                break
-            x = float(line[0])
-            z = float(line[1])
-            lwr.append(Point2D(x, z))
-
+        upr, lwr = _read_uiuc(fn)
         return self.approx_points(upr, lwr, close)
 
+    def set_curve(self, crv, le, upr_te, lwr_te, close=True):
+        """
+        Set the 2-D airfoil curve directly, for example from a curve that was
+        previously approximated by :meth:`approx_points`. All other curves
+        will be cleared from the cross section before this method is called.
+
+        :param afem.geometry.entities.NurbsCurve2D crv: The 2-D curve.
+        :param point2d_like le: The leading edge point.
+        :param point2d_like upr_te: The upper trailing edge point.
+        :param point2d_like lwr_te: The lower trailing edge point.
+        :param bool close: Option to close the airfoil by adding a segment.
+
+        :return: The 2-D curve.
+        :rtype: afem.geometry.entities.NurbsCurve2D
+        """
+        self._le2d = CheckGeom.to_point2d(le)
+        self._upr_te2d = CheckGeom.to_point2d(upr_te)
+        self._lwr_te2d = CheckGeom.to_point2d(lwr_te)
+
+        self.clear()
+        self._crvs.append(crv)
+        if close:
+            self._close(crv)
+
+        return crv
+
     def build_chord(self, pln=None, scale=None, rotate=None):
         """
         Build a chord line using the leading and trailing edge points of the
@@ -397,3 +388,201 @@ class Airfoil(CrossSection):
             c3d.rotate(axis, rotate)
 
         return c3d
+
+
+class SectionsByPlanes(object):
+    """
+    Build many 3-D sections by placing cross sections on planes. Each unique
+    cross section is converted to 3-D curves only once in the global
+    xy-plane. The curves are then copied and moved onto each plane using a
+    single transformation that includes the optional scaling and rotation.
+    The 3-D curves are suitable for
+    :class:`~afem.geometry.create.NurbsSurfaceByInterp` and the wires for
+    :class:`~afem.topology.offset.LoftShape`.
+
+    :param sections: The cross section to place on every plane, or one cross
+        section per plane. The same cross section may appear many times.
+    :type sections: afem.sketch.entities.CrossSection or
+        collections.Sequence(afem.sketch.entities.CrossSection)
+    :param collections.Sequence(afem.geometry.entities.Plane) planes: The
+        planes.
+    :param scales: The scale for all sections or one scale per plane. The
+        reference point is the plane origin.
+    :type scales: float or collections.Sequence(float)
+    :param rotations: The rotation angle in degrees for all sections or one
+        angle per plane. The reference axis is the plane normal.
+    :type rotations: float or collections.Sequence(float)
+    :param bool build_shapes: Option to build the edges, wires, and faces of
+        each section like :meth:`CrossSection.build`. If *False* only the
+        3-D curves are available.
+
+    :raise ValueError: If the number of sections, scales, or rotations does
+        not match the number of planes.
+    """
+
+    def __init__(self, sections, planes, scales=None, rotations=None,
+                 build_shapes=True):
+        planes = list(planes)
+        n = len(planes)
+        sections = _per_plane(sections, n, 'sections')
+        scales = _per_plane(scales, n, 'scales')
+        rotations = _per_plane(rotations, n, 'rotations')
+
+        # Convert each unique cross section to 3-D once
+        xy_pln = PlaneByAxes(axes='xy').plane
+        ref_crvs = {}
+        for cs in sections:
+            if id(cs) not in ref_crvs:
+                ref_crvs[id(cs)] = [c.to_3d(xy_pln) for c in cs._crvs]
+
+        # Move copies of the curves onto each plane
+        self._crvs = []
+        for cs, pln, scale, angle in zip(sections, planes, scales,
+                                         rotations):
+            trsf = _placement(pln, scale, angle)
+            crvs = []
+            for c in ref_crvs[id(cs)]:
+                c = c.copy()
+                c.object.Transform(trsf)
+                crvs.append(c)
+            self._crvs.append(crvs)
+
+        # Build the shapes
+        self._results = [(None, None, None)] * n
+        if not build_shapes:
+            return
+        self._results = [_build_section([Edge.by_curve(c) for c in crvs])
+                         for crvs in self._crvs]
+
+    @property
+    def nsections(self):
+        """
+        :return: Number of sections.
+        :rtype: int
+        """
+        return len(self._crvs)
+
+    @property
+    def curves(self):
+        """
+        :return: The 3-D curves of each section.
+        :rtype: list(list(afem.geometry.entities.Curve))
+        """
+        return [list(crvs) for crvs in self._crvs]
+
+    @property
+    def loft_curves(self):
+        """
+        :return: The first 3-D curve of each section. For an airfoil this
+            is the curve that was approximated from the points.
+        :rtype: list(afem.geometry.entities.Curve)
+        """
+        return [crvs[0] for crvs in self._crvs if crvs]
+
+    @property
+    def shapes(self):
+        """
+        :return: The 3-D shape of each section if shapes were built.
+        :rtype: list(afem.topology.entities.Edge or
+            afem.topology.entities.Shape)
+        """
+        return [r[0] for r in self._results]
+
+    @property
+    def wires(self):
+        """
+        :return: The wires of each section if shapes were built.
+        :rtype: list(list(afem.topology.entities.Wire))
+        """
+        return [[] if r[1] is None else r[1].wires for r in self._results]
+
+    @property
+    def loft_wires(self):
+        """
+        :return: The first wire of each section if shapes were built.
+        :rtype: list(afem.topology.entities.Wire)
+        """
+        return [wires[0] for wires in self.wires if wires]
+
+    @property
+    def faces(self):
+        """
+        :return: The face of each section if available.
+        :rtype: list(afem.topology.entities.Face or None)
+        """
+        return [r[2] if isinstance(r[2], Face) else None
+                for r in self._results]
+
+
+def _read_uiuc(fn):
+    """
+    Read the upper and lower points of a UIUC airfoil file as arrays.
+    """
+    with open(fn, 'r') as fin:
+        lines = [line.strip() for line in fin.read().splitlines()[3:]]
+
+    blocks = []
+    for _ in range(2):
+        i = lines.index('') if '' in lines else len(lines)
+        blocks.append(lines[:i])
+        lines = lines[i + 1:]
+
+    return [loadtxt(block, usecols=(0, 1), ndmin=2) if block else
+            zeros((0, 2), dtype=float64) for block in blocks]
+
+
+def _per_plane(value, n, name):
+    """
+    Repeat a single value for each plane or check the number of values.
+    """
+    if value is None or isinstance(value, (CrossSection, float, int)):
+        return [value] * n
+    value = list(value)
+    if len(value) != n:
+        msg = 'The number of {} does not match the number of planes.'
+        raise ValueError(msg.format(name))
+    return value
+
+
+def _placement(pln, scale=None, angle=None):
+    """
+    Transformation from the global xy-plane onto the plane including scaling
+    and rotation about the plane origin.
+    """
+    trsf = gp_Trsf()
+    trsf.SetDisplacement(gp_Ax3(), pln.gp_pln.Position())
+    if scale is not None:
+        trsf_scale = gp_Trsf()
+        trsf_scale.SetScale(pln.origin, scale)
+        trsf.PreMultiply(trsf_scale)
+    if angle is not None:
+        trsf_rot = gp_Trsf()
+        trsf_rot.SetRotation(pln.axis, radians(angle))
+        trsf.PreMultiply(trsf_rot)
+    return trsf
+
+
+def _build_section(edges):
+    """
+    Fuse the edges and try to build wires and a face.
+    """
+    if len(edges) == 1:
+        shape = edges[0]
+    else:
+        # Fuse the shape
+        fuse = FuseShapes()
+        fuse.set_args(edges[:-1])
+        fuse.set_tools(edges[-1:])
+        fuse.build()
+        shape = fuse.shape
+        edges = fuse.edges
+
+    # Try and make wire(s)
+    wire_tool = WiresByConnectedEdges(edges)
+
+    # Try to make a face if one wire was created
+    face = None
+    if wire_tool.nwires == 1:
+        face = FaceByPlanarWire(wire_tool.wires[0]).face
+
+    return shape, wire_tool, face
@@ -0,0 +1,224 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018 Laughlin Research, LLC
+# Copyright (C) 2019-2020 Trevor Laughlin
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import hashlib
+import os
+from glob import glob
+from tempfile import mkstemp
+from zipfile import BadZipFile
+
+from OCCT.Approx import Approx_ChordLength
+from numpy import array, float64, load, savez, vstack, zeros
+
+from afem.config import logger
+from afem.geometry.create import NurbsCurve2DByApprox
+from afem.geometry.entities import Geometry, NurbsCurve2D
+from afem.sketch.entities import Airfoil, _read_uiuc
+
+__all__ = ["AirfoilLibrary"]
+
+# Increment if the format of the cached data changes
+_CACHE_VERSION = 1
+
+
+class AirfoilLibrary(object):
+    """
+    Library of airfoils read from UIUC files. Each airfoil is approximated
+    only once and the fitted 2-D curve is kept in memory. If a cache
+    directory is provided, the curve data is also stored on disk using a key
+    made from the file contents and the fit parameters, so later sessions
+    skip both parsing and approximation.
+
+    :param str cache_dir: The directory for cached curve data. It is created
+        if it does not exist. If *None*, the curves are only kept in memory.
+    :param int dmin: Minimum degree.
+    :param int dmax: Maximum degree.
+    :param OCCT.GeomAbs.GeomAbs_Shape continuity: Desired continuity of curve.
+    :param OCCT.Approx.Approx_ParametrizationType parm_type: Parametrization
+        type.
+    :param float tol: The tolerance used for approximation.
+    """
+
+    def __init__(self, cache_dir=None, dmin=3, dmax=8,
+                 continuity=Geometry.C2, parm_type=Approx_ChordLength,
+                 tol=1.0e-6):
+        if cache_dir is not None and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+        self._cache_dir = cache_dir
+        self._fit_args = (int(dmin), int(dmax), continuity, parm_type,
+                          float(tol))
+        self._fit_key = 'v{}-{}-{}-{}-{}-{!r}'.format(
+            _CACHE_VERSION, int(dmin), int(dmax), int(continuity),
+            int(parm_type), float(tol))
+        self._data = {}
+
+    def __contains__(self, name):
+        return name in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def names(self):
+        """
+        :return: The names of the loaded airfoils.
+        :rtype: list(str)
+        """
+        return sorted(self._data.keys())
+
+    def load(self, fn, name=None):
+        """
+        Load an airfoil from a UIUC file. The fitted curve is read from the
+        cache if available, otherwise the file is parsed and approximated and
+        the result is written to the cache.
+
+        :param str fn: The filename.
+        :param str name: The name of the airfoil. If *None*, the filename
+            without its extension is used.
+
+        :return: The name of the airfoil.
+        :rtype: str
+        """
+        if name is None:
+            name = os.path.splitext(os.path.basename(fn))[0]
+
+        with open(fn, 'rb') as fin:
+            content = fin.read()
+        sha = hashlib.sha1(content)
+        sha.update(self._fit_key.encode('utf-8'))
+        key = sha.hexdigest()
+
+        data = self._read_cache(key)
+        if data is None:
+            data = self._fit(fn)
+            self._write_cache(key, data)
+
+        self._data[name] = data
+        return name
+
+    def load_directory(self, path, pattern='*.dat'):
+        """
+        Load all the UIUC airfoil files in a directory.
+
+        :param str path: The directory.
+        :param str pattern: The pattern used to find the files.
+
+        :return: The names of the loaded airfoils.
+        :rtype: list(str)
+        """
+        fns = sorted(glob(os.path.join(path, pattern)))
+        return [self.load(fn) for fn in fns]
+
+    def curve(self, name):
+        """
+        Get a new 2-D curve of the airfoil.
+
+        :param str name: The name of the airfoil.
+
+        :return: The 2-D curve.
+        :rtype: afem.geometry.entities.NurbsCurve2D
+
+        :raise KeyError: If the airfoil is not in the library.
+        """
+        cp, w, knots, mult, p, is_periodic = self._data[name][:6]
+        if w.size == 0:
+            w = None
+        return NurbsCurve2D.by_data(cp, knots, mult, p, w, is_periodic)
+
+    def airfoil(self, name, pln=None, close=True):
+        """
+        Create an airfoil cross section from the library.
+
+        :param str name: The name of the airfoil.
+        :param afem.geometry.entities.Plane pln: The default construction
+            plane. If *None* is provided, then the xy-plane is used.
+        :param bool close: Option to close the airfoil by adding a segment.
+
+        :return: The airfoil.
+        :rtype: afem.sketch.entities.Airfoil
+
+        :raise KeyError: If the airfoil is not in the library.
+        """
+        le, upr_te, lwr_te = self._data[name][6]
+        cs = Airfoil(pln)
+        cs.set_curve(self.curve(name), le, upr_te, lwr_te, close)
+        return cs
+
+    def _fit(self, fn):
+        """
+        Read and approximate the airfoil points.
+        """
+        upr, lwr = _read_uiuc(fn)
+        pnts = vstack((upr[::-1], lwr[1:]))
+        dmin, dmax, continuity, parm_type, tol = self._fit_args
+        c = NurbsCurve2DByApprox(pnts, dmin, dmax, continuity, parm_type,
+                                 tol).curve
+
+        w = zeros(0, dtype=float64)
+        if c.object.IsRational():
+            w = c.w
+        ref_pnts = array([upr[0], upr[-1], lwr[-1]], dtype=float64)
+        return (c.cp, w, c.knots, c.mult, c.p, c.object.IsPeriodic(),
+                ref_pnts)
+
+    def _cache_file(self, key):
+        """
+        Filename of the cached data.
+        """
+        return os.path.join(self._cache_dir, key + '.npz')
+
+    def _read_cache(self, key):
+        """
+        Read the curve data from the cache if available.
+        """
+        if self._cache_dir is None:
+            return None
+
+        fn = self._cache_file(key)
+        if not os.path.isfile(fn):
+            return None
+
+        try:
+            with load(fn) as npz:
+                return (npz['cp'], npz['w'], npz['knots'], npz['mult'],
+                        int(npz['p']), bool(npz['is_periodic']),
+                        npz['ref_pnts'])
+        except (BadZipFile, IOError, KeyError, ValueError) as e:
+            msg = 'Ignoring invalid airfoil cache file {}: {}'.format(fn, e)
+            logger.warning(msg)
+            return None
+
+    def _write_cache(self, key, data):
+        """
+        Write the curve data to the cache.
+        """
+        if self._cache_dir is None:
+            return None
+
+        cp, w, knots, mult, p, is_periodic, ref_pnts = data
+        fd, tmp = mkstemp(suffix='.npz', dir=self._cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as fout:
+                savez(fout, cp=cp, w=w, knots=knots, mult=mult, p=p,
+                      is_periodic=is_periodic, ref_pnts=ref_pnts)
+            os.replace(tmp, self._cache_file(key))
+        except Exception:
+            os.remove(tmp)
+            raise
@@ -562,10 +562,11 @@ class SurfacePartsBetweenPlanesByNumber(PartsBuilder):
         n = int(n)
         first_index = int(first_index)
 
-        builder = PlanesBetweenPlanesByNumber(pln1, pln2, n, d1, d2)
+        builder = PlanesBetweenPlanesByNumber(pln1, pln2, n, d1, d2,
+                                              lazy=True)
 
         self._ds = builder.spacing
-        for pln in builder.planes:
+        for pln, _, _ in builder.iter_planes():
             basis_shape = FaceBySurface(pln).face
             label_indx = delimiter.join([name, str(first_index)])
             part = SurfacePartBetweenShapes(label_indx, shape1, shape2, body,
@@ -615,10 +616,11 @@ class SurfacePartsBetweenPlanesByDistance(PartsBuilder):
 
         first_index = int(first_index)
 
-        builder = PlanesBetweenPlanesByDistance(pln1, pln2, maxd, d1, d2, nmin)
+        builder = PlanesBetweenPlanesByDistance(pln1, pln2, maxd, d1, d2, nmin,
+                                                lazy=True)
 
         self._ds = builder.spacing
-        for pln in builder.planes:
+        for pln, _, _ in builder.iter_planes():
             basis_shape = FaceBySurface(pln).face
             label_indx = delimiter.join([name, str(first_index)])
             part = SurfacePartBetweenShapes(label_indx, shape1, shape2, body,
@@ -674,10 +676,10 @@ class SurfacePartsAlongCurveByNumber(PartsBuilder):
         first_index = int(first_index)
 
         builder = PlanesAlongCurveByNumber(crv, n, ref_pln, u1, u2, d1, d2,
-                                           tol)
+                                           tol, lazy=True)
 
         self._ds = builder.spacing
-        for pln in builder.planes:
+        for pln, _, _ in builder.iter_planes():
             basis_shape = FaceBySurface(pln).face
             label_indx = delimiter.join([name, str(first_index)])
             part = SurfacePartBetweenShapes(label_indx, shape1, shape2, body,
@@ -734,10 +736,10 @@ class SurfacePartsAlongCurveByDistance(PartsBuilder):
         first_index = int(first_index)
 
         builder = PlanesAlongCurveByDistance(crv, maxd, ref_pln, u1, u2, d1,
-                                             d2, nmin, tol)
+                                             d2, nmin, tol, lazy=True)
 
         self._ds = builder.spacing
-        for pln in builder.planes:
+        for pln, _, _ in builder.iter_planes():
             basis_shape = FaceBySurface(pln).face
             label_indx = delimiter.join([name, str(first_index)])
             part = SurfacePartBetweenShapes(label_indx, shape1, shape2, body,
@@ -1450,14 +1452,15 @@ class RibsAlongCurveAndSurfaceByDistance(PartsBuilder):
         first_index = int(first_index)
 
         builder = PlanesAlongCurveAndSurfaceByDistance(crv, srf, maxd, u1, u2,
-                                                       d1, d2, nmin, tol)
+                                                       d1, d2, nmin, tol,
+                                                       lazy=True)
         if rot_x is not None:
             builder.rotate_x(rot_x)
         if rot_y is not None:
             builder.rotate_y(rot_y)
 
         self._ds = builder.spacing
-        for pln in builder.planes:
+        for pln, _, _ in builder.iter_planes():
             basis_shape = FaceBySurface(pln).face
             label_indx = delimiter.join([name, str(first_index)])
             part = RibBetweenShapes(label_indx, shape1, shape2, body,
@@ -1659,10 +1662,11 @@ class FramesBetweenPlanesByNumber(PartsBuilder):
         n = int(n)
         first_index = int(first_index)
 
-        builder = PlanesBetweenPlanesByNumber(pln1, pln2, n, d1, d2)
+        builder = PlanesBetweenPlanesByNumber(pln1, pln2, n, d1, d2,
+                                              lazy=True)
 
         self._ds = builder.spacing
-        for pln in builder.planes:
+        for pln, _, _ in builder.iter_planes():
             label_indx = delimiter.join([name, str(first_index)])
             frame = FrameByPlane(label_indx, pln, body, height, group).part
             first_index += 1
@@ -1702,10 +1706,11 @@ class FramesBetweenPlanesByDistance(PartsBuilder):
 
         first_index = int(first_index)
 
-        builder = PlanesBetweenPlanesByDistance(pln1, pln2, maxd, d1, d2, nmin)
+        builder = PlanesBetweenPlanesByDistance(pln1, pln2, maxd, d1, d2, nmin,
+                                                lazy=True)
 
         self._ds = builder.spacing
-        for pln in builder.planes:
+        for pln, _, _ in builder.iter_planes():
             label_indx = delimiter.join([name, str(first_index)])
             frame = FrameByPlane(label_indx, pln, body, height, group).part
             first_index += 1
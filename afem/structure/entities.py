@@ -28,7 +28,7 @@ from afem.structure.group import GroupAPI
 from afem.structure.utils import shape_of_entity
 from afem.topology.bop import (CutCylindricalHole, CutShapes, FuseShapes,
                                IntersectShapes, LocalSplit, SplitShapes)
-from afem.topology.check import CheckShape, ClassifyPointInSolid
+from afem.topology.check import CheckShape, ClassifyPointsInSolid
 from afem.topology.create import (CompoundByShapes, HalfspaceBySurface,
                                   PointAlongShape, WiresByShape, FaceByPlane,
                                   SolidByDrag)
@@ -300,24 +300,20 @@ class Part(ShapeHolder):
         if tol is None:
             tol = self.shape.tol_avg
 
-        rebuild = RebuildShapeWithShapes(self._shape)
-        classifer = ClassifyPointInSolid(solid, tol=tol)
-
-        modified = False
-        for shape in shapes:
-            if isinstance(self, CurvePart):
-                cg = LinearProps(shape).cg
-            else:
-                cg = SurfaceProps(shape).cg
-
-            classifer.perform(cg, tol)
-            if classifer.is_in:
-                rebuild.remove(shape)
-                modified = True
+        if isinstance(self, CurvePart):
+            cgs = [LinearProps(shape).cg for shape in shapes]
+        else:
+            cgs = [SurfaceProps(shape).cg for shape in shapes]
 
-        if not modified:
+        is_in = ClassifyPointsInSolid(solid, cgs, tol).is_in
+        if not is_in.any():
             return False
 
+        rebuild = RebuildShapeWithShapes(self._shape)
+        for shape, flag in zip(shapes, is_in):
+            if flag:
+                rebuild.remove(shape)
+
         new_shape = rebuild.apply()
         self.set_shape(new_shape)
         return True
@@ -22,7 +22,7 @@ from numpy import mean
 from afem.structure.entities import SurfacePart
 from afem.topology.bop import FuseShapes, IntersectShapes, SplitShapes
 from afem.topology.create import CompoundByShapes, EdgeByCurve
-from afem.topology.entities import Shape
+from afem.topology.entities import Shape, ShapeIndex
 from afem.topology.modify import RebuildShapesByTool, SewShape
 from afem.config import logger
 
@@ -100,16 +100,33 @@ class FuseSurfacePartsByCref(object):
                 msg = 'Part is not a surface part.'
                 raise TypeError(msg)
 
-        # Test all combinations of parts for intersection of reference curve
+        # Index the reference curves so only pairs with overlapping bounding
+        # boxes are tested for intersection
+        edges = {}
+        for part in parts:
+            if part.has_cref:
+                edges[part] = EdgeByCurve(part.cref).edge
+        if tol is None:
+            box_tol = max([part.shape.tol_max for part in edges] + [0.])
+        else:
+            box_tol = tol
+        cref_index = ShapeIndex(edges.values(), box_tol)
+
+        # Test combinations of nearby parts for intersection of reference
+        # curve
         join_parts = []
         main_parts = []
         nparts = len(parts)
         for i in range(0, nparts - 1):
             main = parts[i]
+            if main not in edges:
+                continue
+            e1 = edges[main]
+            nearby = {id(e) for e in cref_index.overlap(e1)}
             other_parts = []
             for j in range(i + 1, nparts):
                 other = parts[j]
-                if not main.has_cref or not other.has_cref:
+                if other not in edges or id(edges[other]) not in nearby:
                     continue
                 if tol is None:
                     tol1 = main.shape.tol_max
@@ -117,8 +134,7 @@ class FuseSurfacePartsByCref(object):
                     _tol = max(tol1, tol2)
                 else:
                     _tol = tol
-                e1 = EdgeByCurve(main.cref).edge
-                e2 = EdgeByCurve(other.cref).edge
+                e2 = edges[other]
                 bop = IntersectShapes(e1, e2, fuzzy_val=_tol)
                 if not bop.vertices:
                     continue
@@ -25,11 +25,14 @@ from OCCT.BRepAlgoAPI import (BRepAlgoAPI_Common, BRepAlgoAPI_Cut,
                               BRepAlgoAPI_Splitter)
 from OCCT.BRepFeat import BRepFeat_MakeCylindricalHole, BRepFeat_SplitShape
 from OCCT.Message import Message_Gravity
+from OCCT.TopAbs import TopAbs_EDGE
+from OCCT.TopExp import TopExp_Explorer
 from OCCT.TopTools import TopTools_SequenceOfShape
 from OCCT.TopoDS import TopoDS_Face
 
 from afem.config import logger
 from afem.geometry.entities import Surface
+from afem.geometry.intersect import IntersectionCache
 from afem.occ.utils import to_topods_list
 from afem.topology.entities import Shape, Face, Solid, Compound
 from afem.topology.explore import ExploreWire
@@ -442,16 +445,31 @@ class IntersectShapes(BopAlgo):
     :param bool approximate: Option to approximate intersection curves.
     :param float fuzzy_val: Fuzzy tolerance value.
     :param bool nondestructive: Option to not modify the input shapes.
+    :param cache: Cache for the results. If not provided the global cache
+        is used if enabled. A cached result holds the resulting shape and the
+        ancestor faces of the section edges, and is never modified.
+    :type cache: afem.geometry.intersect.IntersectionCache or None
 
     .. note::
 
         If *shape1* or *shape2* is *None* then the user is expected to manually
-        set the arguments and tools and build the result.
+        set the arguments and tools and build the result. The cache is not
+        used in this case.
+
+    .. note::
+
+        If the result is taken from the cache, the intersection is only
+        computed again if a method needing the OpenCASCADE tool is used
+        (e.g., :meth:`.refine_edges` or :meth:`.modified`) or if
+        :meth:`.build` is called.
     """
 
+    # Cached result used in place of building the tool
+    _result = None
+
     def __init__(self, shape1=None, shape2=None, compute_pcurve1=False,
                  compute_pcurve2=False, approximate=False, fuzzy_val=None,
-                 nondestructive=False):
+                 nondestructive=False, cache=None):
         super(IntersectShapes, self).__init__(None, None, fuzzy_val,
                                               nondestructive,
                                               BRepAlgoAPI_Section)
@@ -469,8 +487,154 @@ class IntersectShapes(BopAlgo):
             self._bop.Init2(shape2.object)
             build2 = True
 
-        if build1 and build2:
-            self._bop.Build()
+        if not build1 or not build2:
+            return
+
+        if cache is None:
+            cache = IntersectionCache.get_default()
+
+        key = None
+        if cache is not None:
+            key = cache.key('section', shape1, shape2, compute_pcurve1,
+                            compute_pcurve2, approximate, fuzzy_val,
+                            nondestructive)
+            result = cache.get(key)
+            if result is not None:
+                self._result = result
+                return
+
+        self._bop.Build()
+        if key is not None and self._bop.IsDone():
+            cache.put(key, _SectionResult(self._bop))
+
+    def _use_tool(self):
+        """
+        Build the tool if the result was taken from the cache so it can be
+        used directly.
+        """
+        if self._result is not None:
+            self.build()
+
+    def build(self):
+        """
+        Build the results. A result taken from the cache is discarded.
+
+        :return: None.
+        """
+        self._result = None
+        super(IntersectShapes, self).build()
+
+    @property
+    def is_done(self):
+        """
+        :return: *True* if operation is done, *False* if not.
+        :rtype: bool
+        """
+        if self._result is not None:
+            return True
+        return super(IntersectShapes, self).is_done
+
+    @property
+    def shape(self):
+        """
+        :return: The resulting shape.
+        :rtype: afem.topology.entities.Shape
+        """
+        if self._result is not None:
+            return Shape.wrap(_copy(self._result.shape))
+        return super(IntersectShapes, self).shape
+
+    @property
+    def section_edges(self):
+        """
+        :return: A list of section edges as a result of intersection between
+            the shapes.
+        :rtype: list(afem.topology.entities.Edge)
+        """
+        if self._result is not None:
+            return [Shape.wrap(_copy(e)) for e in self._result.edges]
+        return super(IntersectShapes, self).section_edges
+
+    def modified(self, shape):
+        """
+        Return a list of shapes modified from the given shape.
+
+        :param afem.topology.entities.Shape shape: The shape.
+
+        :return: List of modified shapes.
+        :rtype: list(afem.topology.entities.Shape)
+        """
+        self._use_tool()
+        return super(IntersectShapes, self).modified(shape)
+
+    def generated(self, shape):
+        """
+        Return a list of shapes generated from the given shape.
+
+        :param afem.topology.entities.Shape shape: The shape.
+
+        :return: List of generated shapes.
+        :rtype: list(afem.topology.entities.Shape)
+        """
+        self._use_tool()
+        return super(IntersectShapes, self).generated(shape)
+
+    def is_deleted(self, shape):
+        """
+        Check to see if shape is deleted.
+
+        :param afem.topology.entities.Shape shape: The shape.
+
+        :return: *True* if deleted, *False* if not.
+        :rtype: bool
+        """
+        self._use_tool()
+        return super(IntersectShapes, self).is_deleted(shape)
+
+    def refine_edges(self):
+        """
+        Fuse C1 edges.
+
+        :return: None.
+        """
+        self._use_tool()
+        super(IntersectShapes, self).refine_edges()
+
+    @property
+    def fuse_edges(self):
+        """
+        :return: The result flag of edge refining.
+        :rtype: bool
+        """
+        self._use_tool()
+        return super(IntersectShapes, self).fuse_edges
+
+    @property
+    def has_modified(self):
+        """
+        :return: *True* if there is at least one modified shape.
+        :rtype: bool
+        """
+        self._use_tool()
+        return super(IntersectShapes, self).has_modified
+
+    @property
+    def has_generated(self):
+        """
+        :return: *True* if there is at least one generated shape.
+        :rtype: bool
+        """
+        self._use_tool()
+        return super(IntersectShapes, self).has_generated
+
+    @property
+    def has_deleted(self):
+        """
+        :return: *True* if there is at least one deleted shape.
+        :rtype: bool
+        """
+        self._use_tool()
+        return super(IntersectShapes, self).has_deleted
 
     def has_ancestor_face1(self, edge):
         """
@@ -482,6 +646,9 @@ class IntersectShapes(BopAlgo):
         :return: *True* and the face if available, *False* and *None* if not.
         :rtype: tuple(bool, afem.topology.entities.Face or None)
         """
+        if self._result is not None:
+            return self._result.ancestor_face(edge, self._result.faces1)
+
         f = TopoDS_Face()
         if self._bop.HasAncestorFaceOn1(edge.object, f):
             return True, Face(f)
@@ -497,12 +664,55 @@ class IntersectShapes(BopAlgo):
         :return: *True* and the face if available, *False* and *None* if not.
         :rtype: tuple(bool, afem.topology.entities.Face or None)
         """
+        if self._result is not None:
+            return self._result.ancestor_face(edge, self._result.faces2)
+
         f = TopoDS_Face()
         if self._bop.HasAncestorFaceOn2(edge.object, f):
             return True, Face(f)
         return False, None
 
 
+class _SectionResult(object):
+    """
+    Immutable result of a section stored in an intersection cache.
+    """
+
+    def __init__(self, bop):
+        self.shape = _copy(bop.Shape())
+        self.edges = [_copy(e) for e in bop.SectionEdges()]
+        self.faces1 = []
+        self.faces2 = []
+
+        exp = TopExp_Explorer(self.shape, TopAbs_EDGE)
+        while exp.More():
+            e = exp.Current()
+            f = TopoDS_Face()
+            if bop.HasAncestorFaceOn1(e, f):
+                self.faces1.append((e, f))
+            f = TopoDS_Face()
+            if bop.HasAncestorFaceOn2(e, f):
+                self.faces2.append((e, f))
+            exp.Next()
+
+    @staticmethod
+    def ancestor_face(edge, faces):
+        """
+        Find the ancestor face of the edge.
+        """
+        for e, f in faces:
+            if e.IsSame(edge.object):
+                return True, Face(_copy(f))
+        return False, None
+
+
+def _copy(shape):
+    """
+    Copy the shape handle so the cached shape is not reoriented or moved.
+    """
+    return shape.Located(shape.Location())
+
+
 class SplitShapes(BopAlgo):
     """
     Split arbitrary shapes. This is a wrapper for the SALOME
@@ -17,15 +17,18 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+from OCCT.BRep import BRep_Tool
 from OCCT.BRepCheck import BRepCheck_Analyzer, BRepCheck_NoError
 from OCCT.BRepClass3d import BRepClass3d_SolidClassifier
 from OCCT.TopAbs import TopAbs_IN, TopAbs_ON, TopAbs_OUT, TopAbs_UNKNOWN
+from OCCT.gp import gp_Pnt
+from numpy import arange, array, empty, float64, full, int32
 
 from afem.config import logger
 from afem.geometry.check import CheckGeom
-from afem.topology.entities import Face
+from afem.topology.entities import BBox, Face
 
-__all__ = ["CheckShape", "ClassifyPointInSolid"]
+__all__ = ["CheckShape", "ClassifyPointInSolid", "ClassifyPointsInSolid"]
 
 
 def _invalid_subshapes(shape, check, errors):
@@ -188,3 +191,133 @@ class ClassifyPointInSolid(object):
         :rtype: afem.topology.entities.Face
         """
         return Face(self._tool.Face())
+
+
+class ClassifyPointsInSolid(object):
+    """
+    Classify many points in a solid. Points outside the bounding box of a
+    finite solid are classified as outside without calling the classifier,
+    and the remaining points reuse a single classifier.
+
+    :param afem.topology.entities.Solid solid: The solid.
+    :param pnts: The points.
+    :type pnts: numpy.ndarray or collections.Sequence(point_like)
+    :param float tol: The tolerance.
+
+    :raise TypeError: If a point cannot be converted to a point.
+    """
+
+    def __init__(self, solid, pnts, tol=1.0e-7):
+        xyz = _to_xyz(pnts)
+        npts = xyz.shape[0]
+        self._states = full(npts, int(TopAbs_OUT), dtype=int32)
+
+        # Only points inside the bounding box need the classifier
+        bounds = _finite_bounds(solid, tol)
+        if bounds is None:
+            indx = arange(npts)
+        else:
+            mask = ((xyz >= bounds[:3]) & (xyz <= bounds[3:])).all(axis=1)
+            indx = mask.nonzero()[0]
+
+        tool = BRepClass3d_SolidClassifier(solid.object)
+        for i in indx:
+            tool.Perform(gp_Pnt(*xyz[i]), tol)
+            self._states[i] = int(tool.State())
+
+    @property
+    def npts(self):
+        """
+        :return: The number of points.
+        :rtype: int
+        """
+        return self._states.size
+
+    @property
+    def states(self):
+        """
+        :return: The state of each point as the integer value of
+            *TopAbs_State*.
+        :rtype: numpy.ndarray
+        """
+        return self._states
+
+    @property
+    def is_in(self):
+        """
+        :return: Mask of the points that are in the solid.
+        :rtype: numpy.ndarray
+        """
+        return self._states == int(TopAbs_IN)
+
+    @property
+    def is_out(self):
+        """
+        :return: Mask of the points that are outside the solid.
+        :rtype: numpy.ndarray
+        """
+        return self._states == int(TopAbs_OUT)
+
+    @property
+    def is_on(self):
+        """
+        :return: Mask of the points that are on the solid.
+        :rtype: numpy.ndarray
+        """
+        return self._states == int(TopAbs_ON)
+
+    @property
+    def is_unknown(self):
+        """
+        :return: Mask of the points where the classification is unknown.
+        :rtype: numpy.ndarray
+        """
+        return self._states == int(TopAbs_UNKNOWN)
+
+
+def _to_xyz(pnts):
+    """
+    Convert the points to an array of shape (N, 3).
+    """
+    try:
+        xyz = array(pnts, dtype=float64)
+    except (TypeError, ValueError):
+        xyz = None
+
+    if xyz is not None and xyz.ndim == 2 and xyz.shape[1] == 3:
+        return xyz
+    if xyz is not None and xyz.size == 0:
+        return empty((0, 3), dtype=float64)
+
+    xyz = empty((len(pnts), 3), dtype=float64)
+    for i, p in enumerate(pnts):
+        p = CheckGeom.to_point(p)
+        if not p:
+            raise TypeError('Invalid point type provided.')
+        xyz[i] = p.xyz
+    return xyz
+
+
+def _finite_bounds(solid, tol):
+    """
+    Get the bounds of the solid if it is finite, otherwise *None*. The solid
+    is treated as finite if its shells are closed and a point beyond its
+    bounding box is outside of it.
+    """
+    bbox = BBox()
+    bbox.add_shape(solid)
+    if bbox.is_void or bbox.IsOpen():
+        return None
+
+    for shell in solid.shells:
+        if not BRep_Tool.IsClosed_(shell.object):
+            return None
+
+    bbox.enlarge(tol)
+    bounds = array(bbox.Get(), dtype=float64)
+
+    probe = bounds[3:] + (bounds[3:] - bounds[:3]) + 1.
+    tool = BRepClass3d_SolidClassifier(solid.object, gp_Pnt(*probe), tol)
+    if tool.State() != TopAbs_OUT:
+        return None
+    return bounds
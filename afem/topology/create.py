@@ -35,6 +35,7 @@ from OCCT.ShapeAnalysis import ShapeAnalysis_FreeBounds
 from OCCT.TopLoc import TopLoc_Location
 from OCCT.TopTools import TopTools_HSequenceOfShape
 from OCCT.TopoDS import TopoDS_Compound, TopoDS_Shell
+from OCCT.gp import gp_Pnt
 
 from afem.adaptor.entities import AdaptorCurve
 from afem.geometry.check import CheckGeom
@@ -43,7 +44,7 @@ from afem.geometry.create import (CircleBy3Points, PlaneByApprox,
                                   PointsAlongCurveByDistance,
                                   PlanesAlongCurveByNumber,
                                   PlanesAlongCurveByDistance)
-from afem.geometry.entities import Geometry, Curve, Plane
+from afem.geometry.entities import Geometry, Curve, Plane, PointArray
 from afem.geometry.project import ProjectPointToCurve
 from afem.topology.bop import IntersectShapes
 from afem.topology.entities import (Shape, Vertex, Edge, Wire, Face, Shell,
@@ -398,15 +399,23 @@ class WireByPoints(object):
     """
     Create a polygonal wire by connecting points.
 
-    :param collections.Sequence(point_like) pnts: The ordered points.
+    :param pnts: The ordered points.
+    :type pnts: collections.Sequence(point_like) or
+        afem.geometry.entities.PointArray
     :param bool close: Option to close the wire.
     """
 
     def __init__(self, pnts, close=False):
         builder = BRepBuilderAPI_MakePolygon()
-        for p in pnts:
-            p = CheckGeom.to_point(p)
-            builder.Add(p)
+        if isinstance(pnts, PointArray):
+            p = gp_Pnt()
+            for xyz in pnts.xyz.tolist():
+                p.SetCoord(*xyz)
+                builder.Add(p)
+        else:
+            for p in pnts:
+                p = CheckGeom.to_point(p)
+                builder.Add(p)
         if close:
             builder.Close()
         self._w = Wire(builder.Wire())
@@ -1496,13 +1505,15 @@ class PlanesAlongShapeByNumber(PlanesAlongCurveByNumber):
         point. This shape is intersected with the edge or wire.
     :param afem.topology.entities.Shape shape2: A shape to define the last
         point. This shape is intersected with the edge or wire.
+    :param bool lazy: Option to delay creating the planes until they are
+        requested.
 
     :raise TypeError: If *shape* if not an edge or wire.
     :raise RuntimeError: If OCC method fails.
     """
 
     def __init__(self, shape, n, ref_pln=None, d1=None, d2=None, shape1=None,
-                 shape2=None):
+                 shape2=None, lazy=False):
         adp_crv = AdaptorCurve.to_adaptor(shape)
 
         u1 = adp_crv.u1
@@ -1516,7 +1527,8 @@ class PlanesAlongShapeByNumber(PlanesAlongCurveByNumber):
             u2 = _param_on_adp_crv(adp_crv, shape, shape2)
 
         super(PlanesAlongShapeByNumber, self).__init__(adp_crv, n, ref_pln,
-                                                       u1, u2, d1, d2)
+                                                       u1, u2, d1, d2,
+                                                       lazy=lazy)
 
 
 class PlanesAlongShapeByDistance(PlanesAlongCurveByDistance):
@@ -1540,13 +1552,15 @@ class PlanesAlongShapeByDistance(PlanesAlongCurveByDistance):
     :param afem.topology.entities.Shape shape2: A shape to define the last
         point. This shape is intersected with the edge or wire.
     :param int nmin: Minimum number of planes to create.
+    :param bool lazy: Option to delay creating the planes until they are
+        requested.
 
     :raise TypeError: If *shape* if not an edge or wire.
     :raise RuntimeError: If OCC method fails.
     """
 
     def __init__(self, shape, maxd, ref_pln=None, d1=None, d2=None,
-                 shape1=None, shape2=None, nmin=0):
+                 shape1=None, shape2=None, nmin=0, lazy=False):
         adp_crv = AdaptorCurve.to_adaptor(shape)
 
         u1 = adp_crv.u1
@@ -1561,7 +1575,7 @@ class PlanesAlongShapeByDistance(PlanesAlongCurveByDistance):
 
         super(PlanesAlongShapeByDistance, self).__init__(adp_crv, maxd,
                                                          ref_pln, u1, u2, d1,
-                                                         d2, nmin)
+                                                         d2, nmin, lazy=lazy)
 
 
 def _param_on_adp_crv(adp_crv, shape, other_shape):
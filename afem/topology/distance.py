@@ -17,15 +17,17 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+
 from OCCT.BRepExtrema import (BRepExtrema_DistShapeShape, BRepExtrema_IsVertex,
                               BRepExtrema_IsOnEdge, BRepExtrema_IsInFace)
 from OCCT.Extrema import Extrema_ExtFlag_MIN
+from numpy import isfinite, where
 
 from afem.adaptor.entities import FaceAdaptorSurface
 from afem.config import logger
 from afem.geometry.check import CheckGeom
 from afem.geometry.entities import Point, Direction
-from afem.topology.entities import Shape, Vertex
+from afem.topology.entities import Shape, ShapeIndex, Vertex
 
 __all__ = ["DistanceShapeToShape", "DistanceShapeToShapes",
            "DistancePointToShapes"]
@@ -316,17 +318,24 @@ class DistanceShapeToShapes(object):
 
     :param afem.topology.entities.Shape shape: The main shape.
     :param list(afem.topology.entities.Shape) other_shapes: The other shapes.
+    :param int k: If provided, only the *k* nearest shapes are found. The
+        other shapes are visited in order of the distance between bounding
+        boxes and the search stops once that distance exceeds the current
+        *k-th* distance. If *None* all the shapes are evaluated.
+
+    .. note::
+
+        When *k* is provided the results only include the *k* nearest
+        shapes, so :attr:`.dmax` and :attr:`.farthest_shape` refer to the
+        *k-th* nearest shape.
     """
 
-    def __init__(self, shape, other_shapes):
-        results = []
-        for shape2 in other_shapes:
-            dist = DistanceShapeToShape(shape, shape2)
-            if dist.nsol == 0:
-                logger.warning("Could not calculate distance to a shape in "
-                               "DistanceShapeToShapes tool. Continuing...")
-                continue
-            results.append((dist.dmin, shape2))
+    def __init__(self, shape, other_shapes, k=None):
+        other_shapes = list(other_shapes)
+        if k is None:
+            results = _distances(shape, other_shapes)
+        else:
+            results = _nearest_distances(shape, other_shapes, int(k))
 
         results.sort(key=lambda tup: tup[0])
         self._distances = [data[0] for data in results]
@@ -389,14 +398,64 @@ class DistancePointToShapes(DistanceShapeToShapes):
 
     :param point_like pnt: The point.
     :param list(afem.topology.entities.Shape) other_shapes: The other shapes.
+    :param int k: If provided, only the *k* nearest shapes are found.
 
     :raise TypeError: If *pnt* cannot be converted to a point.
     """
 
-    def __init__(self, pnt, other_shapes):
+    def __init__(self, pnt, other_shapes, k=None):
         pnt = CheckGeom.to_point(pnt)
         if not pnt:
             raise TypeError('Invalid point type provided.')
 
         v = Vertex.by_point(pnt)
-        super(DistancePointToShapes, self).__init__(v, other_shapes)
+        super(DistancePointToShapes, self).__init__(v, other_shapes, k)
+
+
+def _distances(shape, other_shapes):
+    """
+    Calculate the distance from the shape to each of the other shapes.
+    Shapes where the distance could not be calculated are skipped.
+    """
+    results = []
+    for shape2 in other_shapes:
+        dist = DistanceShapeToShape(shape, shape2)
+        if dist.nsol == 0:
+            logger.warning("Could not calculate distance to a shape in "
+                           "DistanceShapeToShapes tool. Continuing...")
+            continue
+        results.append((dist.dmin, shape2))
+    return results
+
+
+def _nearest_distances(shape, other_shapes, k):
+    """
+    Calculate the distance from the shape to the *k* nearest other shapes,
+    visiting them in order of the bounding box lower bound.
+    """
+    if k < 1:
+        return []
+
+    shape = Shape.to_shape(shape)
+    converted = [Shape.to_shape(shape2) for shape2 in other_shapes]
+    lookup = dict((id(s), shape2) for s, shape2 in
+                  zip(converted, other_shapes))
+
+    index = ShapeIndex(converted)
+    candidates, bounds = index.lower_bounds(shape)
+    # A void box on the main shape gives no useful bound
+    bounds = where(isfinite(bounds), bounds, 0.).tolist()
+
+    # Shapes without a bounding box cannot be pruned so visit them first
+    visited = set(id(s) for s in candidates)
+    extra = [s for s in converted if id(s) not in visited]
+    candidates = [lookup[id(s)] for s in extra + candidates]
+    bounds = [0.] * len(extra) + bounds
+
+    results = []
+    for shape2, bound in zip(candidates, bounds):
+        if len(results) >= k and bound > results[k - 1][0]:
+            break
+        results += _distances(shape, [shape2])
+        results.sort(key=lambda tup: tup[0])
+    return results[:k]
@@ -38,19 +38,26 @@ from OCCT.ShapeAnalysis import ShapeAnalysis_Edge, ShapeAnalysis_ShapeTolerance
 from OCCT.ShapeFix import ShapeFix_Solid
 from OCCT.TopAbs import TopAbs_ShapeEnum
 from OCCT.TopExp import TopExp
-from OCCT.TopTools import TopTools_IndexedMapOfShape
+from OCCT.TopTools import (TopTools_IndexedDataMapOfShapeListOfShape,
+                           TopTools_IndexedMapOfShape)
 from OCCT.TopoDS import (TopoDS, TopoDS_Vertex, TopoDS_Edge, TopoDS_Wire,
                          TopoDS_Face, TopoDS_Shell, TopoDS_Solid,
                          TopoDS_Compound, TopoDS_CompSolid, TopoDS_Shape,
                          TopoDS_Iterator)
 
+from numpy import abs as np_abs, sqrt as np_sqrt
+from numpy import (argsort, array, asarray, concatenate, empty, errstate,
+                   float64, inf, isfinite, maximum, minimum, where, zeros)
+from scipy.spatial import KDTree
+
 from afem.base.entities import ViewableItem
 from afem.geometry.check import CheckGeom
 from afem.geometry.entities import Point, Curve, Surface
+from afem.misc.utils import is_array_like
 
 __all__ = ["Shape", "Vertex", "Edge", "Wire", "Face", "Shell", "Solid",
            "Compound", "CompSolid",
-           "BBox"]
+           "BBox", "ShapeIndex"]
 
 
 class Shape(ViewableItem):
@@ -83,6 +90,10 @@ class Shape(ViewableItem):
     COMPSOLID = TopAbs_ShapeEnum.TopAbs_COMPSOLID
     COMPOUND = TopAbs_ShapeEnum.TopAbs_COMPOUND
 
+    # Topology cache counters for all shapes
+    _cache_hits = 0
+    _cache_misses = 0
+
     def __init__(self, shape):
         if not isinstance(shape, TopoDS_Shape):
             raise TypeError('A TopoDS_Shape was not provided.')
@@ -91,6 +102,11 @@ class Shape(ViewableItem):
         # The underlying OCCT shape
         self._shape = shape
 
+        # Cached sub-shape and ancestor maps
+        self._topo_cache = {}
+        self._hits = 0
+        self._misses = 0
+
     def __hash__(self):
         """
         Use the hash code of the shape.
@@ -296,9 +312,7 @@ class Shape(ViewableItem):
         :return: The number of vertices in the shape.
         :rtype: int
         """
-        map_ = TopTools_IndexedMapOfShape()
-        TopExp.MapShapes_(self.object, Shape.VERTEX, map_)
-        return map_.Extent()
+        return self._indexed_map(Shape.VERTEX).Extent()
 
     @property
     def num_edges(self):
@@ -306,9 +320,7 @@ class Shape(ViewableItem):
         :return: The number of edges in the shape.
         :rtype: int
         """
-        map_ = TopTools_IndexedMapOfShape()
-        TopExp.MapShapes_(self.object, Shape.EDGE, map_)
-        return map_.Extent()
+        return self._indexed_map(Shape.EDGE).Extent()
 
     @property
     def num_faces(self):
@@ -316,9 +328,7 @@ class Shape(ViewableItem):
         :return: The number of faces in the shape.
         :rtype: int
         """
-        map_ = TopTools_IndexedMapOfShape()
-        TopExp.MapShapes_(self.object, Shape.FACE, map_)
-        return map_.Extent()
+        return self._indexed_map(Shape.FACE).Extent()
 
     @property
     def tol_avg(self):
@@ -415,17 +425,110 @@ class Shape(ViewableItem):
         """
         return None
 
+    @property
+    def cache_info(self):
+        """
+        :return: The number of hits and misses of the topology cache of this
+            shape and the number of cached items.
+        :rtype: dict
+        """
+        return {'hits': self._hits, 'misses': self._misses,
+                'size': len(self._topo_cache)}
+
+    @classmethod
+    def global_cache_info(cls):
+        """
+        Get the number of hits and misses of the topology cache of all
+        shapes.
+
+        :return: The hits and misses.
+        :rtype: dict
+        """
+        return {'hits': Shape._cache_hits, 'misses': Shape._cache_misses}
+
+    def invalidate_cache(self):
+        """
+        Clear the cached sub-shape and ancestor maps of the shape. This is
+        needed if the underlying shape was modified in place.
+
+        :return: None.
+        """
+        self._topo_cache.clear()
+
+    def _cached(self, key, build):
+        """
+        Get an item from the topology cache or build it.
+        """
+        try:
+            item = self._topo_cache[key]
+        except KeyError:
+            item = build()
+            self._topo_cache[key] = item
+            self._misses += 1
+            Shape._cache_misses += 1
+            return item
+        self._hits += 1
+        Shape._cache_hits += 1
+        return item
+
+    def _indexed_map(self, type_):
+        """
+        Get the indexed map of sub-shapes of a specified type.
+        """
+
+        def build():
+            map_ = TopTools_IndexedMapOfShape()
+            TopExp.MapShapes_(self.object, type_, map_)
+            return map_
+
+        return self._cached(('map', type_), build)
+
     def _get_shapes(self, type_):
         """
         Get sub-shapes of a specified type from the shape.
         """
-        map_ = TopTools_IndexedMapOfShape()
-        TopExp.MapShapes_(self.object, type_, map_)
+
+        # Only the map is cached. Each sub-shape gets a new handle so that
+        # modifying it in place (e.g., reversing) does not reach the map.
+        map_ = self._indexed_map(type_)
         shapes = []
         for i in range(1, map_.Size() + 1):
-            shapes.append(Shape.wrap(map_.FindKey(i)))
+            shape = map_.FindKey(i)
+            shapes.append(Shape.wrap(shape.Located(shape.Location())))
         return shapes
 
+    def _ancestor_map(self, type_, ancestor_type):
+        """
+        Get the map of sub-shapes of a type to their ancestors of another
+        type.
+        """
+
+        def build():
+            map_ = TopTools_IndexedDataMapOfShapeListOfShape()
+            TopExp.MapShapesAndUniqueAncestors_(self.object, type_,
+                                                ancestor_type, map_)
+            return map_
+
+        return self._cached(('ancestors', type_, ancestor_type), build)
+
+    def ancestors(self, shape, ancestor_type):
+        """
+        Get the ancestors of a sub-shape in this shape (e.g., the faces of an
+        edge or the edges of a vertex). The ancestor maps are cached.
+
+        :param afem.topology.entities.Shape shape: The sub-shape.
+        :param OCCT.TopAbs.TopAbs_ShapeEnum ancestor_type: The type of the
+            ancestors.
+
+        :return: The ancestors. The list is empty if the sub-shape is not in
+            this shape.
+        :rtype: list(afem.topology.entities.Shape)
+        """
+        map_ = self._ancestor_map(shape.shape_type, ancestor_type)
+        if not map_.Contains(shape.object):
+            return []
+        return Shape.from_topods_list(map_.FindFromKey(shape.object))
+
     def nullify(self):
         """
         Destroy reference to underlying shape and make it null.
@@ -433,6 +536,7 @@ class Shape(ViewableItem):
         :return: None.
         """
         self.object.Nullify()
+        self.invalidate_cache()
 
     def reverse(self):
         """
@@ -441,6 +545,7 @@ class Shape(ViewableItem):
         :return: None.
         """
         self.object.Reverse()
+        self.invalidate_cache()
 
     def reversed(self):
         """
@@ -510,13 +615,11 @@ class Shape(ViewableItem):
         :rtype: list(afem.topology.entities.Vertex) or
             afem.topology.entities.Compound
         """
-        this_map = TopTools_IndexedMapOfShape()
-        TopExp.MapShapes_(self.object, Shape.VERTEX, this_map)
+        this_map = self._indexed_map(Shape.VERTEX)
         if this_map.Extent() == 0:
             return []
 
-        other_map = TopTools_IndexedMapOfShape()
-        TopExp.MapShapes_(other.object, Shape.VERTEX, other_map)
+        other_map = other._indexed_map(Shape.VERTEX)
         if other_map.Extent() == 0:
             return []
 
@@ -542,13 +645,11 @@ class Shape(ViewableItem):
         :rtype: list(afem.topology.entities.Edge) or
             afem.topology.entities.Compound
         """
-        this_map = TopTools_IndexedMapOfShape()
-        TopExp.MapShapes_(self.object, Shape.EDGE, this_map)
+        this_map = self._indexed_map(Shape.EDGE)
         if this_map.Extent() == 0:
             return []
 
-        other_map = TopTools_IndexedMapOfShape()
-        TopExp.MapShapes_(other.object, Shape.EDGE, other_map)
+        other_map = other._indexed_map(Shape.EDGE)
         if other_map.Extent() == 0:
             return []
 
@@ -574,13 +675,11 @@ class Shape(ViewableItem):
         :rtype: list(afem.topology.entities.Face) or
             afem.topology.entities.Compound
         """
-        this_map = TopTools_IndexedMapOfShape()
-        TopExp.MapShapes_(self.object, Shape.FACE, this_map)
+        this_map = self._indexed_map(Shape.FACE)
         if this_map.Extent() == 0:
             return []
 
-        other_map = TopTools_IndexedMapOfShape()
-        TopExp.MapShapes_(other.object, Shape.FACE, other_map)
+        other_map = other._indexed_map(Shape.FACE)
         if other_map.Extent() == 0:
             return []
 
@@ -1390,3 +1489,345 @@ class BBox(Bnd_Box):
             raise TypeError(msg)
 
         return self.Distance(bbox)
+
+
+class ShapeIndex(object):
+    """
+    Spatial index of many shapes by their bounding boxes. Overlap queries
+    use a kd-tree of the box centers to find candidates that are then
+    checked against the boxes. Items can be inserted, removed, or updated
+    when their shape is rebuilt.
+
+    :param items: The shapes or parts.
+    :type items: collections.Sequence(afem.topology.entities.Shape or
+        afem.core.entities.ShapeHolder)
+    :param float tol: Tolerance used to enlarge each bounding box.
+    """
+
+    def __init__(self, items=(), tol=0.):
+        self._tol = float(tol)
+        self._items = []
+        self._boxes = zeros((0, 6), dtype=float64)
+        self._active = zeros(0, dtype=bool)
+        self._keys = {}
+
+        # Lazily built kd-tree of the centers of the valid boxes
+        self._kdt = None
+        self._kdt_indx = None
+        self._kdt_half = None
+
+        items = list(items)
+        boxes = [self._box_of(item) for item in items]
+        if boxes:
+            self._append(items, array(boxes, dtype=float64))
+
+    def __len__(self):
+        return int(self._active.sum())
+
+    def __contains__(self, item):
+        return id(item) in self._keys
+
+    @property
+    def items(self):
+        """
+        :return: The items in the index.
+        :rtype: list(afem.topology.entities.Shape or
+            afem.core.entities.ShapeHolder)
+        """
+        return [self._items[i] for i in where(self._active)[0]]
+
+    def bounds(self, item):
+        """
+        Get the bounds of an item.
+
+        :param item: The item.
+
+        :return: The bounds as (xmin, ymin, zmin, xmax, ymax, zmax).
+        :rtype: numpy.ndarray
+
+        :raise KeyError: If the item is not in the index.
+        """
+        return self._boxes[self._keys[id(item)]].copy()
+
+    def insert(self, item):
+        """
+        Insert an item into the index. If the item is already in the index its
+        bounding box is updated.
+
+        :param item: The shape or part.
+
+        :return: None.
+        """
+        if item in self:
+            return self.update(item)
+        self._append([item], array([self._box_of(item)], dtype=float64))
+
+    def remove(self, item):
+        """
+        Remove an item from the index.
+
+        :param item: The shape or part.
+
+        :return: *True* if removed, *False* if it was not in the index.
+        :rtype: bool
+        """
+        i = self._keys.pop(id(item), None)
+        if i is None:
+            return False
+        self._items[i] = None
+        self._active[i] = False
+        self._kdt_indx = None
+
+        # Compact the arrays once most of the slots are removed items
+        if 2 * len(self._keys) < len(self._items):
+            self._compact()
+        return True
+
+    def update(self, item):
+        """
+        Recompute the bounding box of an item, for example after the shape
+        of a part was rebuilt.
+
+        :param item: The shape or part.
+
+        :return: None.
+
+        :raise KeyError: If the item is not in the index.
+        """
+        self._boxes[self._keys[id(item)]] = self._box_of(item)
+        self._kdt_indx = None
+
+    def overlap(self, entity, tol=0.):
+        """
+        Find the items whose bounding box overlaps a box.
+
+        :param entity: The box, shape, or part. A box may also be given by
+            its bounds (xmin, ymin, zmin, xmax, ymax, zmax).
+        :type entity: afem.topology.entities.BBox or
+            afem.topology.entities.Shape or afem.core.entities.ShapeHolder or
+            array_like
+        :param float tol: Tolerance used to enlarge the box.
+
+        :return: The overlapping items.
+        :rtype: list(afem.topology.entities.Shape or
+            afem.core.entities.ShapeHolder)
+        """
+        box = self._to_bounds(entity)
+        if not isfinite(box).all():
+            indx = where(self._valid)[0]
+        else:
+            indx = self._candidates(box, tol)
+        boxes = self._boxes[indx]
+        mask = ((boxes[:, :3] <= box[3:] + tol).all(axis=1) &
+                (boxes[:, 3:] >= box[:3] - tol).all(axis=1))
+        return [self._items[i] for i in indx[mask]]
+
+    def ray(self, pnt, direction, tmax=inf):
+        """
+        Find the items whose bounding box is hit by a ray. The items are
+        sorted by the distance along the ray to the box.
+
+        :param point_like pnt: The origin of the ray.
+        :param vector_like direction: The direction of the ray.
+        :param float tmax: The maximum distance along the ray measured in
+            multiples of *direction*.
+
+        :return: The items.
+        :rtype: list(afem.topology.entities.Shape or
+            afem.core.entities.ShapeHolder)
+        """
+        p = asarray(pnt, dtype=float64)
+        d = asarray(direction, dtype=float64)
+        with errstate(divide='ignore', invalid='ignore'):
+            t1 = (self._boxes[:, :3] - p) / d
+            t2 = (self._boxes[:, 3:] - p) / d
+        tlo = minimum(t1, t2)
+        thi = maximum(t1, t2)
+
+        # Parallel directions are inside the slab only if the origin is
+        is_parallel = d == 0.
+        inside = ((p >= self._boxes[:, :3]) & (p <= self._boxes[:, 3:]))
+        tlo = where(is_parallel, where(inside, -inf, inf), tlo)
+        thi = where(is_parallel, where(inside, inf, -inf), thi)
+
+        tnear = maximum(tlo.max(axis=1), 0.)
+        tfar = minimum(thi.min(axis=1), tmax)
+        indx = where(self._valid & (tnear <= tfar))[0]
+        indx = indx[argsort(tnear[indx], kind='mergesort')]
+        return [self._items[i] for i in indx]
+
+    def slab(self, pln, thickness=0.):
+        """
+        Find the items whose bounding box intersects a slab centered on a
+        plane.
+
+        :param afem.geometry.entities.Plane pln: The plane.
+        :param float thickness: The total thickness of the slab.
+
+        :return: The items.
+        :rtype: list(afem.topology.entities.Shape or
+            afem.core.entities.ShapeHolder)
+        """
+        ax = pln.gp_pln.Axis()
+        o = ax.Location()
+        n = ax.Direction()
+        o = array([o.X(), o.Y(), o.Z()], dtype=float64)
+        n = array([n.X(), n.Y(), n.Z()], dtype=float64)
+
+        valid = self._valid
+        boxes = self._boxes[valid]
+        center = 0.5 * (boxes[:, :3] + boxes[:, 3:])
+        half = 0.5 * (boxes[:, 3:] - boxes[:, :3])
+        dist = np_abs((center - o).dot(n))
+        radius = half.dot(np_abs(n))
+        mask = zeros(valid.size, dtype=bool)
+        mask[valid] = dist <= radius + 0.5 * abs(thickness)
+        return self._select(mask)
+
+    def lower_bounds(self, entity):
+        """
+        Compute a lower bound of the distance from an entity to each item
+        using the bounding boxes.
+
+        :param entity: A point, or a box, shape, or part.
+        :type entity: point_like or afem.topology.entities.BBox or
+            afem.topology.entities.Shape or afem.core.entities.ShapeHolder
+
+        :return: The items and their lower bounds sorted by the lower bound.
+        :rtype: tuple(list(afem.topology.entities.Shape or
+            afem.core.entities.ShapeHolder), numpy.ndarray)
+        """
+        if CheckGeom.is_point_like(entity):
+            p = asarray(CheckGeom.to_point(entity).xyz, dtype=float64)
+            box = concatenate((p, p))
+        else:
+            box = self._to_bounds(entity)
+
+        gap = maximum(maximum(self._boxes[:, :3] - box[3:],
+                              box[:3] - self._boxes[:, 3:]), 0.)
+        dist = np_sqrt((gap * gap).sum(axis=1))
+
+        indx = where(self._valid)[0]
+        indx = indx[argsort(dist[indx], kind='mergesort')]
+        return [self._items[i] for i in indx], dist[indx]
+
+    def nearest(self, entity, k=1):
+        """
+        Find the items whose bounding box is nearest to an entity.
+
+        :param entity: A point, or a box, shape, or part.
+        :type entity: point_like or afem.topology.entities.BBox or
+            afem.topology.entities.Shape or afem.core.entities.ShapeHolder
+        :param int k: The number of items.
+
+        :return: Up to *k* items sorted by the distance to their bounding box.
+        :rtype: list(afem.topology.entities.Shape or
+            afem.core.entities.ShapeHolder)
+        """
+        return self.lower_bounds(entity)[0][:int(k)]
+
+    def _append(self, items, boxes):
+        """
+        Add the items and their boxes to the arrays.
+        """
+        n = len(self._items)
+        for i, item in enumerate(items):
+            self._keys[id(item)] = n + i
+        self._items += items
+        self._boxes = concatenate((self._boxes, boxes))
+        self._active = concatenate((self._active,
+                                    [True] * len(items))).astype(bool)
+        self._kdt_indx = None
+
+    def _compact(self):
+        """
+        Drop the slots of removed items and renumber the rest.
+        """
+        indx = where(self._active)[0]
+        self._items = [self._items[i] for i in indx]
+        self._boxes = self._boxes[indx]
+        self._active = self._active[indx]
+        self._keys = {id(item): i for i, item in enumerate(self._items)}
+        self._kdt_indx = None
+
+    def _candidates(self, box, tol):
+        """
+        Get the slots of the valid items whose box center is close enough
+        to the box that their boxes may overlap.
+        """
+        if self._kdt_indx is None:
+            indx = where(self._valid)[0]
+            boxes = self._boxes[indx]
+            self._kdt = None
+            self._kdt_half = zeros(3, dtype=float64)
+            if indx.size > 0:
+                self._kdt = KDTree(0.5 * (boxes[:, :3] + boxes[:, 3:]))
+                half = 0.5 * (boxes[:, 3:] - boxes[:, :3])
+                self._kdt_half = half.max(axis=0)
+            self._kdt_indx = indx
+        if self._kdt is None:
+            return self._kdt_indx
+
+        # Boxes overlap if their centers are no further apart along each
+        # axis than the sum of their half widths
+        center = 0.5 * (box[:3] + box[3:])
+        half = 0.5 * (box[3:] - box[:3])
+        r = (half + self._kdt_half + tol).max()
+        if r < 0.:
+            return self._kdt_indx[:0]
+        rows = self._kdt.query_ball_point(center, r, p=inf)
+        return self._kdt_indx[sorted(rows)]
+
+    @property
+    def _valid(self):
+        """
+        Mask of the active items that have a bounding box.
+        """
+        return self._active & (self._boxes[:, 0] <= self._boxes[:, 3])
+
+    def _select(self, mask):
+        """
+        Get the valid items of a mask.
+        """
+        return [self._items[i] for i in where(mask & self._valid)[0]]
+
+    def _box_of(self, item):
+        """
+        Compute the bounds of the shape of an item.
+        """
+        bbox = BBox()
+        bbox.add_shape(_shape_of_item(item))
+        if bbox.is_void:
+            return _VOID_BOUNDS
+        bbox.enlarge(self._tol)
+        return bbox.Get()
+
+    def _to_bounds(self, entity):
+        """
+        Convert the entity to an array of bounds.
+        """
+        if isinstance(entity, Bnd_Box):
+            if entity.IsVoid():
+                return array(_VOID_BOUNDS, dtype=float64)
+            return array(entity.Get(), dtype=float64)
+        if not is_array_like(entity):
+            return array(self._box_of(entity), dtype=float64)
+        box = empty(6, dtype=float64)
+        box[:] = entity
+        return box
+
+
+def _shape_of_item(item):
+    """
+    Get the shape of a shape or part.
+    """
+    # Avoid circular import
+    from afem.core.entities import ShapeHolder
+
+    if isinstance(item, ShapeHolder):
+        return item.shape
+    return Shape.to_shape(item)
+
+
+# Bounds of an empty box that never overlaps
+_VOID_BOUNDS = (inf, inf, inf, -inf, -inf, -inf)
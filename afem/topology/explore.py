@@ -20,9 +20,13 @@
 from OCCT.BRepTools import BRepTools_WireExplorer
 from OCCT.ShapeAnalysis import ShapeAnalysis_FreeBounds
 
-from afem.topology.entities import Vertex, Edge, Compound
+from afem.topology.entities import Shape, Vertex, Edge, Compound
 
-__all__ = ["ExploreWire", "ExploreFreeEdges"]
+__all__ = ["ExploreWire", "ExploreFreeEdges", "TopologyAdjacency"]
+
+# Sub-shape properties by type
+_SUBSHAPES = {Shape.VERTEX: 'vertices', Shape.EDGE: 'edges',
+              Shape.FACE: 'faces'}
 
 
 class ExploreWire(object):
@@ -133,3 +137,189 @@ class ExploreFreeEdges(object):
         :rtype: list(afem.topology.entities.Edge)
         """
         return self._edges
+
+
+class TopologyAdjacency(object):
+    """
+    Index of the sub-shapes shared between many owners. Every vertex, edge,
+    and face of each owner is hashed once and the owners of each sub-shape
+    are recorded, so shared sub-shapes and neighbors can be found for all
+    owners without comparing them two at a time.
+
+    :param owners: The owners. If a compound is given, its direct
+        sub-shapes are the owners. If a group is given, its parts are the
+        owners.
+    :type owners: afem.topology.entities.Compound or
+        afem.structure.group.Group or
+        collections.Sequence(afem.topology.entities.Shape or
+        afem.core.entities.ShapeHolder)
+    :param types: The sub-shape types to index.
+    :type types: collections.Sequence(OCCT.TopAbs.TopAbs_ShapeEnum)
+
+    :raise ValueError: If a sub-shape type is not a vertex, edge, or face.
+    """
+
+    def __init__(self, owners, types=(Shape.VERTEX, Shape.EDGE, Shape.FACE)):
+        # Avoid circular import
+        from afem.core.entities import ShapeHolder
+
+        if isinstance(owners, Shape):
+            owners = list(owners.shape_iter())
+        elif hasattr(owners, 'get_parts'):
+            owners = owners.get_parts()
+        owners = list(owners)
+
+        shapes = []
+        for owner in owners:
+            if isinstance(owner, ShapeHolder):
+                shapes.append(owner.shape)
+            else:
+                shapes.append(Shape.to_shape(owner))
+
+        # Map each sub-shape to the indices of its owners
+        self._index = {}
+        for type_ in types:
+            if type_ not in _SUBSHAPES:
+                raise ValueError('Only vertices, edges, and faces can be '
+                                 'indexed.')
+            index = {}
+            for i, shape in enumerate(shapes):
+                for sub_shape in getattr(shape, _SUBSHAPES[type_]):
+                    index.setdefault(sub_shape, []).append(i)
+            self._index[type_] = index
+
+        self._owners = owners
+        self._ids = {id(owner): i for i, owner in enumerate(owners)}
+        self._pairs = {}
+
+    @property
+    def owners(self):
+        """
+        :return: The owners.
+        :rtype: list(afem.topology.entities.Shape or
+            afem.core.entities.ShapeHolder)
+        """
+        return list(self._owners)
+
+    @property
+    def nowners(self):
+        """
+        :return: Number of owners.
+        :rtype: int
+        """
+        return len(self._owners)
+
+    def owners_of(self, shape):
+        """
+        Get the owners of a sub-shape.
+
+        :param afem.topology.entities.Shape shape: The sub-shape.
+
+        :return: The owners. The list is empty if the sub-shape is not
+            indexed.
+        :rtype: list(afem.topology.entities.Shape or
+            afem.core.entities.ShapeHolder)
+        """
+        indx = self._type_index(shape.shape_type).get(shape, [])
+        return [self._owners[i] for i in indx]
+
+    def shared_shapes(self, type_=Shape.EDGE):
+        """
+        Get all the sub-shapes that are owned by more than one owner.
+
+        :param OCCT.TopAbs.TopAbs_ShapeEnum type_: The sub-shape type.
+
+        :return: The shared sub-shapes.
+        :rtype: list(afem.topology.entities.Shape)
+        """
+        return [shape for shape, indx in self._type_index(type_).items()
+                if len(indx) > 1]
+
+    def shared_pairs(self, type_=Shape.EDGE):
+        """
+        Get the shared sub-shapes between every pair of owners that share at
+        least one sub-shape.
+
+        :param OCCT.TopAbs.TopAbs_ShapeEnum type_: The sub-shape type.
+
+        :return: Dictionary where the key is a tuple of two owner indices
+            (i, j) with i < j and the value is a list of shared sub-shapes.
+        :rtype: dict
+        """
+        try:
+            return self._pairs[type_]
+        except KeyError:
+            pass
+
+        pairs = {}
+        for shape, indx in self._type_index(type_).items():
+            n = len(indx)
+            for k1 in range(n - 1):
+                for k2 in range(k1 + 1, n):
+                    i, j = sorted((indx[k1], indx[k2]))
+                    pairs.setdefault((i, j), []).append(shape)
+        self._pairs[type_] = pairs
+        return pairs
+
+    def shared_between(self, owner1, owner2, type_=Shape.EDGE):
+        """
+        Get the sub-shapes shared between two owners.
+
+        :param owner1: The first owner or its index.
+        :param owner2: The second owner or its index.
+        :param OCCT.TopAbs.TopAbs_ShapeEnum type_: The sub-shape type.
+
+        :return: The shared sub-shapes.
+        :rtype: list(afem.topology.entities.Shape)
+
+        :raise ValueError: If an owner is not in the index.
+        """
+        i, j = sorted((self._owner_index(owner1), self._owner_index(owner2)))
+        return list(self.shared_pairs(type_).get((i, j), []))
+
+    def neighbors(self, owner, type_=Shape.EDGE):
+        """
+        Get the owners that share at least one sub-shape with the owner.
+
+        :param owner: The owner or its index.
+        :param OCCT.TopAbs.TopAbs_ShapeEnum type_: The sub-shape type.
+
+        :return: The neighbors in the order they were provided.
+        :rtype: list(afem.topology.entities.Shape or
+            afem.core.entities.ShapeHolder)
+
+        :raise ValueError: If the owner is not in the index.
+        """
+        i = self._owner_index(owner)
+        indx = set()
+        for (j, k) in self.shared_pairs(type_):
+            if j == i:
+                indx.add(k)
+            elif k == i:
+                indx.add(j)
+        return [self._owners[j] for j in sorted(indx)]
+
+    def _type_index(self, type_):
+        """
+        Get the index of a sub-shape type.
+        """
+        try:
+            return self._index[type_]
+        except KeyError:
+            msg = 'The sub-shape type {} is not indexed.'.format(type_)
+            raise ValueError(msg)
+
+    def _owner_index(self, owner):
+        """
+        Get the index of an owner.
+        """
+        if isinstance(owner, int):
+            if 0 <= owner < len(self._owners):
+                return owner
+        elif id(owner) in self._ids:
+            return self._ids[id(owner)]
+        elif isinstance(owner, Shape):
+            for i, other in enumerate(self._owners):
+                if isinstance(other, Shape) and other.is_same(owner):
+                    return i
+        raise ValueError('The owner is not in the index.')
@@ -17,9 +17,262 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import pickle
 import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from numpy import column_stack, cos, linspace, meshgrid, sin, sqrt, stack
 
 from afem.geometry import *
+from afem.geometry import utils as geom_utils
+
+
+def _eval_in_worker(srf, u, v):
+    """
+    Evaluate a surface in a worker process and send it back.
+    """
+    return srf, srf.eval(u, v).xyz
+
+
+class TestGeometryEntities(unittest.TestCase):
+    """
+    Test cases for afem.geometry.entities.
+    """
+
+    def test_curve_eval_many(self):
+        qp = [(0, 0, 0), (5, 5, 0), (10, 0, 0)]
+        c = NurbsCurveByInterp(qp).curve
+        u = [c.u1, 0.5 * (c.u1 + c.u2), c.u2]
+        pnts = c.eval_many(u)
+        self.assertEqual(pnts.shape, (3, 3))
+        for ui, pi in zip(u, pnts):
+            p = c.eval(ui)
+            self.assertAlmostEqual(p.x, pi[0])
+            self.assertAlmostEqual(p.y, pi[1])
+            self.assertAlmostEqual(p.z, pi[2])
+        ders = c.deriv_many(u)
+        v = c.deriv(u[1])
+        self.assertAlmostEqual(v.x, ders[1, 0])
+        self.assertAlmostEqual(v.y, ders[1, 1])
+
+    def test_surface_eval_grid(self):
+        c1 = NurbsCurveByPoints([(0., 0., 0.), (10., 0., 0.)]).curve
+        c2 = NurbsCurveByPoints([(0., 5., 5.), (10., 5., 5.)]).curve
+        c3 = NurbsCurveByPoints([(0., 10., 0.), (10., 10., 0.)]).curve
+        s = NurbsSurfaceByInterp([c1, c2, c3], 2).surface
+        pnts = s.eval_grid([0., 0.5, 1.], [0., 0.5])
+        self.assertEqual(pnts.shape, (3, 2, 3))
+        self.assertAlmostEqual(pnts[1, 1, 0], 5.)
+        self.assertAlmostEqual(pnts[1, 1, 1], 5.)
+        self.assertAlmostEqual(pnts[1, 1, 2], 5.)
+        pnts = s.eval_many([0.5, 1.], [0.5, 0.])
+        self.assertEqual(pnts.shape, (2, 3))
+        self.assertAlmostEqual(pnts[1, 0], 10.)
+        vn = s.norm_many([0.5], [0.5])
+        n = s.norm(0.5, 0.5)
+        self.assertAlmostEqual(vn[0, 0], n.x)
+        self.assertAlmostEqual(vn[0, 1], n.y)
+        self.assertAlmostEqual(vn[0, 2], n.z)
+        self.assertRaises(ValueError, s.eval_many, [0., 1.], [0.])
+
+    def test_nurbs_curve_eval_many_rational(self):
+        cp = [(0, 0, 0), (5, 5, 0), (10, 0, 0), (15, 5, 5)]
+        c = NurbsCurve.by_data(cp, [0., 0.4, 1.], [3, 1, 3], 2,
+                               [1., 2., 0.5, 1.])
+        u = [0., 0.2, 0.4, 0.75, 1.]
+        pnts = c.eval_many(u)
+        ders = c.deriv_many(u, 2)
+        for i, ui in enumerate(u):
+            p = c.eval(ui)
+            v = c.deriv(ui, 2)
+            for j in range(3):
+                self.assertAlmostEqual(pnts[i, j], p.xyz[j])
+                self.assertAlmostEqual(ders[i, j], v.xyz[j], places=5)
+
+    def test_nurbs_surface_deriv_many(self):
+        c1 = NurbsCurveByInterp([(0, 0, 0), (5, 1, 0), (10, 0, 0)]).curve
+        c2 = NurbsCurveByInterp([(0, 5, 5), (5, 6, 4), (10, 5, 5)]).curve
+        c3 = NurbsCurveByInterp([(0, 10, 0), (5, 11, 1), (10, 10, 0)]).curve
+        s = NurbsSurfaceByInterp([c1, c2, c3], 2).surface
+        u = [s.u1, 0.3 * s.u2, s.u2]
+        v = [s.v1, 0.6 * s.v2, 0.2 * s.v2]
+        du = s.deriv_many(u, v, 1, 0)
+        vn = s.norm_many(u, v)
+        grid = s.eval_grid(u, v)
+        for i in range(3):
+            d = s.deriv(u[i], v[i], 1, 0)
+            n = s.norm(u[i], v[i])
+            p = s.eval(u[i], v[2])
+            for j in range(3):
+                self.assertAlmostEqual(du[i, j], d.xyz[j], places=5)
+                self.assertAlmostEqual(vn[i, j], n.xyz[j], places=5)
+                self.assertAlmostEqual(grid[i, 2, j], p.xyz[j])
+
+    def test_point_array(self):
+        pnts = PointArray([(0., 0., 0.), Point(1., 2., 3.), [4., 5., 6.]])
+        self.assertEqual(pnts.npts, 3)
+        self.assertEqual(len(pnts), 3)
+        p = pnts[1]
+        self.assertIsInstance(p, Point)
+        self.assertAlmostEqual(p.z, 3.)
+        self.assertEqual(len(pnts[1:]), 2)
+        self.assertEqual(len(pnts.to_points()), 3)
+        pnts.translate((1., 0., 0.))
+        self.assertAlmostEqual(pnts[2].x, 5.)
+        pnts.rotate(Axis1(Point(), Direction(0., 0., 1.)), 90.)
+        self.assertAlmostEqual(pnts[0].x, 0.)
+        self.assertAlmostEqual(pnts[0].y, 1.)
+        self.assertRaises(ValueError, PointArray, [(0., 0.)])
+
+        c = NurbsCurveByInterp(pnts).curve
+        self.assertAlmostEqual(c.p1.y, 1.)
+        builder = PointsAlongCurveByNumber(c, 5)
+        self.assertIsInstance(builder.points, list)
+        self.assertIsInstance(builder.points_array, PointArray)
+        self.assertEqual(builder.points_array.xyz.shape, (5, 3))
+
+        # Edits to the points persist
+        builder.points[0].translate((1., 0., 0.))
+        self.assertAlmostEqual(builder.points[0].x, c.p1.x + 1.)
+
+    def test_pickle(self):
+        p = Point(1., 2., 3.)
+        p.set_color(0., 0., 1.)
+        p.set_transparency(0.5)
+        p = pickle.loads(pickle.dumps(p))
+        self.assertIsInstance(p, Point)
+        self.assertAlmostEqual(p.z, 3.)
+        self.assertAlmostEqual(p.color.Blue(), 1.)
+        self.assertAlmostEqual(p.color.Red(), 0.)
+        self.assertAlmostEqual(p.transparency, 0.5)
+
+        cp = [(0, 0, 0), (5, 5, 0), (10, 0, 0), (15, 5, 5)]
+        c = NurbsCurve.by_data(cp, [0., 0.4, 1.], [3, 1, 3], 2,
+                               [1., 2., 0.5, 1.])
+        c.set_color(0., 1., 0.)
+        c2 = pickle.loads(pickle.dumps(c))
+        self.assertIsInstance(c2, NurbsCurve)
+        self.assertAlmostEqual(c2.color.Green(), 1.)
+        for u in [0., 0.3, 0.75]:
+            self.assertAlmostEqual(c.eval(u).distance(c2.eval(u)), 0.)
+
+        t = TrimmedCurve.by_parameters(c, 0.2, 0.8)
+        t2 = pickle.loads(pickle.dumps(t))
+        self.assertIsInstance(t2, TrimmedCurve)
+        self.assertAlmostEqual(t2.u1, 0.2)
+
+        circ = CircleByNormal((0., 0., 0.), (0., 0., 1.), 2.).circle
+        circ2 = pickle.loads(pickle.dumps(circ))
+        self.assertIsInstance(circ2, Circle)
+        self.assertAlmostEqual(circ2.radius, 2.)
+
+        pln = PlaneByNormal((1., 2., 3.), (0., 0., 1.)).plane
+        pln2 = pickle.loads(pickle.dumps(pln))
+        self.assertIsInstance(pln2, Plane)
+        self.assertAlmostEqual(pln2.origin.z, 3.)
+
+        s1 = NurbsCurveByPoints([(0., 0., 0.), (10., 0., 0.)]).curve
+        s2 = NurbsCurveByPoints([(0., 10., 0.), (10., 10., 0.)]).curve
+        s = NurbsSurfaceByApprox([s1, s2]).surface
+        s3 = pickle.loads(pickle.dumps(s))
+        self.assertIsInstance(s3, NurbsSurface)
+        self.assertAlmostEqual(s3.eval(0.5, 0.5).x, s.eval(0.5, 0.5).x)
+
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            s4, xyz = executor.submit(_eval_in_worker, s, 0.5, 0.5).result()
+            # Send a point to the worker and back
+            p2 = executor.submit(list, [p]).result()[0]
+        self.assertIsInstance(p2, Point)
+        self.assertAlmostEqual(p2.distance(p), 0.)
+        self.assertAlmostEqual(p2.color.Blue(), 1.)
+        self.assertAlmostEqual(p2.transparency, 0.5)
+        self.assertIsInstance(s4, NurbsSurface)
+        p = s.eval(0.5, 0.5)
+        self.assertAlmostEqual(p.distance(s4.eval(0.5, 0.5)), 0.)
+        self.assertAlmostEqual(xyz[0], p.x)
+        self.assertAlmostEqual(xyz[1], p.y)
+
+    def test_tessellate(self):
+        c = CircleByNormal((0., 0., 0.), (0., 0., 1.), 2.).circle
+        tess = c.tessellate(0.01)
+        self.assertIs(c.tessellate(0.01), tess)
+        self.assertGreater(tess.npts, 10)
+        self.assertEqual(tess.points.shape, (tess.npts, 3))
+        self.assertAlmostEqual(tess.parameters[0], c.u1)
+        self.assertFalse(tess.bounding_box.IsOut(Point(2., 0., 0.)))
+        c.translate((1., 0., 0.))
+        self.assertIsNot(c.tessellate(0.01), tess)
+
+        s1 = NurbsCurveByPoints([(0., 0., 0.), (10., 0., 0.)]).curve
+        s2 = NurbsCurveByPoints([(0., 10., 0.), (10., 10., 0.)]).curve
+        s = NurbsSurfaceByApprox([s1, s2]).surface
+        tess = s.tessellate()
+        self.assertIs(s.tessellate(), tess)
+        nu, nv = tess.uparameters.size, tess.vparameters.size
+        self.assertEqual(tess.npts, nu * nv)
+        self.assertEqual(tess.ntris, 2 * (nu - 1) * (nv - 1))
+        self.assertEqual(tess.parameters.shape, (tess.npts, 2))
+        s.insert_uknot(0.5)
+        self.assertIsNot(s.tessellate(), tess)
+
+        pln = PlaneByNormal((0., 0., 0.), (0., 0., 1.)).plane
+        self.assertRaises(ValueError, pln.tessellate)
+
+    def test_tessellate_bulge(self):
+        # The peak of the surface is between the initial samples
+        cp = [[(i, j, 10. if i == j == 1 else 0.) for j in range(4)]
+              for i in range(4)]
+        s = NurbsSurface.by_data(cp, [0., 1.], [0., 1.], [4, 4], [4, 4], 3,
+                                 3)
+        peak = s.eval(1. / 3., 1. / 3.)
+        tess = TessellateSurface(s, 0.01, max_iter=0)
+        self.assertFalse(tess.is_converged)
+        self.assertGreater(tess.max_deviation, 0.01)
+        self.assertFalse(tess.bounding_box.IsOut(peak))
+        self.assertTrue(s.tessellate(0.01).is_converged)
+
+        # A curve just above the peak is not rejected by the cutoff
+        c = NurbsCurveByPoints([(0., 1., 2.), (3., 1., 2.)]).curve
+        dist = DistanceMatrix([c], [s], cutoff=0.1)
+        self.assertEqual(dist.npairs, 1)
+        self.assertLess(dist.pairs[0][2], 0.1)
+
+    def test_nurbs_surface_by_data_weights(self):
+        cp = [[(0, 0, 0), (0, 5, 1), (0, 10, 0)],
+              [(10, 0, 0), (10, 5, 1), (10, 10, 0)]]
+        w = [[1., 2., 1.], [1., 0.5, 1.]]
+        s = NurbsSurface.by_data(cp, [0., 1.], [0., 1.], [2, 2], [3, 3], 1,
+                                 2, w)
+        self.assertEqual(s.cp.shape, (2, 3, 3))
+        self.assertAlmostEqual(s.cp[1, 1, 0], 10.)
+        self.assertAlmostEqual(s.cp[1, 1, 2], 1.)
+        self.assertAlmostEqual(s.w[0, 1], 2.)
+        self.assertAlmostEqual(s.w[1, 1], 0.5)
+        self.assertAlmostEqual(s.cpw[0, 1, 1], 10.)
+        self.assertAlmostEqual(s.cpw[0, 1, 3], 2.)
+
+        s = NurbsSurface.by_data(cp, [0., 1.], [0., 1.], [2, 2], [3, 3], 1,
+                                 2)
+        self.assertAlmostEqual(s.w.min(), 1.)
+        self.assertAlmostEqual(s.w.max(), 1.)
+
+    def test_nurbs_surface_knots(self):
+        cp = [[(0, 0, 0), (0, 5, 1), (0, 10, 0)],
+              [(10, 0, 0), (10, 5, 1), (10, 10, 0)]]
+        s = NurbsSurface.by_data(cp, [0., 1.], [0., 1.], [2, 2], [3, 3], 1,
+                                 2)
+        s.insert_uknots([0.75, 0.25, 0.5])
+        self.assertEqual(s.uknots.size, 5)
+        self.assertEqual(s.locate_u(0.3), (2, 3))
+        self.assertEqual(s.locate_u(0.5), (3, 3))
+        i1, i2 = s.locate_u([0.1, 0.6, 1.])
+        self.assertListEqual(list(i1), [1, 3, 5])
+        self.assertListEqual(list(i2), [2, 4, 5])
+
+        n = s.refine_v(2.)
+        self.assertEqual(n, s.vknots.size - 2)
+        self.assertGreater(n, 0)
+        self.assertEqual(s.locate_v(s.vknots[1]), (2, 2))
 
 
 class TestGeometryCreate(unittest.TestCase):
@@ -83,6 +336,33 @@ class TestGeometryCreate(unittest.TestCase):
         self.assertAlmostEqual(u2, 5.)
         self.assertAlmostEqual(u3, 10.)
 
+    def test_points_along_curve_by_distance_table(self):
+        qp = [(0, 0, 0), (5, 5, 0), (10, 0, 0)]
+        c = NurbsCurveByInterp(qp).curve
+        table = c.arc_length_table()
+        self.assertAlmostEqual(table.length, c.length, places=5)
+        u = table.parameter(0.5 * table.length)
+        self.assertAlmostEqual(c.arc_length(c.u1, u), 0.5 * c.length,
+                               places=5)
+        builder1 = PointsAlongCurveByDistance(c, 2.)
+        builder2 = PointsAlongCurveByDistance(table, 2.)
+        self.assertEqual(builder1.npts, builder2.npts)
+        for u1, u2 in zip(builder1.parameters, builder2.parameters):
+            self.assertAlmostEqual(u1, u2, places=5)
+        tool = PointFromParameter(table, c.u1, 1.)
+        self.assertTrue(tool.is_done)
+        self.assertAlmostEqual(c.arc_length(c.u1, tool.parameter), 1.,
+                               places=5)
+
+        # The table is stored on the curve until it is modified
+        self.assertIs(c.arc_length_table(), table)
+        self.assertIsNot(c.arc_length_table(32), table)
+        c.translate((0., 0., 1.))
+        self.assertNotIn(('arc_length_table', 64, 5), c._cache)
+        c2 = NurbsCurveByInterp(qp).curve
+        PointsAlongCurveByNumber(c2, 5)
+        self.assertIn(('arc_length_table', 64, 5), c2._cache)
+
     def test_direction_by_xyz(self):
         d = DirectionByXYZ(1., 0., 0.).direction
         self.assertAlmostEqual(d.i, 1.)
@@ -179,6 +459,20 @@ class TestGeometryCreate(unittest.TestCase):
         self.assertAlmostEqual(p.y, 4.571, places=3)
         self.assertAlmostEqual(p.z, 0.)
 
+    def test_nurbs_curves_by_interp(self):
+        qps = [[(0, 0, 0), (5, 5, 0), (10, 0, 0), (15, 5, 0)],
+               [(0, 0, 5), (5, 6, 5), (10, 1, 5), (15, 4, 5)]]
+        builder = NurbsCurvesByInterp(qps, 3)
+        self.assertEqual(builder.ncrvs, 2)
+        c1, c2 = builder.curves
+        self.assertIsInstance(c1, NurbsCurve)
+        self.assertEqual(c1.p, 3)
+        self.assertEqual(list(c1.knots), list(c2.knots))
+        p = c2.eval(c2.u2)
+        self.assertAlmostEqual(p.x, 15.)
+        self.assertAlmostEqual(p.y, 4.)
+        self.assertAlmostEqual(p.z, 5.)
+
     def test_nurbs_curve_by_approx(self):
         qp = [(0, 0, 0), (5, 5, 0), (10, 0, 0)]
         c = NurbsCurveByApprox(qp).curve
@@ -199,6 +493,19 @@ class TestGeometryCreate(unittest.TestCase):
         self.assertAlmostEqual(p.y, 5.)
         self.assertAlmostEqual(p.z, 0.)
 
+    def test_nurbs_curve_by_fit(self):
+        t = linspace(0., 1., 2000)
+        qp = column_stack([10. * t, sin(3. * t), t ** 3])
+        builder = NurbsCurveByFit(qp, 3, 1.0e-4, max_pts=500)
+        c = builder.curve
+        self.assertIsInstance(c, NurbsCurve)
+        self.assertLessEqual(builder.tol_reached, 1.0e-4)
+        self.assertEqual(builder.parameters.size, 2000)
+        self.assertAlmostEqual(c.p1.distance(Point(*qp[0])), 0.)
+        self.assertAlmostEqual(c.p2.distance(Point(*qp[-1])), 0.)
+        p = c.eval(builder.parameters[1000])
+        self.assertLessEqual(p.distance(Point(*qp[1000])), 1.0e-4)
+
     def test_trimmed_curve_by_parameters(self):
         qp = [(0, 0, 0), (5, 5, 0), (10, 0, 0)]
         basis_curve = NurbsCurveByInterp(qp).curve
@@ -338,6 +645,27 @@ class TestGeometryCreate(unittest.TestCase):
         self.assertIsInstance(p2, Plane)
         self.assertIsInstance(p3, Plane)
 
+    def test_planes_lazy(self):
+        line = LineByPoints(Point(), Point(10., 0., 0.)).line
+        builder = PlanesAlongCurveByNumber(line, 5, u1=0., u2=10.,
+                                           lazy=True)
+        self.assertEqual(builder.nplanes, 5)
+        self.assertAlmostEqual(builder.origins[4].x, 10.)
+        self.assertAlmostEqual(builder.normals[2, 0], 1.)
+        stations = list(builder.iter_planes())
+        self.assertEqual(len(stations), 5)
+        pln, u, ds = stations[1]
+        self.assertIsInstance(pln, Plane)
+        self.assertAlmostEqual(u, 2.5)
+        self.assertAlmostEqual(ds, 2.5)
+        self.assertIsNone(stations[0][2])
+        self.assertAlmostEqual(pln.eval(0., 0.).x, 2.5)
+
+        builder.rotate_y(90.)
+        pln = builder.planes[0]
+        self.assertAlmostEqual(pln.norm(0., 0.).x, 0.)
+        self.assertIs(builder.planes[0], pln)
+
     def test_nurbs_surface_by_interp(self):
         c1 = NurbsCurveByPoints([(0., 0., 0.), (10., 0., 0.)]).curve
         c2 = NurbsCurveByPoints([(0., 5., 5.), (10., 5., 5.)]).curve
@@ -362,6 +690,34 @@ class TestGeometryCreate(unittest.TestCase):
         self.assertAlmostEqual(p.y, 5.)
         self.assertAlmostEqual(p.z, 5.)
 
+    def test_nurbs_surface_by_fit(self):
+        u, v = meshgrid(linspace(0., 1., 120), linspace(0., 1., 80),
+                        indexing='ij')
+        qp = stack([10. * u, 5. * v, sin(3. * u) * cos(2. * v)], axis=2)
+        builder = NurbsSurfaceByFit(qp, tol=1.0e-3, max_pts=60)
+        s = builder.surface
+        self.assertIsInstance(s, NurbsSurface)
+        self.assertLessEqual(builder.tol_reached, 1.0e-3)
+        self.assertEqual(builder.uparameters.size, 120)
+        self.assertEqual(builder.vparameters.size, 80)
+        p = s.eval(builder.uparameters[50], builder.vparameters[40])
+        self.assertLessEqual(p.distance(Point(*qp[50, 40])), 1.0e-3)
+        self.assertRaises(ValueError, NurbsSurfaceByFit, qp[0])
+
+    def test_parameters(self):
+        u = geom_utils.uniform_parameters(5, 0., 1.)
+        self.assertAlmostEqual(u[1], 0.25)
+        self.assertAlmostEqual(u[3], 0.75)
+        pnts = [(0., 0., 0.), (1., 0., 0.), (3., 0., 0.), (6., 0., 0.)]
+        u = geom_utils.chord_parameters(pnts, 2., 4.)
+        self.assertAlmostEqual(u[1], 2. + 1. / 3.)
+        self.assertAlmostEqual(u[2], 3.)
+        u = geom_utils.centripetal_parameters(pnts, 0., 1.)
+        d = sqrt([1., 2., 3.])
+        self.assertAlmostEqual(u[1], d[0] / d.sum())
+        self.assertAlmostEqual(u[2], d[:2].sum() / d.sum())
+        self.assertAlmostEqual(u[3], 1.)
+
 
 class TestGeometryDistance(unittest.TestCase):
     """
@@ -374,6 +730,74 @@ class TestGeometryDistance(unittest.TestCase):
         dist = DistancePointToCurve(p, c)
         self.assertEqual(dist.nsol, 1)
 
+    def test_point_index(self):
+        pnts = [(0., 0., 0.), (1., 0., 0.), (2., 0., 0.), (10., 0., 0.)]
+        indx = PointIndex(pnts)
+        self.assertEqual(indx.npts, 4)
+        d, i = indx.nearest((1.2, 0., 0.))
+        self.assertEqual(i, 1)
+        self.assertAlmostEqual(d, 0.2)
+        d, i = indx.nearest((5., 0., 0.), 1.)
+        self.assertIsNone(i)
+        d, i = indx.nearest_k((1.9, 0., 0.), 2)
+        self.assertEqual(list(i), [2, 1])
+        i = indx.within_radius((0.9, 0., 0.), 1.5)
+        self.assertEqual(list(i), [1, 0, 2])
+        d, i = indx.nearest_many([(9., 0., 0.), (-1., 0., 0.)])
+        self.assertEqual(list(i), [3, 0])
+        p = CheckGeom.nearest_point((8., 0., 0.), pnts)
+        self.assertAlmostEqual(p.x, 10.)
+        p = CheckGeom.nearest_point((8., 0., 0.), indx)
+        self.assertAlmostEqual(p.x, 10.)
+        p = CheckGeom.nearest_point((1.4, 0., 0.), [Point(*pi) for pi in pnts])
+        self.assertIsInstance(p, Point)
+        self.assertAlmostEqual(p.x, 1.)
+        p = CheckGeom.nearest_point((1.6, 0., 0.), PointArray(pnts))
+        self.assertAlmostEqual(p.x, 2.)
+
+    def test_distance_curve_to_curve_cutoff(self):
+        c1 = NurbsCurveByPoints([(0., 0., 0.), (10., 0., 0.)]).curve
+        c2 = NurbsCurveByPoints([(0., 5., 1.), (10., 5., 1.)]).curve
+        dist = DistanceCurveToCurve(c1, c2, cutoff=1.)
+        self.assertTrue(dist.is_rejected)
+        self.assertEqual(dist.nsol, 0)
+        self.assertIsNone(dist.dmin)
+        dist = DistanceCurveToCurve(c1, c2, cutoff=10.)
+        self.assertFalse(dist.is_rejected)
+
+        # The box is cached on the curve until it is modified
+        self.assertIn(('bounding_box',), c2._cache)
+        c2.translate((0., 20., 0.))
+        self.assertNotIn(('bounding_box',), c2._cache)
+        dist = DistanceCurveToCurve(c1, c2, cutoff=10.)
+        self.assertTrue(dist.is_rejected)
+
+    def test_distance_matrix(self):
+        crvs = [NurbsCurveByPoints([(0., y, 1.), (10., y, 1.)]).curve
+                for y in [0., 5., 50.]]
+        c1 = NurbsCurveByPoints([(0., 0., 0.), (10., 0., 0.)]).curve
+        c2 = NurbsCurveByPoints([(0., 10., 0.), (10., 10., 0.)]).curve
+        srf = NurbsSurfaceByApprox([c1, c2]).surface
+        dist = DistanceMatrix(crvs, [srf], cutoff=2.)
+        self.assertEqual(dist.shape, (3, 1))
+        self.assertEqual(dist.npairs, 2)
+        self.assertAlmostEqual(dist.matrix[1, 0], 1.)
+        j, d = dist.nearest(0)
+        self.assertEqual(j, 0)
+        self.assertAlmostEqual(d, 1.)
+        self.assertEqual(dist.nearest(2), (None, None))
+
+        # Without a cutoff every pair is evaluated and no boxes are built
+        crvs = [NurbsCurveByPoints([(0., y, 1.), (10., y, 1.)]).curve
+                for y in [50., 0., 5.]]
+        dist = DistanceMatrix([srf], crvs)
+        self.assertEqual(dist.npairs, 3)
+        j, d = dist.nearest(0)
+        self.assertEqual(j, 1)
+        self.assertAlmostEqual(d, 1.)
+        for c in crvs:
+            self.assertNotIn(('bounding_box',), c._cache)
+
 
 class TestGeometryIntersect(unittest.TestCase):
     """
@@ -427,6 +851,54 @@ class TestGeometryIntersect(unittest.TestCase):
         self.assertAlmostEqual(p.y, 5., places=3)
         self.assertAlmostEqual(p.z, 5., places=3)
 
+    def test_intersect_curves_surface(self):
+        pln = PlaneByNormal((0., 0., 0.), (0., 0., 1.)).plane
+        crvs = [NurbsCurveByPoints([(x, 0., -1.), (x, 0., 1.)]).curve
+                for x in range(5)]
+        crvs.append(NurbsCurveByPoints([(0., 0., 2.), (1., 0., 3.)]).curve)
+        for nprocs in [None, 2]:
+            csi = IntersectCurvesSurface(crvs, pln, nprocs=nprocs)
+            self.assertTrue(csi.success)
+            self.assertEqual(csi.ncrvs, 6)
+            self.assertEqual(csi.npts, [1, 1, 1, 1, 1, 0])
+            self.assertFalse(csi.is_candidate[5])
+            for i in range(5):
+                t, uv, pnts = csi.results(i)
+                self.assertAlmostEqual(t[0], 0.5)
+                self.assertAlmostEqual(pnts[0, 0], i)
+                self.assertAlmostEqual(pnts[0, 2], 0.)
+
+    def test_intersect_surface_surface_cache(self):
+        c1 = NurbsCurveByPoints([(0., 0., 0.), (10., 0., 0.)]).curve
+        c2 = NurbsCurveByPoints([(0., 5., 5.), (10., 5., 5.)]).curve
+        c3 = NurbsCurveByPoints([(0., 10., 0.), (10., 10., 0.)]).curve
+        s = NurbsSurfaceByApprox([c1, c2, c3]).surface
+        pln1 = PlaneByNormal((5., 5., 0.), (1., 0., 0.)).plane
+        pln2 = PlaneByNormal((2., 5., 0.), (1., 0., 0.)).plane
+        cache = IntersectionCache(maxsize=1)
+        ssi1 = IntersectSurfaceSurface(s, pln1, cache=cache)
+        ssi2 = IntersectSurfaceSurface(s, pln1, cache=cache)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(ssi2.ncrvs, ssi1.ncrvs)
+        self.assertIsNot(ssi2.curve(1), ssi1.curve(1))
+        p = ssi2.curve(1).eval(0.5)
+        self.assertAlmostEqual(p.x, 5., places=3)
+        IntersectSurfaceSurface(s, pln2, cache=cache)
+        self.assertEqual(len(cache), 1)
+        IntersectSurfaceSurface(s, pln1, cache=cache)
+        self.assertEqual(cache.misses, 3)
+
+        # Modified geometry is not found in the cache
+        pln1.translate((1., 0., 0.))
+        ssi3 = IntersectSurfaceSurface(s, pln1, cache=cache)
+        self.assertEqual(cache.misses, 4)
+        p = ssi3.curve(1).eval(0.5)
+        self.assertAlmostEqual(p.x, 6., places=3)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 0)
+
 
 class TestGeometryProject(unittest.TestCase):
     """
@@ -465,6 +937,36 @@ class TestGeometryProject(unittest.TestCase):
         self.assertAlmostEqual(proj.nearest_param[1], 1.)
         self.assertAlmostEqual(proj.dmin, 1.)
 
+    def test_project_points_to_curve(self):
+        c = NurbsCurveByPoints([(0., 0., 0.), (10., 0., 0.)]).curve
+        pnts = [(x, 1., 0.) for x in range(11)]
+        proj = ProjectPointsToCurve(pnts, c)
+        self.assertTrue(proj.success)
+        self.assertEqual(proj.npts, 11)
+        for i in range(11):
+            self.assertAlmostEqual(proj.parameters[i], i / 10.)
+            self.assertAlmostEqual(proj.points[i, 0], i)
+            self.assertAlmostEqual(proj.points[i, 1], 0.)
+            self.assertAlmostEqual(proj.distances[i], 1.)
+        u = c.invert_many(pnts)
+        self.assertAlmostEqual(u[5], 0.5)
+
+    def test_project_points_to_surface(self):
+        c1 = NurbsCurveByPoints([(0., 0., 0.), (10., 0., 0.)]).curve
+        c2 = NurbsCurveByPoints([(0., 10., 0.), (10., 10., 0.)]).curve
+        s = NurbsSurfaceByApprox([c1, c2]).surface
+        pnts = [(1., 2., 1.), (3., 4., -1.), (9., 9., 2.)]
+        proj = ProjectPointsToSurface(pnts, s)
+        self.assertTrue(proj.success)
+        self.assertEqual(proj.npts, 3)
+        for i, (x, y, z) in enumerate(pnts):
+            self.assertAlmostEqual(proj.points[i, 0], x)
+            self.assertAlmostEqual(proj.points[i, 1], y)
+            self.assertAlmostEqual(proj.points[i, 2], 0.)
+            self.assertAlmostEqual(proj.distances[i], abs(z))
+        uv = s.invert_many(pnts)
+        self.assertEqual(uv.shape, (3, 2))
+
     def test_project_curve_to_plane(self):
         qp = [Point(), Point(5., 5., 1.), Point(10., 5., 1.)]
         c = NurbsCurveByInterp(qp).curve
@@ -0,0 +1,186 @@
+# This file is part of AFEM which provides an engineering toolkit for airframe
+# finite element modeling during conceptual design.
+#
+# Copyright (C) 2016-2018 Laughlin Research, LLC
+# Copyright (C) 2019-2020 Trevor Laughlin
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301 USA
+import os
+import shutil
+import unittest
+from tempfile import mkdtemp
+from unittest.mock import patch
+
+from numpy import linspace
+
+from afem.config import logger
+from afem.geometry import *
+from afem.sketch import *
+from afem.sketch.entities import _read_uiuc
+from afem.topology import *
+
+_CLARKY = '../models/clarky.dat'
+
+
+def _read_uiuc_lines(fn):
+    """
+    Read the upper and lower points line by line like the original reader.
+    """
+    with open(fn, 'r') as fin:
+        content = fin.read().splitlines()
+
+    blocks = [[], []]
+    i = 3
+    for block in blocks:
+        while i < len(content):
+            line = content[i].strip().split()
+            i += 1
+            if not line:
+                break
+            block.append([float(line[0]), float(line[1])])
+    return blocks
+
+
+class TestSketchEntities(unittest.TestCase):
+    """
+    Test cases for afem.sketch.entities.
+    """
+
+    def test_sections_by_planes(self):
+        cs = CrossSection()
+        cs.add_interp([(0., 0.), (1., 0.2), (2., 0.)])
+
+        plns = [PlaneByAxes((0., 0., 0.), 'xy').plane,
+                PlaneByAxes((0., 5., 0.), 'xz').plane,
+                PlaneByAxes((3., 0., 1.), 'yz').plane]
+        scales = [1., 2.5, 0.5]
+        rotations = [0., 30., -45.]
+        builder = SectionsByPlanes(cs, plns, scales, rotations)
+        self.assertEqual(builder.nsections, 3)
+
+        for i in range(3):
+            self.assertTrue(cs.build(plns[i], scales[i], rotations[i]))
+            c1 = cs.shape.curve
+            c2 = builder.curves[i][0]
+            for u in linspace(c2.u1, c2.u2, 5):
+                p1 = c1.eval(u)
+                p2 = c2.eval(u)
+                self.assertAlmostEqual(p1.distance(p2), 0.)
+
+    def test_sections_by_planes_loft(self):
+        cs = Airfoil()
+        cs.read_uiuc(_CLARKY)
+
+        plns = [PlaneByAxes((0., y, 0.), 'xz').plane for y in (0., 5., 10.)]
+        builder = SectionsByPlanes(cs, plns, [1., 0.8, 0.5], 5.)
+        self.assertEqual(len(builder.loft_curves), 3)
+        self.assertEqual(len(builder.loft_wires), 3)
+        for face in builder.faces:
+            self.assertIsInstance(face, Face)
+
+        shape = LoftShape(builder.loft_wires, True).shape
+        self.assertIsInstance(shape, Solid)
+
+        builder = SectionsByPlanes(cs, plns, build_shapes=False)
+        self.assertEqual(len(builder.loft_curves), 3)
+        self.assertEqual(builder.loft_wires, [])
+
+    def test_sections_by_planes_mismatch(self):
+        cs = CrossSection()
+        cs.add_interp([(0., 0.), (1., 0.2), (2., 0.)])
+        plns = [PlaneByAxes((0., y, 0.), 'xz').plane for y in (0., 5.)]
+
+        self.assertRaises(ValueError, SectionsByPlanes, cs, plns, [1.])
+        self.assertRaises(ValueError, SectionsByPlanes, cs, plns, None,
+                          [0., 5., 10.])
+        self.assertRaises(ValueError, SectionsByPlanes, [cs], plns)
+
+
+class TestSketchLibrary(unittest.TestCase):
+    """
+    Test cases for afem.sketch.library.
+    """
+
+    def setUp(self):
+        self.cache_dir = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def assertCurvesEqual(self, c1, c2):
+        self.assertEqual(c1.p, c2.p)
+        self.assertListEqual(c1.mult.tolist(), c2.mult.tolist())
+        for u in linspace(c1.u1, c1.u2, 11):
+            self.assertAlmostEqual(c1.eval(u).distance(c2.eval(u)), 0.)
+
+    def test_read_uiuc(self):
+        upr, lwr = _read_uiuc(_CLARKY)
+        upr0, lwr0 = _read_uiuc_lines(_CLARKY)
+        self.assertEqual(upr.shape, (61, 2))
+        self.assertEqual(lwr.shape, (61, 2))
+        self.assertListEqual(upr.tolist(), upr0)
+        self.assertListEqual(lwr.tolist(), lwr0)
+
+    def test_nurbs_curve_2d_by_data(self):
+        c = Airfoil().read_uiuc(_CLARKY)
+        self.assertEqual(c.cp.shape, (c.n + 1, 2))
+        self.assertEqual(c.w.shape, (c.n + 1,))
+
+        c2 = NurbsCurve2D.by_data(c.cp, c.knots, c.mult, c.p)
+        self.assertCurvesEqual(c, c2)
+        c2 = NurbsCurve2D.by_data(c.cp, c.knots, c.mult, c.p, c.w)
+        self.assertCurvesEqual(c, c2)
+
+    def test_library_cache(self):
+        lib = AirfoilLibrary(self.cache_dir)
+        self.assertListEqual(lib.load_directory('../models'), ['clarky'])
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        # A new library should only read the cache
+        with patch.object(AirfoilLibrary, '_fit', side_effect=AssertionError):
+            lib2 = AirfoilLibrary(self.cache_dir)
+            self.assertEqual(lib2.load(_CLARKY), 'clarky')
+        self.assertIn('clarky', lib2)
+
+        cs1 = lib2.airfoil('clarky')
+        cs2 = Airfoil()
+        self.assertCurvesEqual(lib2.curve('clarky'), cs2.read_uiuc(_CLARKY))
+        self.assertTrue(cs1.build())
+        self.assertTrue(cs2.build())
+        self.assertTrue(cs1.has_face)
+        self.assertCurvesEqual(cs1.build_chord(), cs2.build_chord())
+
+    def test_library_corrupt_cache(self):
+        AirfoilLibrary(self.cache_dir).load(_CLARKY)
+        fn = os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0])
+        with open(fn, 'rb') as fin:
+            data = fin.read()
+
+        for content in [b'not a cache file', data[:len(data) // 2]]:
+            with open(fn, 'wb') as fout:
+                fout.write(content)
+            lib = AirfoilLibrary(self.cache_dir)
+            with self.assertLogs(logger, 'WARNING'):
+                lib.load(_CLARKY)
+            self.assertIn('clarky', lib)
+
+            # The cache file is rewritten with valid data
+            with patch.object(AirfoilLibrary, '_fit',
+                              side_effect=AssertionError):
+                AirfoilLibrary(self.cache_dir).load(_CLARKY)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,6 +21,7 @@ import unittest
 
 import afem.topology.transform
 from afem.exchange import brep
+from afem.adaptor import *
 from afem.geometry import *
 from afem.graphics import Viewer
 from afem.topology import *
@@ -312,6 +313,16 @@ class TestTopologyCreate(unittest.TestCase):
         self.assertEqual(builder.npts, 10)
         self.assertAlmostEqual(builder.spacing, 0.44444, places=5)
 
+    def test_points_along_shape_point_array(self):
+        e = EdgeByPoints((0., 0., 0.), (10., 0., 0.)).edge
+        builder = PointsAlongShapeByNumber(e, 11)
+        pnts = builder.points_array
+        self.assertEqual(pnts.npts, 11)
+        self.assertAlmostEqual(pnts[3].x, 3.)
+        self.assertEqual(len(builder.interior_points), 9)
+        wire = WireByPoints(pnts).wire
+        self.assertAlmostEqual(wire.length, 10.)
+
     def test_points_along_shape_by_distance(self):
         p1 = (0., 0., 0.)
         p2 = (1., 0., 0.)
@@ -334,6 +345,75 @@ class TestTopologyCreate(unittest.TestCase):
         self.assertIsInstance(pln, Plane)
 
 
+class TestTopologyEntities(unittest.TestCase):
+    """
+    Test cases for afem.topology.entities.
+    """
+
+    def test_shape_topology_cache(self):
+        solid = BoxBySize(10., 10., 10.).solid
+        self.assertEqual(solid.num_edges, 12)
+        self.assertEqual(len(solid.edges), 12)
+        self.assertEqual(len(solid.edges), 12)
+        info = solid.cache_info
+        self.assertEqual(info['misses'], 1)
+        self.assertEqual(info['hits'], 2)
+
+        e = solid.edges[0]
+        self.assertEqual(len(solid.ancestors(e, Shape.FACE)), 2)
+        self.assertEqual(len(solid.ancestors(e.first_vertex, Shape.EDGE)), 3)
+        self.assertEqual(solid.ancestors(solid, Shape.FACE), [])
+
+        solid.invalidate_cache()
+        self.assertEqual(solid.cache_info['size'], 0)
+        self.assertEqual(len(solid.faces), 6)
+
+    def test_shape_sub_shape_reverse(self):
+        solid = BoxBySize(10., 10., 10.).solid
+        face = solid.faces[0]
+        orientation = int(face.object.Orientation())
+        face.reverse()
+        self.assertNotEqual(int(face.object.Orientation()), orientation)
+        self.assertEqual(int(solid.faces[0].object.Orientation()),
+                         orientation)
+        self.assertTrue(solid.faces[0].is_same(face))
+
+    def test_shape_index(self):
+        box1 = BoxBy2Points((0, 0, 0), (1, 1, 1)).solid
+        box2 = BoxBy2Points((2, 0, 0), (3, 1, 1)).solid
+        box3 = BoxBy2Points((0, 2, 0), (1, 3, 1)).solid
+        index = ShapeIndex([box1, box2, box3])
+        self.assertEqual(len(index), 3)
+
+        self.assertListEqual(index.overlap([0.5, 0.5, 0.5, 2.5, 0.6, 0.6]),
+                             [box1, box2])
+        self.assertListEqual(index.ray((-1, 0.5, 0.5), (1, 0, 0)),
+                             [box1, box2])
+        pln = PlaneByAxes((2.5, 0, 0), 'yz').plane
+        self.assertListEqual(index.slab(pln), [box2])
+        self.assertListEqual(index.nearest((0.5, 2.5, 0.5), 2), [box3, box1])
+
+        self.assertTrue(index.remove(box2))
+        self.assertFalse(index.remove(box2))
+        self.assertListEqual(index.ray((-1, 0.5, 0.5), (1, 0, 0)), [box1])
+        index.insert(box2)
+        self.assertEqual(len(index), 3)
+
+    def test_shape_index_remove(self):
+        boxes = [BoxBy2Points((2 * i, 0, 0), (2 * i + 1, 1, 1)).solid
+                 for i in range(6)]
+        index = ShapeIndex(boxes)
+        for box in boxes[:4]:
+            self.assertTrue(index.remove(box))
+        self.assertEqual(len(index), 2)
+        self.assertListEqual(index.items, boxes[4:])
+        self.assertListEqual(index.overlap([0, 0, 0, 11, 1, 1]), boxes[4:])
+        self.assertAlmostEqual(index.bounds(boxes[5])[0], 10., places=5)
+        index.insert(boxes[0])
+        self.assertListEqual(index.overlap([0, 0, 0, 11, 1, 1]),
+                             boxes[4:] + boxes[:1])
+
+
 class TestTopologyBop(unittest.TestCase):
     """
     Test cases for afem.topology.bop.
@@ -387,6 +467,39 @@ class TestTopologyBop(unittest.TestCase):
         section.build()
         self.assertTrue(section.is_done)
 
+    def test_intersect_shapes_cache(self):
+        e1 = EdgeByPoints((0., 0., 0.), (10., 0., 0.)).edge
+        e2 = EdgeByPoints((5., 1., 0.), (5., -1., 0.)).edge
+        cache = IntersectionCache.enable()
+        try:
+            section1 = IntersectShapes(e1, e2)
+            section2 = IntersectShapes(e1, e2)
+            self.assertEqual(cache.hits, 1)
+            self.assertTrue(section2.is_done)
+            self.assertTrue(section1.shape.is_same(section2.shape))
+
+            # Changing a cached intersection does not change later hits
+            e3 = EdgeByPoints((8., 1., 0.), (8., -1., 0.)).edge
+            section2.set_tools([e3])
+            section2.build()
+            self.assertTrue(section2.shape.vertices[0].point.is_equal(
+                (8., 0., 0.)))
+            section3 = IntersectShapes(e1, e2)
+            self.assertEqual(cache.hits, 2)
+            self.assertTrue(section3.shape.is_same(section1.shape))
+            self.assertTrue(section3.shape.vertices[0].point.is_equal(
+                (5., 0., 0.)))
+
+            # Building a cached intersection uses the tool
+            section3.build()
+            self.assertTrue(section3.is_done)
+            self.assertTrue(section3.shape.vertices[0].point.is_equal(
+                (5., 0., 0.)))
+            self.assertEqual(cache.hits, 2)
+        finally:
+            IntersectionCache.disable()
+        self.assertIsNone(IntersectionCache.get_default())
+
     def test_split_shapes(self):
         e1 = EdgeByPoints((0., 0., 0.), (10., 0., 0.)).edge
         e2 = EdgeByPoints((5., 1., 0.), (5., -1., 0.)).edge
@@ -543,6 +656,28 @@ class TestTopologyBop(unittest.TestCase):
         self.assertEqual(len(section.vertices), 2)
 
 
+class TestTopologyCheck(unittest.TestCase):
+    """
+    Test cases for afem.topology.check.
+    """
+
+    def test_classify_points_in_solid(self):
+        box = BoxBy2Points((0, 0, 0), (1, 1, 1)).solid
+        pnts = [(0.5, 0.5, 0.5), (5., 5., 5.), (1., 0.5, 0.5),
+                (0.25, 0.75, 0.5)]
+        tool = ClassifyPointsInSolid(box, pnts)
+        self.assertEqual(tool.npts, 4)
+        self.assertListEqual(tool.is_in.tolist(), [True, False, False, True])
+        self.assertListEqual(tool.is_out.tolist(),
+                             [False, True, False, False])
+        self.assertTrue(tool.is_on[2])
+
+        for i, p in enumerate(pnts):
+            tool2 = ClassifyPointInSolid(box, p)
+            self.assertEqual(tool.is_in[i], tool2.is_in)
+            self.assertEqual(tool.is_out[i], tool2.is_out)
+
+
 class TestTopologyDistance(unittest.TestCase):
     """
     Test cases for afem.topoloy.distance.
@@ -565,6 +700,20 @@ class TestTopologyDistance(unittest.TestCase):
         self.assertAlmostEqual(tool.sorted_distances[0], 5.)
         self.assertAlmostEqual(tool.sorted_distances[1], 10.)
 
+    def test_distance_shape_to_shapes_nearest(self):
+        v1 = VertexByPoint((0., 0., 0.)).vertex
+        others = [VertexByPoint((x, 0., 0.)).vertex
+                  for x in (10., 5., 20., 2., 15.)]
+        tool = DistanceShapeToShapes(v1, others, k=2)
+        self.assertEqual(len(tool.sorted_distances), 2)
+        self.assertAlmostEqual(tool.dmin, 2.)
+        self.assertAlmostEqual(tool.dmax, 5.)
+        self.assertTrue(tool.nearest_shape.is_same(others[3]))
+
+        tool = DistancePointToShapes((0., 0., 0.), others, k=1)
+        self.assertEqual(len(tool.sorted_shapes), 1)
+        self.assertAlmostEqual(tool.dmin, 2.)
+
 
 class TestTopologyExplore(unittest.TestCase):
     """
@@ -580,6 +729,22 @@ class TestTopologyExplore(unittest.TestCase):
         explorer = ExploreWire(wire)
         self.assertEqual(explorer.nedges, 4)
 
+    def test_topology_adjacency(self):
+        faces = BoxBySize(10., 10., 10.).solid.faces
+        adj = TopologyAdjacency(faces)
+        self.assertEqual(adj.nowners, 6)
+        self.assertEqual(len(adj.shared_shapes(Shape.EDGE)), 12)
+        self.assertEqual(len(adj.shared_shapes(Shape.FACE)), 0)
+        self.assertEqual(len(adj.shared_pairs(Shape.EDGE)), 12)
+        self.assertEqual(len(adj.neighbors(faces[0])), 4)
+        self.assertEqual(len(adj.neighbors(0, Shape.VERTEX)), 4)
+
+        edge = faces[0].edges[0]
+        owners = adj.owners_of(edge)
+        self.assertEqual(len(owners), 2)
+        self.assertListEqual(adj.shared_between(owners[0], owners[1]),
+                             [edge])
+
 
 class TestTopologyModify(unittest.TestCase):
     """
@@ -707,5 +872,68 @@ class TestTopologyTransform(unittest.TestCase):
         self.assertAlmostEqual(1.5, prop.cg.x)
 
 
+class TestAdaptorEntities(unittest.TestCase):
+    """
+    Test cases for afem.adaptor.entities.
+    """
+
+    def test_wire_adaptor_eval_many(self):
+        p1 = (0., 0., 0.)
+        p2 = (1., 0., 0.)
+        p3 = (1., 1., 0.)
+        p4 = (0., 1., 0.)
+        wire = WireByPoints([p1, p2, p3, p4], True).wire
+        for curvilinear_knots in [False, True]:
+            adp_crv = WireAdaptorCurve.by_wire(wire, curvilinear_knots)
+            u = [adp_crv.u2, adp_crv.u1, 0.3 * adp_crv.u2, 0.6 * adp_crv.u2]
+            pnts = adp_crv.eval_many(u)
+            ders = adp_crv.deriv_many(u)
+            for i, ui in enumerate(u):
+                p = adp_crv.eval(ui)
+                v = adp_crv.deriv(ui)
+                for j in range(3):
+                    self.assertAlmostEqual(pnts[i, j], p.xyz[j])
+                    self.assertAlmostEqual(ders[i, j], v.xyz[j])
+            s = adp_crv.arc_length_many(u)
+            self.assertAlmostEqual(s[0], 4.)
+            table = adp_crv.arc_length_table()
+            self.assertIs(adp_crv.arc_length_table(), table)
+            self.assertAlmostEqual(table.length, 4.)
+            self.assertAlmostEqual(s[1], 0.)
+            self.assertAlmostEqual(s[2], 1.2)
+
+    def test_face_adaptor_eval_many(self):
+        p1 = (0., 0., 0.)
+        p2 = (1., 0., 0.)
+        p3 = (1., 1., 0.)
+        p4 = (0., 1., 0.)
+        wire = WireByPoints([p1, p2, p3, p4], True).wire
+        face = FaceByPlanarWire(wire).face
+        adp_srf = FaceAdaptorSurface.by_face(face)
+        u = [adp_srf.u1, 0.5 * (adp_srf.u1 + adp_srf.u2), adp_srf.u2]
+        v = [adp_srf.v1, adp_srf.v2, 0.5 * (adp_srf.v1 + adp_srf.v2)]
+        pnts = adp_srf.eval_many(u, v)
+        vn = adp_srf.norm_many(u, v)
+        grid = adp_srf.eval_grid(u, v)
+        self.assertEqual(grid.shape, (3, 3, 3))
+        for i in range(3):
+            p = adp_srf.eval(u[i], v[i])
+            n = adp_srf.norm(u[i], v[i])
+            for j in range(3):
+                self.assertAlmostEqual(pnts[i, j], p.xyz[j])
+                self.assertAlmostEqual(vn[i, j], n.xyz[j])
+                self.assertAlmostEqual(grid[i, i, j], p.xyz[j])
+
+        du = adp_srf.u2 - adp_srf.u1
+        dv = adp_srf.v2 - adp_srf.v1
+        u = [adp_srf.u1 + 0.5 * du, adp_srf.u1 - du, adp_srf.u1]
+        v = [adp_srf.v1 + 0.5 * dv, adp_srf.v1 + 0.5 * dv, adp_srf.v1]
+        self.assertListEqual(adp_srf.classify_many(u, v).tolist(),
+                             [True, False, True])
+        self.assertListEqual(adp_srf.classify_many(u, v, 1.0e-7,
+                                                   False).tolist(),
+                             [True, False, False])
+
+
 if __name__ == '__main__':
     unittest.main()